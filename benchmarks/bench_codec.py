@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: "2026-10-18 20:04:37 (ywatanabe)"
+# File: /home/ywatanabe/proj/mdjson/benchmarks/bench_codec.py
+
+__file__ = "/home/ywatanabe/proj/mdjson/benchmarks/bench_codec.py"
+
+import os
+import sys
+
+# __file__ is pinned above, so find the sibling modules through argv
+sys.path.insert(0, os.path.dirname(os.path.abspath(sys.argv[0])))
+
+from generate import corpus
+from harness import Suite, parser
+
+from mdjson import codec
+from mdjson.convert import _md_to_json, _simplify_pandoc_json
+
+
+def _available() -> list:
+    names = []
+    for name in codec.CODECS[1:]:
+        try:
+            codec.set_codec(name)
+        except ImportError:
+            continue
+        names.append(name)
+    return names
+
+
+def main() -> int:
+    args = parser(
+        "Time JSON encoding and decoding with every installed codec"
+    ).parse_args()
+    suite = Suite(args)
+    print(f"{'case':<48} {'best':>14} {'throughput':>14} {'peak':>13}")
+
+    names = _available()
+    try:
+        for name, markdown in corpus(args.profile).items():
+            pandoc_json = _md_to_json(text=markdown)
+            pandoc_text = codec._JSON.dumps(pandoc_json, indent=None)
+            simplified = _simplify_pandoc_json(pandoc_json)
+            n_bytes = len(codec._JSON.dumps(simplified).encode("utf-8"))
+            for codec_name in names:
+                codec.set_codec(codec_name)
+                suite.run(
+                    f"{name}/loads_pandoc_{codec_name}",
+                    lambda: codec.loads(pandoc_text),
+                    len(pandoc_text),
+                )
+                suite.run(
+                    f"{name}/dumps_indent2_{codec_name}",
+                    lambda: codec.dumps(simplified, 2),
+                    n_bytes,
+                )
+                suite.run(
+                    f"{name}/dumps_compact_{codec_name}",
+                    lambda: codec.dumps(simplified, None),
+                    n_bytes,
+                )
+    finally:
+        codec.set_codec()
+    return suite.finish()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
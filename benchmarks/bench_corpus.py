@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: "2026-10-18 21:04:50 (ywatanabe)"
+# File: /home/ywatanabe/proj/mdjson/benchmarks/bench_corpus.py
+
+__file__ = "/home/ywatanabe/proj/mdjson/benchmarks/bench_corpus.py"
+
+import os
+import random
+import sys
+import tempfile
+
+# __file__ is pinned above, so find the sibling modules through argv
+sys.path.insert(0, os.path.dirname(os.path.abspath(sys.argv[0])))
+
+from harness import Suite, parser
+
+from mdjson import CorpusReader, CorpusWriter, codec
+
+SIZES = {"quick": 2000, "default": 20000, "full": 200000}
+
+
+def _document(i: int) -> dict:
+    return {
+        "sections": [
+            {
+                "title": f"Document {i} section {j}",
+                "content": [f"Paragraph {k} of document {i}." for k in (1, 2)]
+                + [[f"item {k}" for k in range(4)]],
+                "subsections": [],
+            }
+            for j in range(3)
+        ]
+    }
+
+
+def _load_files(paths: list) -> list:
+    documents = []
+    for path in paths:
+        with open(path, "rb") as f:
+            documents.append(codec.loads(f.read()))
+    return documents
+
+
+def _load_corpus(path: str) -> list:
+    with CorpusReader(path) as corpus:
+        return [document for _, document in corpus.items()]
+
+
+def _random_access(path: str, ids: list) -> list:
+    with CorpusReader(path) as corpus:
+        return [corpus[doc_id] for doc_id in ids]
+
+
+def main() -> int:
+    args = parser(
+        "Time loading simplified documents from one file each versus one"
+        " JSON Lines container"
+    ).parse_args()
+    suite = Suite(args)
+    print(f"{'case':<48} {'best':>14} {'throughput':>14} {'peak':>13}")
+
+    n_docs = SIZES[args.profile]
+    with tempfile.TemporaryDirectory() as tmpdir:
+        paths = []
+        container = os.path.join(tmpdir, "corpus.jsonl")
+        with CorpusWriter(container) as writer:
+            for i in range(n_docs):
+                document = _document(i)
+                path = os.path.join(tmpdir, f"{i % 100:02d}", f"{i}.json")
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, "w") as f:
+                    f.write(codec.dumps(document))
+                paths.append(path)
+                writer.add(str(i), document)
+        n_bytes = os.path.getsize(container)
+        sample = random.Random(0).sample(range(n_docs), n_docs // 10)
+
+        suite.run(f"{n_docs}_docs/load_files", lambda: _load_files(paths),
+                  n_bytes)
+        suite.run(f"{n_docs}_docs/load_corpus",
+                  lambda: _load_corpus(container), n_bytes)
+        suite.run(f"{n_docs}_docs/random_10pct_files",
+                  lambda: _load_files([paths[i] for i in sample]),
+                  n_bytes // 10)
+        suite.run(f"{n_docs}_docs/random_10pct_corpus",
+                  lambda: _random_access(container, [str(i) for i in sample]),
+                  n_bytes // 10)
+    return suite.finish()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
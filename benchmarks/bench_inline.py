@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: "2026-10-18 17:58:02 (ywatanabe)"
+# File: /home/ywatanabe/proj/mdjson/benchmarks/bench_inline.py
+
+__file__ = "/home/ywatanabe/proj/mdjson/benchmarks/bench_inline.py"
+
+import os
+import sys
+
+# __file__ is pinned above, so find the sibling modules through argv
+sys.path.insert(0, os.path.dirname(os.path.abspath(sys.argv[0])))
+
+from generate import corpus
+from harness import Suite, parser
+
+from mdjson.convert import _md_to_json, _simplify_pandoc_json
+
+_KEPT = ("Str", "Space", "SoftBreak", "LineBreak")
+
+
+def _join_text_elements(elements, dropped):
+    # The inline join _simplify_pandoc_json used before the single-pass
+    # flattener, kept as the reference point
+    if dropped is not None:
+        dropped.extend(
+            elem.get("t")
+            for elem in elements
+            if isinstance(elem, dict) and elem.get("t") not in _KEPT
+        )
+    return " ".join(
+        elem.get("c", "")
+        for elem in elements
+        if isinstance(elem, dict) and elem.get("t") in ["Str", "Space"]
+    )
+
+
+def _reference_simplify(pandoc_json, dropped=None):
+    """_simplify_pandoc_json as it was, built on _join_text_elements"""
+    sections = []
+    root_section = current_section = None
+    for block in pandoc_json["blocks"]:
+        if block["t"] == "Header":
+            level = block["c"][0]
+            title = _join_text_elements(block["c"][2], dropped)
+            if level == 1:
+                root_section = {"title": title, "content": [], "subsections": []}
+                sections.append(root_section)
+                current_section = root_section
+            elif level == 2 and root_section is not None:
+                current_section = {"title": title, "content": []}
+                root_section["subsections"].append(current_section)
+        elif block["t"] == "Para" and current_section:
+            current_section["content"].append(
+                _join_text_elements(block["c"], dropped)
+            )
+        elif block["t"] == "BulletList" and current_section:
+            current_section["content"].append(
+                [
+                    _join_text_elements(item[0]["c"], dropped)
+                    for item in block["c"]
+                ]
+            )
+    return {"sections": sections}
+
+
+def main() -> int:
+    args = parser(
+        "Time inline flattening against the previous join on list-heavy"
+        " documents"
+    ).parse_args()
+    suite = Suite(args)
+    print(f"{'case':<48} {'best':>14} {'throughput':>14} {'peak':>13}")
+
+    speedups = []
+    for name, markdown in corpus(args.profile).items():
+        if args.keyword and args.keyword not in name:
+            continue
+        n_bytes = len(markdown.encode("utf-8"))
+        pandoc_json = _md_to_json(text=markdown)
+        # "_dropped" also records the lost markup, as --verify structural does
+        for label in ("", "_dropped"):
+            suite.run(
+                f"{name}/reference_join{label}",
+                lambda: _reference_simplify(pandoc_json, [] if label else None),
+                n_bytes,
+            )
+            suite.run(
+                f"{name}/simplify{label}",
+                lambda: _simplify_pandoc_json(pandoc_json, [] if label else None),
+                n_bytes,
+            )
+            reference = suite.results.get(f"{name}/reference_join{label}")
+            current = suite.results.get(f"{name}/simplify{label}")
+            if reference and current:
+                speedups.append(
+                    (name + label, reference["seconds"] / current["seconds"])
+                )
+
+    print(f"\n{'case':<48} {'speedup':>8}")
+    for name, speedup in speedups:
+        print(f"{name:<48} {speedup:>7.2f}x")
+    return suite.finish()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
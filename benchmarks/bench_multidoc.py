@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: "2026-10-19 01:02:18 (ywatanabe)"
+# File: /home/ywatanabe/proj/mdjson/benchmarks/bench_multidoc.py
+
+__file__ = "/home/ywatanabe/proj/mdjson/benchmarks/bench_multidoc.py"
+
+import os
+import sys
+
+# __file__ is pinned above, so find the sibling modules through argv
+sys.path.insert(0, os.path.dirname(os.path.abspath(sys.argv[0])))
+
+import generate
+from harness import Suite, parser
+
+from mdjson import convert_text, convert_texts
+
+SIZES = {"quick": 50, "default": 200, "full": 1000}
+
+
+def main() -> int:
+    args = parser(
+        "Time converting many small documents with one pandoc run each"
+        " versus one joined pandoc run"
+    ).parse_args()
+    suite = Suite(args)
+    print(f"{'case':<48} {'best':>14} {'throughput':>14} {'peak':>13}")
+
+    n_docs = SIZES[args.profile]
+    notes = [generate.note(seed) for seed in range(n_docs)]
+    simplified = [convert_text(text, "md")[0] for text in notes]
+    for from_format, texts in (("md", notes), ("json", simplified)):
+        direction = "md2json" if from_format == "md" else "json2md"
+        n_bytes = sum(len(text.encode("utf-8")) for text in texts)
+        for verify in ("none", "full"):
+            case = f"{n_docs}_notes/{direction}/verify_{verify}"
+            suite.run(
+                f"{case}/single",
+                lambda: [
+                    convert_text(text, from_format, verify=verify)
+                    for text in texts
+                ],
+                n_bytes,
+            )
+            suite.run(
+                f"{case}/joined",
+                lambda: convert_texts(texts, from_format, verify=verify),
+                n_bytes,
+            )
+    return suite.finish()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: "2026-10-19 03:14:51 (ywatanabe)"
+# File: /home/ywatanabe/proj/mdjson/benchmarks/bench_shard.py
+
+__file__ = "/home/ywatanabe/proj/mdjson/benchmarks/bench_shard.py"
+
+import os
+import sys
+
+# __file__ is pinned above, so find the sibling modules through argv
+sys.path.insert(0, os.path.dirname(os.path.abspath(sys.argv[0])))
+
+import generate
+from harness import Suite, parser
+
+from mdjson import convert_text
+
+SIZES = {"quick": 1 << 20, "default": 8 << 20, "full": 64 << 20}
+
+
+def main() -> int:
+    args = parser(
+        "Time converting one huge document serially versus in"
+        " section-sharded worker processes"
+    ).parse_args()
+    suite = Suite(args)
+    print(f"{'case':<48} {'best':>14} {'throughput':>14} {'peak':>13}")
+
+    markdown = generate.manual(SIZES[args.profile])
+    simplified = convert_text(markdown, "md", verify="none")[0]
+    jobs = os.cpu_count() or 1
+    for from_format, text in (("md", markdown), ("json", simplified)):
+        direction = "md2json" if from_format == "md" else "json2md"
+        n_bytes = len(text.encode("utf-8"))
+        for n_jobs in sorted({1, jobs}):
+            suite.run(
+                f"manual/{direction}/jobs_{n_jobs}",
+                lambda: convert_text(
+                    text, from_format, verify="none", jobs=n_jobs
+                ),
+                n_bytes,
+            )
+    return suite.finish()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
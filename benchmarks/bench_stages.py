@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: "2026-10-18 17:37:15 (ywatanabe)"
+# File: /home/ywatanabe/proj/mdjson/benchmarks/bench_stages.py
+
+__file__ = "/home/ywatanabe/proj/mdjson/benchmarks/bench_stages.py"
+
+import json
+import os
+import sys
+import tempfile
+import warnings
+
+# __file__ is pinned above, so find the sibling modules through argv
+sys.path.insert(0, os.path.dirname(os.path.abspath(sys.argv[0])))
+
+from generate import corpus
+from harness import Suite, parser
+
+from mdjson.convert import (
+    _json_to_md,
+    _md_to_json,
+    _simplified_to_pandoc_json,
+    _simplify_pandoc_json,
+    mdjson,
+)
+from mdjson.model import Document
+from mdjson.verify import ReversibilityWarning
+
+
+def main() -> int:
+    args = parser(
+        "Time every conversion stage on synthetic documents"
+    ).parse_args()
+    suite = Suite(args)
+    # deep_lists is lossy on purpose; only its timings matter here
+    warnings.simplefilter("ignore", ReversibilityWarning)
+    print(f"{'case':<48} {'best':>14} {'throughput':>14} {'peak':>13}")
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for name, markdown in corpus(args.profile).items():
+            n_bytes = len(markdown.encode("utf-8"))
+            pandoc_json = _md_to_json(text=markdown)
+            simplified = _simplify_pandoc_json(pandoc_json)
+            rebuilt = _simplified_to_pandoc_json(simplified)
+            json_bytes = len(json.dumps(simplified).encode("utf-8"))
+
+            suite.run(
+                f"{name}/md_to_json",
+                lambda: _md_to_json(text=markdown),
+                n_bytes,
+            )
+            suite.run(
+                f"{name}/simplify_pandoc_json",
+                lambda: _simplify_pandoc_json(pandoc_json),
+                n_bytes,
+            )
+            suite.run(
+                f"{name}/simplified_to_pandoc_json",
+                lambda: _simplified_to_pandoc_json(simplified),
+                json_bytes,
+            )
+            suite.run(
+                f"{name}/document_pandoc_json_text",
+                lambda: Document.from_simplified(simplified).pandoc_json_text(),
+                json_bytes,
+            )
+            suite.run(
+                f"{name}/json_to_md",
+                lambda: _json_to_md(rebuilt),
+                json_bytes,
+            )
+
+            md_file = os.path.join(tmpdir, f"{name}.md")
+            json_file = os.path.join(tmpdir, f"{name}.json")
+            out_file = os.path.join(tmpdir, f"{name}.out.md")
+            with open(md_file, "w") as f:
+                f.write(markdown)
+            suite.run(
+                f"{name}/mdjson_md_to_json_stream",
+                lambda: mdjson(md_file, json_file, verify="none", stream=True),
+                n_bytes,
+            )
+            for check in (False, True):
+                label = "checked" if check else "unchecked"
+                suite.run(
+                    f"{name}/mdjson_md_to_json_{label}",
+                    lambda: mdjson(md_file, json_file, check_reversible=check),
+                    n_bytes,
+                )
+                suite.run(
+                    f"{name}/mdjson_json_to_md_{label}",
+                    lambda: mdjson(json_file, out_file, check_reversible=check),
+                    json_bytes,
+                )
+    return suite.finish()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
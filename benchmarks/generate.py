@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: "2026-10-18 17:55:21 (ywatanabe)"
+# File: /home/ywatanabe/proj/mdjson/benchmarks/generate.py
+
+__file__ = "/home/ywatanabe/proj/mdjson/benchmarks/generate.py"
+
+import random
+
+_WORDS = """
+lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor
+incididunt ut labore et dolore magna aliqua enim ad minim veniam quis nostrud
+exercitation ullamco laboris nisi aliquip ex ea commodo consequat duis aute
+irure in reprehenderit voluptate velit esse cillum eu fugiat nulla pariatur
+""".split()
+
+
+def _sentence(rng: random.Random, n_words: int) -> str:
+    words = [rng.choice(_WORDS) for _ in range(n_words)]
+    return " ".join(words).capitalize() + "."
+
+
+def _paragraph(rng: random.Random, n_words: int, width: int = 72) -> str:
+    # Wrapped like hand-written markdown, so soft breaks are exercised
+    text = " ".join(
+        _sentence(rng, rng.randint(6, 14)) for _ in range(max(1, n_words // 10))
+    )
+    lines, line = [], ""
+    for word in text.split():
+        if line and len(line) + len(word) >= width:
+            lines.append(line)
+            line = word
+        else:
+            line = f"{line} {word}" if line else word
+    lines.append(line)
+    return "\n".join(lines)
+
+
+def document(
+    n_sections: int = 5,
+    n_subsections: int = 3,
+    n_paragraphs: int = 2,
+    n_items: int = 4,
+    n_words: int = 60,
+    seed: int = 0,
+) -> str:
+    """Markdown with the structure the simplified schema keeps"""
+    rng = random.Random(seed)
+    blocks = []
+    for i in range(n_sections):
+        blocks.append(f"# Section {i + 1}")
+        blocks.append(_paragraph(rng, n_words))
+        for j in range(n_subsections):
+            blocks.append(f"## Subsection {i + 1}.{j + 1}")
+            for _ in range(n_paragraphs):
+                blocks.append(_paragraph(rng, n_words))
+            if n_items:
+                blocks.append(
+                    "\n".join(
+                        f"- {_sentence(rng, rng.randint(3, 8))}"
+                        for _ in range(n_items)
+                    )
+                )
+    return "\n\n".join(blocks) + "\n"
+
+
+def note(seed: int = 0) -> str:
+    """A tiny note: one section and a short paragraph"""
+    return document(1, 0, 0, 0, n_words=20, seed=seed)
+
+
+def manual(target_bytes: int, seed: int = 0) -> str:
+    """A long manual of roughly target_bytes"""
+    chapter = document(10, 5, 3, 6, n_words=80, seed=seed)
+    repeats = max(1, target_bytes // len(chapter.encode("utf-8")))
+    return "\n".join(chapter for _ in range(repeats))
+
+
+def many_sections(n_sections: int, seed: int = 0) -> str:
+    """Many small sections, stressing per-block overhead"""
+    return document(n_sections, 1, 1, 2, n_words=15, seed=seed)
+
+
+def deep_lists(depth: int = 8, width: int = 4, seed: int = 0) -> str:
+    """Nested bullet lists, `width` items per level down to `depth`"""
+    rng = random.Random(seed)
+    lines = ["# Lists", ""]
+
+    def emit(level: int) -> None:
+        for _ in range(width):
+            lines.append("  " * level + "- " + _sentence(rng, 5))
+            if level + 1 < depth and rng.random() < 0.5:
+                emit(level + 1)
+
+    for _ in range(width):
+        emit(0)
+        lines.append("")
+    return "\n".join(lines)
+
+
+def rich_lists(n_sections: int = 20, n_items: int = 50, seed: int = 0) -> str:
+    """Long bullet lists whose items mix emphasis, code and links"""
+    rng = random.Random(seed)
+    markups = (
+        "*{}*",
+        "**{}**",
+        "`{}`",
+        "[{}](https://example.org/{})",
+        "~~{}~~",
+        "{}",
+        "{}",
+    )
+    blocks = []
+    for i in range(n_sections):
+        blocks.append(f"# Lists {i + 1}")
+        items = []
+        for _ in range(n_items):
+            words = [
+                rng.choice(markups).format(word, word)
+                for word in rng.sample(_WORDS, rng.randint(4, 12))
+            ]
+            items.append("- " + " ".join(words))
+        blocks.append("\n".join(items))
+    return "\n\n".join(blocks) + "\n"
+
+
+# name -> (profile, generator); profiles are cumulative
+CORPUS = {
+    "note": ("quick", note),
+    "document": ("quick", document),
+    "deep_lists": ("quick", deep_lists),
+    "sections_200": ("quick", lambda: many_sections(200)),
+    "rich_lists": ("quick", rich_lists),
+    "manual_1mb": ("default", lambda: manual(1024 * 1024)),
+    "sections_5000": ("default", lambda: many_sections(5000)),
+    "rich_lists_10000": ("default", lambda: rich_lists(20, 500)),
+    "manual_10mb": ("full", lambda: manual(10 * 1024 * 1024)),
+    "manual_50mb": ("full", lambda: manual(50 * 1024 * 1024)),
+}
+
+PROFILES = ("quick", "default", "full")
+
+
+def corpus(profile: str = "default") -> dict:
+    """Generate the documents of a profile and of every smaller one"""
+    allowed = PROFILES[: PROFILES.index(profile) + 1]
+    return {
+        name: generator()
+        for name, (level, generator) in CORPUS.items()
+        if level in allowed
+    }
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: "2026-10-18 15:06:12 (ywatanabe)"
+# File: /home/ywatanabe/proj/mdjson/benchmarks/harness.py
+
+__file__ = "/home/ywatanabe/proj/mdjson/benchmarks/harness.py"
+
+import argparse
+import gc
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Callable, NamedTuple, Optional
+
+
+class Measurement(NamedTuple):
+    seconds: float
+    mb_per_s: float
+    peak_bytes: int
+
+
+def measure(
+    func: Callable[[], object], n_bytes: int, repeat: int = 5
+) -> Measurement:
+    """
+    Time func (best of `repeat` runs) and record its peak Python memory
+
+    Peak memory comes from a separate traced run, since tracemalloc slows
+    allocation-heavy code. It covers this process only, not pandoc.
+    """
+    func()  # warm up caches and pandoc
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    best = min(timings)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return Measurement(best, n_bytes / best / 1e6 if best else 0.0, peak)
+
+
+def _metadata() -> dict:
+    from mdjson import __version__
+    from mdjson.backend import pandoc_version
+
+    return {
+        "mdjson": __version__,
+        "pandoc": pandoc_version(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+    }
+
+
+def parser(description: str) -> argparse.ArgumentParser:
+    """Command line shared by the benchmark scripts"""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument(
+        "--profile",
+        choices=["quick", "default", "full"],
+        default="default",
+        help="Document sizes to run (full adds 10 MB and 50 MB manuals)",
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs")
+    parser.add_argument(
+        "-k", dest="keyword", help="Only run cases containing this string"
+    )
+    parser.add_argument("--save-baseline", metavar="FILE")
+    parser.add_argument("--compare", metavar="FILE")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="Slowdown ratio counted as a regression (default 0.2 = 20%%)",
+    )
+    return parser
+
+
+class Suite:
+    """Collects measurements, prints them and handles baselines"""
+
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.results = {}
+
+    def run(self, name: str, func: Callable[[], object], n_bytes: int):
+        if self.args.keyword and self.args.keyword not in name:
+            return
+        result = measure(func, n_bytes, self.args.repeat)
+        self.results[name] = result._asdict()
+        print(
+            f"{name:<48} {result.seconds * 1e3:>11.2f} ms"
+            f" {result.mb_per_s:>9.2f} MB/s"
+            f" {result.peak_bytes / 2**20:>9.2f} MiB",
+            flush=True,
+        )
+
+    def finish(self) -> int:
+        if self.args.save_baseline:
+            with open(self.args.save_baseline, "w") as f:
+                json.dump(
+                    {"metadata": _metadata(), "results": self.results},
+                    f,
+                    indent=2,
+                )
+            print(f"Saved baseline to {self.args.save_baseline}")
+        if self.args.compare:
+            return self.compare(self.args.compare)
+        return 0
+
+    def compare(self, path: str) -> int:
+        with open(path) as f:
+            baseline = json.load(f)
+        metadata = _metadata()
+        if baseline.get("metadata") != metadata:
+            print(
+                f"Note: baseline recorded with {baseline.get('metadata')},"
+                f" now {metadata}",
+                file=sys.stderr,
+            )
+        regressions = 0
+        print(f"\n{'case':<48} {'baseline':>11} {'now':>11} {'change':>8}")
+        for name, result in self.results.items():
+            old: Optional[dict] = baseline["results"].get(name)
+            if old is None:
+                continue
+            change = result["seconds"] / old["seconds"] - 1
+            flag = ""
+            if change > self.args.threshold:
+                regressions += 1
+                flag = "  REGRESSION"
+            print(
+                f"{name:<48} {old['seconds'] * 1e3:>8.2f} ms"
+                f" {result['seconds'] * 1e3:>8.2f} ms {change:>+8.1%}{flag}"
+            )
+        print(f"{regressions} regression(s) beyond {self.args.threshold:.0%}")
+        return 1 if regressions else 0
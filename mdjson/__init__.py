@@ -1,18 +1,70 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
-# Time-stamp: "2025-01-01 18:59:01 (ywatanabe)"
+# Time-stamp: "2026-10-19 09:26:31 (ywatanabe)"
 # File: /home/ywatanabe/proj/mdjson/mdjson/__init__.py
 
 __file__ = "/home/ywatanabe/proj/mdjson/mdjson/__init__.py"
 
-from .convert import (
-    _md_to_json,
-    _json_to_md,
-    _jsonify_markdown,
-    _markdownify_json,
-    _simplify_pandoc_json,
-    _simplified_to_pandoc_json,
-    mdjson,
-)
+import importlib
 
 __version__ = "0.1.0"
+
+# Public names and the submodule defining each. Submodules are imported on
+# first access so that `import mdjson` (and the CLI) only pays for what is
+# used: asyncio, sqlite3, concurrent.futures and ctypes stay unloaded
+# until a feature needing them is touched.
+_EXPORTS = {
+    "backend": [
+        "PandocError",
+        "PandocWarning",
+        "PandocWorkerPool",
+        "SubprocessBackend",
+        "configure_backend",
+        "set_backend",
+        "shutdown",
+    ],
+    "cache": ["ConversionCache"],
+    "memo": ["SectionMemo", "configure_section_memo", "set_section_memo"],
+    "model": ["BulletList", "Document", "Paragraph", "Section"],
+    "convert": [
+        "_md_to_json",
+        "_json_to_md",
+        "_jsonify_markdown",
+        "_markdownify_json",
+        "_simplify_pandoc_json",
+        "_simplified_to_pandoc_json",
+        "convert_file",
+        "convert_text",
+        "mdjson",
+    ],
+    "converter": ["Converter"],
+    "multidoc": ["convert_texts"],
+    "batch": ["ConversionResult", "convert_many"],
+    "watcher": ["WatchEvent", "Watcher", "watch"],
+    "lazy": ["LazyDocument", "update_section"],
+    "corpus": ["CorpusReader", "CorpusWriter", "convert_to_corpus"],
+    "service": ["ConversionService", "Overloaded", "make_server"],
+    "aio": ["aconvert_text", "ajson_to_md", "amd_to_json", "amdjson"],
+    "verify": ["ReversibilityWarning", "VerificationResult"],
+    "stats": ["Stats", "collect_stats"],
+}
+_MODULES = {
+    name: module for module, names in _EXPORTS.items() for name in names
+}
+
+__all__ = list(_MODULES)
+
+
+def __getattr__(name: str):
+    module_name = _MODULES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module = importlib.import_module(f".{module_name}", __name__)
+    for export in _EXPORTS[module_name]:
+        globals()[export] = getattr(module, export)
+    return globals()[name]
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_MODULES))
+
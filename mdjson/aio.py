@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: "2026-10-19 09:26:31 (ywatanabe)"
+# File: /home/ywatanabe/proj/mdjson/mdjson/aio.py
+
+__file__ = "/home/ywatanabe/proj/mdjson/mdjson/aio.py"
+
+import asyncio
+import contextvars
+import functools
+import warnings
+import weakref
+from typing import TYPE_CHECKING, Optional, Tuple, Union
+
+from .backend import (
+    PandocError,
+    SubprocessBackend,
+    _warn_stderr,
+    get_backend,
+)
+from .convert import (
+    ENGINES,
+    _convert_text_steps,
+    _file_formats,
+    _json_to_md_steps,
+    _md_to_json_steps,
+    _run_pandoc,
+    _write_output,
+)
+from .stats import count, stage
+from .verify import ReversibilityWarning, VerificationResult
+
+if TYPE_CHECKING:
+    from .cache import ConversionCache
+
+DEFAULT_CONCURRENCY = 64
+
+_concurrency = DEFAULT_CONCURRENCY
+_semaphores = weakref.WeakKeyDictionary()
+
+
+def set_concurrency(limit: int) -> None:
+    """Limit the pandoc conversions in flight in each event loop"""
+    global _concurrency
+    if limit < 1:
+        raise ValueError("Concurrency limit must be at least 1")
+    _concurrency = limit
+    _semaphores.clear()
+
+
+def _semaphore() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    semaphore = _semaphores.get(loop)
+    if semaphore is None:
+        semaphore = _semaphores[loop] = asyncio.Semaphore(_concurrency)
+    return semaphore
+
+
+async def _in_thread(func, *args):
+    # The thread sees this task's context, e.g. a Converter's backend
+    call = functools.partial(contextvars.copy_context().run, func, *args)
+    return await asyncio.get_running_loop().run_in_executor(None, call)
+
+
+async def _arun_pandoc(
+    text: str, from_format: str, to_format: str, wrap_none: bool = False
+) -> str:
+    """
+    Run a single pandoc conversion without blocking the event loop
+
+    With the default backend pandoc runs as an asyncio subprocess, which
+    is killed if the awaiting task is cancelled. Other backends (e.g. a
+    PandocWorkerPool) are called from a thread; a cancelled call there
+    finishes in the background and its worker goes back to the pool.
+    """
+    backend = get_backend()
+    count("pandoc_calls")
+    async with _semaphore():
+        with stage("pandoc", text):
+            return await _arun_backend(
+                backend, text, from_format, to_format, wrap_none
+            )
+
+
+async def _arun_backend(backend, text, from_format, to_format, wrap_none):
+    if not isinstance(backend, SubprocessBackend):
+        return await _in_thread(
+            backend.convert, text, from_format, to_format, wrap_none
+        )
+
+    cmd = [backend.pandoc, "-f", from_format, "-t", to_format]
+    if wrap_none:
+        cmd.append("--wrap=none")
+    process = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    try:
+        stdout, stderr = await process.communicate(text.encode("utf-8"))
+    except BaseException:
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
+        raise
+    if process.returncode:
+        raise PandocError(
+            stderr.decode("utf-8", "replace"), from_format, to_format, text
+        )
+    _warn_stderr(stderr.decode("utf-8", "replace"), from_format, to_format)
+    return stdout.decode("utf-8")
+
+
+def _read_text(path: str) -> str:
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+async def _adrive(steps):
+    """
+    Async counterpart of convert._drive()
+
+    pandoc calls are awaited through _arun_pandoc(); other blocking calls,
+    such as cache lookups or sharded conversions, run in a thread.
+    """
+    value = error = None
+    while True:
+        try:
+            if error is None:
+                call = steps.send(value)
+            else:
+                call = steps.throw(error)
+        except StopIteration as stop:
+            return stop.value
+        func, *args = call
+        try:
+            if func is _run_pandoc:
+                value = await _arun_pandoc(*args)
+            else:
+                value = await _in_thread(func, *args)
+            error = None
+        except Exception as e:
+            value, error = None, e
+
+
+async def amd_to_json(
+    markdown_file: Optional[str] = None, *, text: Optional[str] = None
+) -> dict:
+    """Async counterpart of _md_to_json()"""
+    if text is None:
+        text = await _in_thread(_read_text, markdown_file)
+    return await _adrive(_md_to_json_steps(text))
+
+
+async def ajson_to_md(json_data: dict) -> str:
+    """Async counterpart of _json_to_md()"""
+    return await _adrive(_json_to_md_steps(json_data))
+
+
+async def aconvert_text(
+    text: str,
+    from_format: str,
+    indent: Optional[int] = 2,
+    verify: str = "full",
+    engine: str = "pandoc",
+    cache: Optional[Union[str, "ConversionCache"]] = None,
+    jobs: int = 1,
+) -> Tuple[str, VerificationResult]:
+    """Async counterpart of convert_text()"""
+    output, result, _ = await _adrive(
+        _convert_text_steps(
+            text, from_format, indent, verify, engine, cache, jobs
+        )
+    )
+    return output, result
+
+
+async def amdjson(
+    input_file: str,
+    output_file: Optional[str] = None,
+    indent: Optional[int] = 2,
+    check_reversible: bool = True,
+    engine: str = "pandoc",
+    cache: Optional[Union[str, "ConversionCache"]] = None,
+    verify: Optional[str] = None,
+    jobs: int = 1,
+) -> int:
+    """
+    Async counterpart of mdjson()
+
+    File I/O runs in the default executor and pandoc runs as an asyncio
+    subprocess (or on the configured worker pool). At most
+    set_concurrency() conversions run at once per event loop; cancelling
+    the task kills its pandoc process.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine: {engine}")
+    if verify is None:
+        verify = "full" if check_reversible else "none"
+    input_file, output_file, from_format = _file_formats(
+        input_file, output_file
+    )
+
+    text = await _in_thread(_read_text, input_file)
+    output, result, hit = await _adrive(
+        _convert_text_steps(
+            text, from_format, indent, verify, engine, cache, jobs
+        )
+    )
+    await _in_thread(_write_output, output_file, output, hit)
+    if result.reversible is False:
+        warnings.warn(
+            f"Conversion was not perfectly reversible ({result.detail})",
+            ReversibilityWarning,
+            stacklevel=2,
+        )
+    return 0
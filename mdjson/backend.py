@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: "2026-10-19 09:26:31 (ywatanabe)"
+# File: /home/ywatanabe/proj/mdjson/mdjson/backend.py
+
+__file__ = "/home/ywatanabe/proj/mdjson/mdjson/backend.py"
+
+import atexit
+import contextlib
+import contextvars
+import functools
+import os
+import queue
+import subprocess
+import threading
+import warnings
+from typing import Optional
+
+# Length-prefixed request loop run inside `pandoc lua`.
+# Request:  "<from> <to> <wrap> <nbytes>\n" followed by nbytes of input
+# Response: "ok <nbytes>\n" or "err <nbytes>\n" followed by nbytes of output
+# Output gets a final newline, as the pandoc command line does
+_WORKER_SCRIPT = """
+while true do
+  local header = io.read("l")
+  if header == nil then break end
+  local from, to, wrap, n = header:match("^(%S+) (%S+) (%S+) (%d+)$")
+  local text = io.read(tonumber(n)) or ""
+  local ok, out = pcall(function()
+    local opts = {}
+    if wrap == "none" then opts.wrap_text = "wrap-none" end
+    return pandoc.write(pandoc.read(text, from), to, opts)
+  end)
+  if not ok then
+    out = tostring(out)
+  elseif out:sub(-1) ~= "\\n" then
+    out = out .. "\\n"
+  end
+  io.write((ok and "ok " or "err ") .. #out .. "\\n", out)
+  io.flush()
+end
+"""
+
+
+class PandocError(RuntimeError):
+    """
+    Raised when pandoc rejects a conversion
+
+    Attributes:
+        stderr: Pandoc's error message
+        from_format: Input format of the failed conversion
+        to_format: Output format of the failed conversion
+        excerpt: First 200 characters of the input, for diagnostics
+    """
+
+    def __init__(
+        self, stderr: str, from_format: str, to_format: str, text: str = ""
+    ):
+        self.stderr = stderr.strip()
+        self.from_format = from_format
+        self.to_format = to_format
+        self.excerpt = text[:200]
+        message = f"Pandoc error ({from_format} -> {to_format}): {self.stderr}"
+        if self.excerpt:
+            message += f"\nInput: {self.excerpt}..."
+        super().__init__(message)
+
+
+class PandocWarning(UserWarning):
+    """
+    Issued when pandoc succeeds but reports problems on stderr
+
+    Only backends that spawn pandoc per call (SubprocessBackend and the
+    async API) see pandoc's stderr; the worker pool discards it.
+    """
+
+
+def _warn_stderr(stderr: str, from_format: str, to_format: str) -> None:
+    """Forward what a successful pandoc run printed to stderr"""
+    stderr = stderr.strip()
+    if stderr:
+        warnings.warn(
+            f"Pandoc ({from_format} -> {to_format}): {stderr}",
+            PandocWarning,
+            stacklevel=3,
+        )
+
+
+class SubprocessBackend:
+    """Run one pandoc process per conversion"""
+
+    def __init__(self, pandoc: str = "pandoc"):
+        self.pandoc = pandoc
+
+    def convert(
+        self, text: str, from_format: str, to_format: str, wrap_none: bool = False
+    ) -> str:
+        cmd = [self.pandoc, "-f", from_format, "-t", to_format]
+        if wrap_none:
+            cmd.append("--wrap=none")
+        try:
+            result = subprocess.run(
+                cmd,
+                input=text,
+                capture_output=True,
+                text=True,
+                encoding="utf-8",
+                check=True,
+            )
+        except subprocess.CalledProcessError as e:
+            raise PandocError(e.stderr, from_format, to_format, text) from e
+        _warn_stderr(result.stderr, from_format, to_format)
+        return result.stdout
+
+    def close(self) -> None:
+        pass
+
+
+class _LuaWorker:
+    """A single long-lived `pandoc lua` process"""
+
+    def __init__(self, pandoc: str):
+        self.process = subprocess.Popen(
+            [pandoc, "lua", "-e", _WORKER_SCRIPT],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+
+    def convert(
+        self, text: str, from_format: str, to_format: str, wrap_none: bool
+    ) -> str:
+        payload = text.encode("utf-8")
+        wrap = "none" if wrap_none else "auto"
+        header = f"{from_format} {to_format} {wrap} {len(payload)}\n"
+        try:
+            self.process.stdin.write(header.encode("ascii") + payload)
+            self.process.stdin.flush()
+            status, size = self.process.stdout.readline().split()
+            body = self.process.stdout.read(int(size)).decode("utf-8")
+        except (OSError, ValueError) as e:
+            self.close()
+            raise RuntimeError(
+                "Pandoc worker exited unexpectedly "
+                "(the worker pool requires `pandoc lua`, pandoc >= 3.0)"
+            ) from e
+        if status != b"ok":
+            raise PandocError(body, from_format, to_format, text)
+        return body
+
+    @property
+    def alive(self) -> bool:
+        return self.process.poll() is None
+
+    def close(self) -> None:
+        if self.process.stdin and not self.process.stdin.closed:
+            try:
+                self.process.stdin.close()
+            except OSError:
+                pass
+        try:
+            self.process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+        if self.process.stdout:
+            self.process.stdout.close()
+
+
+class PandocWorkerPool:
+    """
+    Pool of warm pandoc workers shared by all threads
+
+    Workers are started lazily, up to `size` of them, and reused for every
+    subsequent conversion. A crashed worker is discarded and replaced on the
+    next request.
+
+    Args:
+        size: Maximum number of concurrent workers (defaults to CPU count)
+        pandoc: Path to the pandoc executable
+    """
+
+    def __init__(self, size: Optional[int] = None, pandoc: str = "pandoc"):
+        self.size = size or os.cpu_count() or 1
+        self.pandoc = pandoc
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._closed = False
+
+    def convert(
+        self, text: str, from_format: str, to_format: str, wrap_none: bool = False
+    ) -> str:
+        if self._closed:
+            raise RuntimeError("Pandoc worker pool is closed")
+        self._slots.acquire()
+        try:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                worker = _LuaWorker(self.pandoc)
+            try:
+                return worker.convert(text, from_format, to_format, wrap_none)
+            finally:
+                if worker.alive and not self._closed:
+                    self._idle.put(worker)
+                else:
+                    worker.close()
+        finally:
+            self._slots.release()
+
+    def close(self) -> None:
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+_backend = None
+_backend_lock = threading.Lock()
+# Backend of the Converter running in this thread or task, if any
+_context_backend = contextvars.ContextVar("mdjson_backend", default=None)
+
+
+def get_backend():
+    """
+    Return the pandoc backend in use: the one a running Converter selected,
+    or else the process-wide one, creating the default one
+    """
+    backend = _context_backend.get()
+    if backend is not None:
+        return backend
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = SubprocessBackend()
+    return _backend
+
+
+def set_backend(backend) -> None:
+    """Replace the process-wide pandoc backend, closing the previous one"""
+    global _backend
+    with _backend_lock:
+        previous, _backend = _backend, backend
+    if previous is not None and previous is not backend:
+        previous.close()
+
+
+@contextlib.contextmanager
+def _using_backend(backend):
+    """Route this thread's (or task's) pandoc calls to backend in the block"""
+    token = _context_backend.set(backend)
+    try:
+        yield backend
+    finally:
+        _context_backend.reset(token)
+
+
+def configure_backend(pool_size: int = 0, pandoc: str = "pandoc") -> None:
+    """
+    Select the pandoc backend
+
+    Args:
+        pool_size: Number of warm pandoc workers; 0 spawns pandoc per call
+        pandoc: Path to the pandoc executable
+    """
+    if pool_size > 0:
+        set_backend(PandocWorkerPool(pool_size, pandoc))
+    else:
+        set_backend(SubprocessBackend(pandoc))
+
+
+@functools.lru_cache(maxsize=None)
+def pandoc_version(pandoc: str = "pandoc") -> str:
+    """Version string of a pandoc executable, or "" if it cannot be run"""
+    try:
+        result = subprocess.run(
+            [pandoc, "--version"], capture_output=True, text=True, check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+    return result.stdout.split("\n", 1)[0].split()[-1]
+
+
+def shutdown() -> None:
+    """Stop all pandoc workers and reset to the default backend"""
+    set_backend(None)
+
+
+atexit.register(shutdown)
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: "2026-10-19 00:14:02 (ywatanabe)"
+# File: /home/ywatanabe/proj/mdjson/mdjson/batch.py
+
+__file__ = "/home/ywatanabe/proj/mdjson/mdjson/batch.py"
+
+import contextlib
+import fnmatch
+import glob
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Callable, Iterable, Iterator, List, NamedTuple, Optional
+
+from .backend import configure_backend
+from .convert import _file_formats, _write_output, convert_file
+from .multidoc import convert_texts
+from .stats import Stats, collect_stats, stage
+from .verify import VerificationResult
+
+
+class ConversionResult(NamedTuple):
+    input_file: str
+    output_file: Optional[str]
+    error: Optional[str] = None
+    verification: Optional[VerificationResult] = None
+    stats: Optional[Stats] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def _expand_inputs(inputs: Iterable[str], pattern: str = "*.md") -> Iterator:
+    """Yield (path, root) pairs for files, directories and glob patterns"""
+    for path in inputs:
+        path = os.path.expanduser(path)
+        if os.path.isdir(path):
+            for dirpath, dirnames, filenames in os.walk(path):
+                dirnames.sort()
+                for name in sorted(fnmatch.filter(filenames, pattern)):
+                    yield os.path.join(dirpath, name), path
+        elif glob.has_magic(path):
+            for match in sorted(glob.glob(path, recursive=True)):
+                if os.path.isfile(match):
+                    yield match, os.path.dirname(match)
+        else:
+            yield path, os.path.dirname(path)
+
+
+def _output_path(input_file: str, root: str, output_dir: Optional[str]):
+    if output_dir is None:
+        return None
+    base, ext = os.path.splitext(os.path.relpath(input_file, root or "."))
+    ext = ".json" if ext == ".md" else ".md"
+    return os.path.join(os.path.expanduser(output_dir), base + ext)
+
+
+def _verify_option(options: dict) -> dict:
+    """Options with check_reversible mapped to verify, as in mdjson()"""
+    options = dict(options)
+    check_reversible = options.pop("check_reversible", True)
+    if options.get("verify") is None:
+        options["verify"] = "full" if check_reversible else "none"
+    return options
+
+
+def _convert_one(
+    input_file: str,
+    output_file: Optional[str],
+    options: dict,
+    with_stats: bool = False,
+):
+    options = _verify_option(options)
+    stats = Stats() if with_stats else None
+    verification = error = None
+    try:
+        if output_file is not None:
+            os.makedirs(os.path.dirname(output_file) or ".", exist_ok=True)
+        if stats is None:
+            verification = convert_file(input_file, output_file, **options)
+        else:
+            with collect_stats(stats):
+                verification = convert_file(
+                    input_file, output_file, **options
+                )
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    return ConversionResult(input_file, output_file, error, verification, stats)
+
+
+def _collecting(stats: Optional[Stats]):
+    if stats is None:
+        return contextlib.nullcontext()
+    return collect_stats(stats)
+
+
+def _chunks(items: Iterable, size: int) -> Iterator[list]:
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _convert_batch(
+    files: List[tuple], options: dict, with_stats: bool = False
+) -> List[ConversionResult]:
+    """
+    Convert (input_file, output_file) pairs with one pandoc run per
+    direction; see convert_texts()
+
+    Stage timings cover the whole batch and are attached to the first
+    result.
+    """
+    options = _verify_option(options)
+    options.pop("stream", None)
+    stats = Stats() if with_stats else None
+    errors, paths, texts = {}, {}, {"md": {}, "json": {}}
+    with _collecting(stats):
+        for i, (input_file, output_file) in enumerate(files):
+            try:
+                input_file, output_file, from_format = _file_formats(
+                    input_file, output_file
+                )
+                paths[i] = output_file
+                with stage("read") as span, open(input_file) as f:
+                    texts[from_format][i] = span.data = f.read()
+            except Exception as e:
+                errors[i] = f"{type(e).__name__}: {e}"
+        verifications = {}
+        for from_format, inputs in texts.items():
+            if not inputs:
+                continue
+            converted = convert_texts(inputs.values(), from_format, **options)
+            for i, result in zip(inputs, converted):
+                try:
+                    if isinstance(result, Exception):
+                        raise result
+                    output, verifications[i] = result
+                    os.makedirs(
+                        os.path.dirname(paths[i]) or ".", exist_ok=True
+                    )
+                    with stage("write", output):
+                        _write_output(paths[i], output)
+                except Exception as e:
+                    errors[i] = f"{type(e).__name__}: {e}"
+    results = [
+        ConversionResult(
+            input_file,
+            output_file,
+            errors.get(i),
+            None if i in errors else verifications[i],
+        )
+        for i, (input_file, output_file) in enumerate(files)
+    ]
+    if results and stats is not None:
+        results[0] = results[0]._replace(stats=stats)
+    return results
+
+
+def _init_worker(pool_size: int) -> None:
+    configure_backend(pool_size=pool_size)
+
+
+def _run_tasks(
+    func: Callable,
+    tasks: Iterable[tuple],
+    jobs: int,
+    pool_size: int,
+    on_error: Callable,
+) -> Iterator:
+    """
+    Yield func(*task) for every task as results finish
+
+    With jobs=1 tasks run in this process; otherwise in worker processes,
+    where a task that crashes its worker yields on_error(task, error).
+    """
+    if jobs == 1:
+        for task in tasks:
+            yield func(*task)
+        return
+
+    # Keep a bounded window of submitted tasks so huge trees stream
+    # through without materialising every future up front
+    max_pending = jobs * 4
+    executor = ProcessPoolExecutor(
+        max_workers=jobs, initializer=_init_worker, initargs=(pool_size,)
+    )
+    pending = {}
+
+    def finished():
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            task = pending.pop(future)
+            try:
+                yield future.result()
+            except Exception as e:
+                yield on_error(task, f"{type(e).__name__}: {e}")
+
+    try:
+        for task in tasks:
+            pending[executor.submit(func, *task)] = task
+            if len(pending) >= max_pending:
+                yield from finished()
+        while pending:
+            yield from finished()
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=True)
+
+
+def convert_many(
+    inputs: Iterable[str],
+    jobs: Optional[int] = None,
+    pattern: str = "*.md",
+    output_dir: Optional[str] = None,
+    pool_size: int = 0,
+    with_stats: bool = False,
+    batch_size: int = 1,
+    **options,
+) -> Iterator[ConversionResult]:
+    """
+    Convert many files in parallel, yielding results as they finish
+
+    Failures are reported per file in ConversionResult.error instead of
+    aborting the run.
+
+    Args:
+        inputs: Files, directories (searched recursively) or glob patterns
+        jobs: Number of worker processes (defaults to CPU count; 1 runs
+            in the current process)
+        pattern: File name pattern used when expanding directories
+        output_dir: Mirror outputs under this directory instead of
+            writing them next to the inputs
+        pool_size: Warm pandoc workers per worker process (0 spawns pandoc
+            per call; with jobs=1 the current backend is used)
+        with_stats: Attach per-file stage timings to ConversionResult.stats
+            (collected inside the worker that converted the file)
+        batch_size: Files converted together in one pandoc run per
+            direction (see convert_texts()); with batches, results come
+            batch by batch and their timings are attached to the first
+            file of each batch
+        **options: Passed on to convert_file() (indent, verify, engine,
+            cache); check_reversible is accepted as in mdjson()
+    """
+    files = (
+        (path, _output_path(path, root, output_dir))
+        for path, root in _expand_inputs(inputs, pattern)
+    )
+    jobs = jobs or os.cpu_count() or 1
+    if batch_size <= 1 or options.get("stream"):
+        yield from _run_tasks(
+            _convert_one,
+            (file + (options, with_stats) for file in files),
+            jobs,
+            pool_size,
+            lambda task, error: ConversionResult(task[0], task[1], error),
+        )
+        return
+    for results in _run_tasks(
+        _convert_batch,
+        ((chunk, options, with_stats) for chunk in _chunks(files, batch_size)),
+        jobs,
+        pool_size,
+        lambda task, error: [
+            ConversionResult(input_file, output_file, error)
+            for input_file, output_file in task[0]
+        ],
+    ):
+        yield from results
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: "2026-10-19 08:23:02 (ywatanabe)"
+# File: /home/ywatanabe/proj/mdjson/mdjson/cache.py
+
+__file__ = "/home/ywatanabe/proj/mdjson/mdjson/cache.py"
+
+import hashlib
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from typing import Optional, Union
+
+from . import codec
+from .backend import get_backend, pandoc_version
+from .model import SCHEMA_VERSION
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    atime REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_atime ON entries (atime);
+CREATE TABLE IF NOT EXISTS settings (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS probes (
+    name TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+class ConversionCache:
+    """
+    On-disk cache of conversion results, stored in SQLite
+
+    Entries are keyed by the input content hash, the conversion direction,
+    the pandoc version, the mdjson version and the simplified schema
+    version, so upgrading either tool or changing the schema invalidates
+    old results. The least recently used entries are evicted
+    once the stored values exceed max_bytes. Safe to share between threads
+    and processes.
+
+    Args:
+        path: SQLite database file
+        max_bytes: Upper bound on the total size of stored values; stored
+            in the database so other processes opening it use the same
+            bound (defaults to the stored value, or 256 MiB)
+    """
+
+    def __init__(self, path: str, max_bytes: Optional[int] = None):
+        self.path = os.path.expanduser(path)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(
+            self.path, timeout=30, check_same_thread=False
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+        with self._db:
+            if max_bytes is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO settings VALUES ('max_bytes', ?)",
+                    (max_bytes,),
+                )
+            row = self._db.execute(
+                "SELECT value FROM settings WHERE name = 'max_bytes'"
+            ).fetchone()
+        self.max_bytes = row[0] if row else DEFAULT_MAX_BYTES
+        self._versions = {}
+
+    def _pandoc_version(self) -> str:
+        """
+        pandoc_version() of the current backend's executable
+
+        The result is stored in the database under the executable's path,
+        mtime and size, so a cache hit in a fresh process does not have to
+        run pandoc at all.
+        """
+        pandoc = getattr(get_backend(), "pandoc", "pandoc")
+        version = self._versions.get(pandoc)
+        if version is not None:
+            return version
+        path = shutil.which(pandoc)
+        if path is None:
+            version = pandoc_version(pandoc)
+        else:
+            path = os.path.realpath(path)
+            info = os.stat(path)
+            name = f"pandoc:{path}:{info.st_mtime_ns}:{info.st_size}"
+            with self._lock:
+                row = self._db.execute(
+                    "SELECT value FROM probes WHERE name = ?", (name,)
+                ).fetchone()
+            if row is not None:
+                version = row[0]
+            else:
+                version = pandoc_version(pandoc)
+                if version:
+                    with self._lock, self._db:
+                        self._db.execute(
+                            "INSERT OR REPLACE INTO probes VALUES (?, ?)",
+                            (name, version),
+                        )
+        self._versions[pandoc] = version
+        return version
+
+    def key(self, content: bytes, direction: str) -> str:
+        from . import __version__
+
+        pandoc = self._pandoc_version()
+        digest = hashlib.sha256(content).hexdigest()
+        return (
+            f"{direction}:{pandoc}:{__version__}:{SCHEMA_VERSION}:{digest}"
+        )
+
+    def get(self, key: str):
+        with self._lock, self._db:
+            row = self._db.execute(
+                "SELECT value FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._db.execute(
+                "UPDATE entries SET atime = ? WHERE key = ?",
+                (time.time(), key),
+            )
+        return codec.loads(row[0])
+
+    def put(self, key: str, value) -> None:
+        encoded = codec.dumps(value, indent=None)
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)",
+                (key, encoded, len(encoded), time.time()),
+            )
+            self._evict()
+
+    def _evict(self) -> None:
+        total = self._db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM entries"
+        ).fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._db.execute(
+            "SELECT key, size FROM entries ORDER BY atime"
+        )
+        expired = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            expired.append((key,))
+            total -= size
+        self._db.executemany("DELETE FROM entries WHERE key = ?", expired)
+
+    def __len__(self) -> int:
+        with self._lock:
+            row = self._db.execute("SELECT COUNT(*) FROM entries").fetchone()
+        return row[0]
+
+    def clear(self) -> None:
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM entries")
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+_open_caches = {}
+_open_caches_lock = threading.Lock()
+
+
+def open_cache(cache: Union[str, ConversionCache]) -> ConversionCache:
+    """Return a ConversionCache, reusing one connection per path and process"""
+    if isinstance(cache, ConversionCache):
+        return cache
+    # Connections must not cross a fork, so key them by process id too
+    key = (os.getpid(), os.path.abspath(os.path.expanduser(cache)))
+    with _open_caches_lock:
+        if key not in _open_caches:
+            _open_caches[key] = ConversionCache(key[1])
+        return _open_caches[key]
@@ -1,21 +1,366 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
-# Time-stamp: "2025-01-01 19:26:43 (ywatanabe)"
+# Time-stamp: "2026-10-19 09:29:05 (ywatanabe)"
 # File: /home/ywatanabe/proj/mdjson/mdjson/cli.py
 
 __file__ = "/home/ywatanabe/proj/mdjson/mdjson/cli.py"
 
-import argparse
-from mdjson import mdjson
+import contextlib
+import os
+import sys
 
-def main():
-    parser = argparse.ArgumentParser(description='Convert between Markdown and JSON')
-    parser.add_argument('input_file', help='Input file (.md or .json)')
-    parser.add_argument('--output', '-o', help='Output file path')
+# Conversion modules are imported where they are used, so that calls
+# forwarded to a --serve daemon do not pay for loading them
+
+def _open_input(path):
+    if path == '-':
+        return contextlib.nullcontext(sys.stdin)
+    return open(os.path.expanduser(path))
+
+def _open_output(path):
+    if path in (None, '-'):
+        return contextlib.nullcontext(sys.stdout)
+    return open(os.path.expanduser(path), 'w')
+
+def _input_format(args, path):
+    from mdjson.convert import FORMATS
+    if args.from_format:
+        return args.from_format
+    ext = os.path.splitext(path)[1].lstrip('.')
+    if ext not in FORMATS:
+        raise ValueError(f'cannot infer the format of {path}; use --from')
+    return ext
+
+def _convert_stream(args):
+    """Convert one document between files and stdin/stdout"""
+    from mdjson.convert import convert_text
+    path = args.inputs[0]
+    from_format = _input_format(args, path)
+    with _open_input(path) as f:
+        text = f.read()
+    output, result = convert_text(text, from_format, args.indent, args.verify,
+                                  args.engine, args.cache)
+    if not output.endswith('\n'):
+        output += '\n'
+    with _open_output(args.output) as f:
+        f.write(output)
+    if result.reversible is False:
+        print(f'Warning: Conversion was not perfectly reversible ({result.detail})',
+              file=sys.stderr)
+    return 0
+
+def _convert_ndjson(args):
+    """Convert one document per line: markdown lines are JSON strings,
+    JSON lines are simplified JSON objects"""
+    from mdjson import codec
+    from mdjson.convert import convert_text
+    n_failed = 0
+    with _open_output(args.output) as out:
+        for path in args.inputs:
+            from_format = _input_format(args, path)
+            with _open_input(path) as f:
+                for lineno, line in enumerate(f, 1):
+                    if not line.strip():
+                        continue
+                    try:
+                        document = codec.loads(line)
+                        if from_format == 'md':
+                            output, result = convert_text(
+                                document, 'md', None, args.verify, args.engine, args.cache)
+                        else:
+                            output, result = convert_text(
+                                line, 'json', None, args.verify, args.engine, args.cache)
+                            output = codec.dumps(output, indent=None)
+                    except Exception as e:
+                        n_failed += 1
+                        error = f'{type(e).__name__}: {e}'
+                        print(f'{path}:{lineno}: {error}', file=sys.stderr)
+                        output = codec.dumps({'error': error}, indent=None)
+                    else:
+                        if result.reversible is False:
+                            print(f'{path}:{lineno}: not reversible ({result.detail})',
+                                  file=sys.stderr)
+                    out.write(output + '\n')
+                    out.flush()
+    return 1 if n_failed else 0
+
+def _collecting(stats):
+    from mdjson.stats import collect_stats
+    return collect_stats(stats) if stats is not None else contextlib.nullcontext()
+
+def main(argv=None, remote=False):
+    argv = sys.argv[1:] if argv is None else argv
+    # `mdjson serve` always means the HTTP server; convert a file or
+    # directory called serve as ./serve
+    if argv[:1] == ['serve'] and not remote:
+        from mdjson.service import main as serve_http
+        return serve_http(argv[1:], prog='mdjson serve')
+    socket_path = os.environ.get('MDJSON_SOCKET')
+    if socket_path and not remote and not any(arg.startswith('--serve') for arg in argv):
+        from mdjson.server import run_remote
+        status = run_remote(socket_path, argv)
+        if status is not None:
+            return status
+
+    import argparse
+    from mdjson import codec
+    from mdjson.convert import FORMATS
+    from mdjson.verify import parse_verify
+    parser = argparse.ArgumentParser(prog='mdjson',
+                                     description='Convert between Markdown and JSON')
+    parser.add_argument('inputs', nargs='*', metavar='input',
+                        help="Input files (.md or .json), directories, glob patterns or '-' for stdin")
+    parser.add_argument('--output', '-o',
+                        help="Output file path, or '-' for stdout (single input only)")
+    parser.add_argument('--from', dest='from_format', choices=sorted(FORMATS),
+                        help='Input format (required when reading stdin)')
+    parser.add_argument('--to', dest='to_format', choices=sorted(FORMATS),
+                        help='Output format (the other one of --from)')
+    parser.add_argument('--ndjson', action='store_true',
+                        help='Convert one document per line: markdown as JSON strings, '
+                             'JSON as objects; writes one result per line')
     parser.add_argument('--indent', '-i', type=int, default=2, help='JSON indent level')
-    args = parser.parse_args()
+    parser.add_argument('--compact', action='store_true',
+                        help='Write JSON without any whitespace, for machine consumers')
+    parser.add_argument('--json-codec', choices=codec.CODECS, default=None,
+                        help='JSON library (default: auto, the fastest one installed)')
+    parser.add_argument('--engine', choices=['pandoc', 'native'], default='pandoc',
+                        help='Conversion engine (native falls back to pandoc when needed)')
+    parser.add_argument('--jobs', '-j', type=int, default=None,
+                        help='Worker processes for batch conversion (default: CPU count), '
+                             'or for the level-1 sections of a single large input file')
+    parser.add_argument('--pattern', default='*.md',
+                        help='File name pattern used when expanding directories')
+    parser.add_argument('--output-dir', help='Mirror batch outputs under this directory')
+    parser.add_argument('--corpus', metavar='FILE',
+                        help='Write every converted document into one JSON Lines container '
+                             'with an offset index, instead of one file per input')
+    parser.add_argument('--batch-size', type=int, default=1,
+                        help='Files converted together in one pandoc run in batch and '
+                             '--corpus mode (default: 1, one run per file)')
+    parser.add_argument('--pool-size', type=int, default=0,
+                        help='Warm pandoc workers per process (0 spawns pandoc per call; '
+                             'calls forwarded to a --serve daemon use its pool)')
+    parser.add_argument('--cache', help='SQLite file caching results by input content hash')
+    parser.add_argument('--cache-size', type=int, default=None,
+                        help='Cache size limit in MiB (default: 256, or the stored limit)')
+    parser.add_argument('--section-memo', type=float, metavar='MIB',
+                        help='Render each distinct JSON section once per process, keeping '
+                             'up to MIB MiB of rendered markdown in memory')
+    parser.add_argument('--verify', default='full',
+                        help='Reversibility check: full, structural, sample=N%% or none')
+    parser.add_argument('--stream', action='store_true',
+                        help='Convert markdown section by section in bounded memory '
+                             '(implies a structural check and no cache)')
+    parser.add_argument('--watch', action='store_true',
+                        help='Keep converting changed files under the input directory '
+                             '(inotify, or polling where unavailable)')
+    parser.add_argument('--debounce', type=float, default=0.2,
+                        help='Seconds without changes that end a burst of edits (--watch)')
+    parser.add_argument('--poll-interval', type=float, default=None,
+                        help='Poll for changes this often in seconds instead of using inotify')
+    parser.add_argument('--stats', nargs='?', const='table',
+                        choices=['table', 'json', 'prometheus'],
+                        help='Print per-stage timings (p50/p95) and counters to stderr')
+    parser.add_argument('--serve', metavar='SOCKET',
+                        help='Run a resident daemon on this Unix socket; calls made with '
+                             'MDJSON_SOCKET=SOCKET are forwarded to it')
+    args = parser.parse_args(argv)
+    if remote and (args.serve or args.watch):
+        parser.error('--serve and --watch cannot run through the daemon')
+    if args.serve:
+        if args.inputs:
+            parser.error('--serve takes no inputs')
+        return _serve(args)
+    if not args.inputs:
+        parser.error('the following arguments are required: input')
+    try:
+        parse_verify(args.verify)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.compact:
+        args.indent = None
+    if args.json_codec:
+        try:
+            codec.set_codec(args.json_codec)
+        except ImportError as e:
+            parser.error(f'--json-codec {args.json_codec}: {e}')
+        # Worker processes pick the codec up from the environment
+        os.environ['MDJSON_JSON_CODEC'] = args.json_codec
+    if args.section_memo:
+        from mdjson.memo import SectionMemo, set_section_memo
+        max_bytes = int(args.section_memo * 1024 * 1024)
+        if remote:
+            # A --serve daemon keeps its memo warm across forwarded calls
+            from mdjson.server import _section_memo
+            set_section_memo(_section_memo(max_bytes))
+        else:
+            set_section_memo(SectionMemo(max_bytes))
+        os.environ['MDJSON_SECTION_MEMO'] = str(args.section_memo)
+
+    if args.stream and args.cache:
+        parser.error('--stream cannot be combined with --cache')
+    if args.cache and args.cache_size is not None:
+        from mdjson.cache import ConversionCache
+        ConversionCache(args.cache, args.cache_size * 1024 * 1024).close()
+
+    streaming = args.ndjson or '-' in args.inputs or args.output == '-'
+    if args.to_format and args.from_format and args.to_format == args.from_format:
+        parser.error('--to must differ from --from')
+    if args.to_format and not args.from_format:
+        args.from_format = FORMATS[args.to_format]
+    if args.from_format is None and '-' in args.inputs:
+        parser.error('reading stdin requires --from or --to')
+
+    from mdjson.stats import Stats
+    stats = Stats() if args.stats else None
+    status = _run(parser, args, streaming, stats, remote)
+    if stats is not None:
+        print(stats.format(args.stats), file=sys.stderr)
+    return status
+
+def _serve(args):
+    """Serve forwarded command lines until interrupted"""
+    import signal
+    from mdjson.server import serve
+    # Stop (and remove the socket) on kill as on Ctrl-C
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    print(f'Serving on {args.serve}; press Ctrl-C to stop', file=sys.stderr)
+    try:
+        serve(args.serve, pool_size=args.pool_size or 1)
+    except KeyboardInterrupt:
+        return 0
+    except OSError as e:
+        print(f'mdjson: {e}', file=sys.stderr)
+        return 1
+    return 0
+
+def _watch(parser, args):
+    """Sync the directory, then convert changes until interrupted"""
+    from mdjson.backend import configure_backend
+    from mdjson.watcher import Watcher
+    if len(args.inputs) != 1 or not os.path.isdir(args.inputs[0]):
+        parser.error('--watch takes a single directory')
+    # One warm pandoc process serves every event
+    configure_backend(pool_size=args.pool_size or 1)
+    watcher = Watcher(args.inputs[0], args.output_dir, args.pattern, args.debounce,
+                      args.poll_interval, indent=args.indent, engine=args.engine,
+                      cache=args.cache, verify=args.verify, stream=args.stream)
+    mode = 'polling' if watcher.polling else 'inotify'
+    print(f'Watching {watcher.root} ({mode}); press Ctrl-C to stop', file=sys.stderr)
+    events = watcher.sync()
+    try:
+        while True:
+            for event in events:
+                result = event.result
+                if result is not None and not result.ok:
+                    print(f'{event.input_file}: {result.error}', file=sys.stderr)
+                    continue
+                print(f'{event.action} {event.input_file} -> {event.output_file}',
+                      file=sys.stderr)
+                if result is not None and result.verification.reversible is False:
+                    print(f'{event.input_file}: not reversible'
+                          f' ({result.verification.detail})', file=sys.stderr)
+            events = watcher.step()
+    except KeyboardInterrupt:
+        return 0
+    finally:
+        watcher.close()
+
+def _run(parser, args, streaming, stats, remote=False):
+    import glob
+    from mdjson.backend import configure_backend
+    if args.watch:
+        if streaming or args.output:
+            parser.error('--watch writes files; use --output-dir instead of -o or stdio')
+        with _collecting(stats):
+            return _watch(parser, args)
+    if args.corpus:
+        if streaming or args.output or args.output_dir or args.stream:
+            parser.error('--corpus cannot be combined with -o, --output-dir, --stream or stdio')
+        from mdjson.corpus import convert_to_corpus
+        return _report(convert_to_corpus(
+            args.inputs,
+            args.corpus,
+            jobs=args.jobs,
+            pattern=args.pattern,
+            pool_size=args.pool_size,
+            engine=args.engine,
+            cache=args.cache,
+            verify=args.verify,
+            with_stats=stats is not None,
+            batch_size=args.batch_size,
+        ), stats)
+    if streaming:
+        # A --serve daemon keeps its own warm pool for forwarded calls
+        if args.pool_size and not remote:
+            configure_backend(pool_size=args.pool_size)
+        try:
+            if len(args.inputs) != 1 and not args.ndjson:
+                parser.error("'-' takes a single input; use --ndjson for many documents")
+            with _collecting(stats):
+                if args.ndjson:
+                    return _convert_ndjson(args)
+                return _convert_stream(args)
+        except (OSError, ValueError) as e:
+            parser.error(str(e))
+
+    single = (
+        len(args.inputs) == 1
+        and not os.path.isdir(args.inputs[0])
+        and not glob.has_magic(args.inputs[0])
+    )
+    if single and args.output_dir is None:
+        from mdjson.convert import convert_file
+        if args.pool_size and not remote:
+            configure_backend(pool_size=args.pool_size)
+        try:
+            with _collecting(stats):
+                result = convert_file(args.inputs[0], args.output, args.indent,
+                                      verify=args.verify, engine=args.engine, cache=args.cache,
+                                      stream=args.stream, jobs=args.jobs or 1)
+        except (OSError, ValueError) as e:
+            parser.error(str(e))
+        if result.reversible is False:
+            print(f'Warning: Conversion was not perfectly reversible ({result.detail})',
+                  file=sys.stderr)
+        return 0
+    if args.output:
+        parser.error('--output requires a single input file; use --output-dir')
+    from mdjson.batch import convert_many
+
+    return _report(convert_many(
+        args.inputs,
+        jobs=args.jobs,
+        pattern=args.pattern,
+        output_dir=args.output_dir,
+        pool_size=args.pool_size,
+        indent=args.indent,
+        engine=args.engine,
+        cache=args.cache,
+        verify=args.verify,
+        stream=args.stream,
+        with_stats=stats is not None,
+        batch_size=args.batch_size,
+    ), stats)
 
-    return mdjson(args.input_file, args.output, args.indent)
+def _report(results, stats):
+    """Print failures and a summary of batch results; 1 if any failed"""
+    n_done = n_failed = n_irreversible = 0
+    for result in results:
+        n_done += 1
+        if result.stats is not None:
+            stats.merge(result.stats)
+        if not result.ok:
+            n_failed += 1
+            print(f'{result.input_file}: {result.error}', file=sys.stderr)
+        elif result.verification.reversible is False:
+            n_irreversible += 1
+            print(f'{result.input_file}: not reversible ({result.verification.detail})',
+                  file=sys.stderr)
+    print(f'Converted {n_done - n_failed} of {n_done} files'
+          f' ({n_irreversible} not reversible)', file=sys.stderr)
+    return 1 if n_failed else 0
 
 if __name__ == '__main__':
     exit(main())
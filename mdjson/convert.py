@@ -1,300 +1,848 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
-# Time-stamp: "2025-01-01 19:33:54 (ywatanabe)"
+# Time-stamp: "2026-10-19 08:20:33 (ywatanabe)"
 # File: /home/ywatanabe/proj/mdjson/mdjson/convert.py
 
 __file__ = "/home/ywatanabe/proj/mdjson/mdjson/convert.py"
 
-import subprocess
-import json
-import tempfile
-from typing import Optional
+import functools
+from typing import TYPE_CHECKING, List, Optional, Tuple, Union
 import os
+import warnings
+
+from . import codec
+from .backend import get_backend
+from .memo import get_section_memo
+from .model import ALIGNMENTS, Document, _SectionStack
+from .native import NativeUnsupported, _parse_markdown, _render_markdown
+from .stats import count, stage
+from .verify import (
+    ReversibilityWarning,
+    VerificationResult,
+    parse_verify,
+    sampled_out,
+    skipped,
+    structural_result,
+)
+
+if TYPE_CHECKING:
+    from .cache import ConversionCache
+    from .memo import SectionMemo
+
+ENGINES = ("pandoc", "native")
+
+# Input format -> output format
+FORMATS = {"md": "json", "json": "md"}
+
+
+def _run_pandoc(
+    text: str, from_format: str, to_format: str, wrap_none: bool = False
+) -> str:
+    """Run a single pandoc conversion through the active backend"""
+    count("pandoc_calls")
+    with stage("pandoc", text):
+        return get_backend().convert(text, from_format, to_format, wrap_none)
+
+
+# The conversion pipeline is written once, as generators ("steps") that
+# yield each blocking call they need as a (func, *args) tuple and are sent
+# its result. _drive() makes the calls in turn; aio._adrive() awaits
+# pandoc as an asyncio subprocess and runs the other calls in a thread.
+
+
+def _drive(steps):
+    """Run the blocking calls of a steps generator and return its result"""
+    value = error = None
+    while True:
+        try:
+            if error is None:
+                call = steps.send(value)
+            else:
+                call = steps.throw(error)
+        except StopIteration as stop:
+            return stop.value
+        try:
+            value, error = call[0](*call[1:]), None
+        except Exception as e:
+            value, error = None, e
+
+
+def _md_to_json(
+    markdown_file: Optional[str] = None, *, text: Optional[str] = None
+) -> dict:
+    """Convert markdown, read from markdown_file or given as text, to JSON
+    using pandoc"""
+    if text is None:
+        with open(markdown_file, encoding="utf-8") as f:
+            text = f.read()
+    return _drive(_md_to_json_steps(text))
 
 
-def _md_to_json(markdown_file: str) -> dict:
-    """Convert markdown to JSON using pandoc"""
-    cmd = ["pandoc", "-f", "markdown", "-t", "json", markdown_file]
-    result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-    if result.stderr:
-        raise RuntimeError(f"Pandoc error: {result.stderr}")
+def _md_to_json_steps(text: str):
+    result = yield (_run_pandoc, text, "markdown", "json")
 
     # Modify JSON to use correct API version
-    json_data = json.loads(result.stdout)
+    with stage("json_parse", result):
+        json_data = codec.loads(result)
     json_data["pandoc-api-version"] = [1, 23, 1]
     return json_data
 
 
 def _json_to_md(json_data: dict) -> str:
-    """Convert JSON to markdown using pandoc"""
-    json_data["pandoc-api-version"] = [1, 23, 1]
+    """Convert JSON to markdown using pandoc
 
-    with tempfile.NamedTemporaryFile(
-        mode="w", suffix=".json", encoding="utf-8"
-    ) as temp:
-        json.dump(json_data, temp)
-        temp.flush()
-
-        cmd = [
-            "pandoc",
-            "-f",
-            "json",
-            "-t",
-            "markdown",
-            "--wrap=none",
-            temp.name,
-        ]
+    Raises PandocError, which carries pandoc's message and an excerpt of
+    the JSON, if pandoc rejects the document.
+    """
+    return _drive(_json_to_md_steps(json_data))
 
-        try:
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                encoding="utf-8",
-                check=True,
-            )
-            return result.stdout
-        except subprocess.CalledProcessError as e:
-            print(f"Error output: {e.stderr}")
-            with open(temp.name, "r") as f:
-                print(f"JSON content: {f.read()[:200]}...")
-            raise RuntimeError(f"Pandoc error: {e.stderr}")
+
+def _json_to_md_steps(json_data: dict):
+    json_data = {**json_data, "pandoc-api-version": [1, 23, 1]}
+    with stage("json_dump") as span:
+        json_str = span.data = codec.dumps(json_data, indent=None)
+    return (yield (_run_pandoc, json_str, "json", "markdown", True))
 
 
 def _jsonify_markdown(
-    markdown_file: str, outfile: Optional[str], indent: int
+    markdown_file: str, outfile: Optional[str], indent: Optional[int]
 ) -> int:
     """Main function for markdown to JSON conversion"""
     result = _md_to_json(markdown_file)
     with open(outfile, "w") as f:
-        json.dump(result, f, indent=indent)
+        f.write(codec.dumps(result, indent=indent))
     return 0
 
 
 def _markdownify_json(json_file: str, outfile: str) -> int:
     """Main function for JSON to markdown conversion"""
     with open(json_file) as f:
-        json_data = json.load(f)
+        json_data = codec.loads(f.read())
     markdown = _json_to_md(json_data)
     with open(outfile, "w") as f:
         f.write(markdown)
     return 0
 
 
-# def _simplify_pandoc_json(pandoc_json):
-#     def join_text_elements(elements):
-#         return " ".join(
-#             elem.get("c", "")
-#             for elem in elements
-#             if isinstance(elem, dict) and elem.get("t") in ["Str", "Space"]
-#         )
+# Inline elements the simplified schema keeps as text; the text of every
+# other inline is kept too, but its markup is reported as dropped
+_KEPT_INLINES = ("Str", "Space", "SoftBreak", "LineBreak")
+_SPACE_INLINES = frozenset(("Space", "SoftBreak", "LineBreak"))
+# Inlines whose content is a plain list of inlines
+_WRAPPER_INLINES = frozenset(
+    (
+        "Emph",
+        "Underline",
+        "Strong",
+        "Strikeout",
+        "Superscript",
+        "Subscript",
+        "SmallCaps",
+    )
+)
+# Inlines whose inline content is the second field (after attributes,
+# citations or the quote type); Link and Image keep their text or alt text
+_NESTED_INLINES = frozenset(("Cite", "Span", "Link", "Image"))
+_QUOTES = {"DoubleQuote": '"', "SingleQuote": "'"}
+_ALIGNMENT_NAMES = {pandoc: name for name, pandoc in ALIGNMENTS.items()}
+
+
+def _flatten_inlines(elements: list, parts: list, dropped: Optional[list]):
+    """Append the text of pandoc inline elements to parts in one pass"""
+    append = parts.append
+    for elem in elements:
+        t = elem["t"]
+        if t == "Str":
+            append(elem["c"])
+        elif t in _SPACE_INLINES:
+            append(" ")
+        else:
+            if dropped is not None:
+                dropped.append(t)
+            c = elem.get("c")
+            if t in _WRAPPER_INLINES:
+                _flatten_inlines(c, parts, dropped)
+            elif t in _NESTED_INLINES:
+                _flatten_inlines(c[1], parts, dropped)
+            elif t == "Code" or t == "Math":
+                append(c[1])
+            elif t == "Quoted":
+                quote = _QUOTES.get(c[0]["t"], '"')
+                append(quote)
+                _flatten_inlines(c[1], parts, dropped)
+                append(quote)
+            # RawInline and Note carry no text of the paragraph itself
+
+
+def _plain_text(elements: list, dropped: Optional[list] = None) -> str:
+    """
+    Plain text of pandoc inline elements
 
-#     simplified = {"sections": []}
-#     current_section = None
-
-#     for block in pandoc_json.get("blocks", []):
-#         if block["t"] == "Header":
-#             level = block["c"][0]
-#             title = join_text_elements(block["c"][2])
-
-#             if level == 1:
-#                 current_section = {
-#                     "title": title,
-#                     "content": [],
-#                     "subsections": [],
-#                 }
-#                 simplified["sections"].append(current_section)
-#             elif level == 2:
-#                 subsection = {"title": title, "content": []}
-#                 current_section["subsections"].append(subsection)
-#                 current_section = subsection
-
-#         elif block["t"] == "Para":
-#             content = join_text_elements(block["c"])
-#             if current_section:
-#                 current_section["content"].append(content)
-
-#         elif block["t"] == "BulletList":
-#             items = []
-#             for item in block["c"]:
-#                 item_text = join_text_elements(item[0]["c"])
-#                 items.append(item_text)
-#             if current_section:
-#                 current_section["content"].append(items)
-
-#     return simplified
-
-def _simplify_pandoc_json(pandoc_json):
-    def join_text_elements(elements):
-        return " ".join(
-            elem.get("c", "")
-            for elem in elements
-            if isinstance(elem, dict) and elem.get("t") in ["Str", "Space"]
-        )
+    Words are separated by single spaces, soft and hard line breaks
+    included; formatting such as Emph, Code or Link keeps its text.
+    """
+    parts = []
+    _flatten_inlines(elements, parts, dropped)
+    return "".join(parts)
+
+
+def _simplify_pandoc_json(pandoc_json, dropped: Optional[list] = None):
+    sections = _iter_simplified_sections(pandoc_json.get("blocks", []), dropped)
+    return {"sections": list(sections)}
 
-    simplified = {"sections": []}
-    root_section = None
-    current_section = None
 
-    for block in pandoc_json.get("blocks", []):
+def _iter_simplified_sections(blocks, dropped: Optional[list] = None):
+    """
+    Simplify pandoc blocks, yielding each top-level section once complete
+
+    Only the section being built is held, so `blocks` may be a stream.
+    """
+    sections = _SectionStack()
+    for block in blocks:
         if block["t"] == "Header":
             level = block["c"][0]
-            title = join_text_elements(block["c"][2])
+            title = _plain_text(block["c"][2], dropped)
             if level == 1:
-                root_section = {
-                    "title": title,
-                    "content": [],
-                    "subsections": []
-                }
-                simplified["sections"].append(root_section)
-                current_section = root_section
-            elif level == 2 and root_section is not None:
-                subsection = {"title": title, "content": []}
-                root_section["subsections"].append(subsection)
-                current_section = subsection
-        elif block["t"] == "Para" and current_section:
-            content = join_text_elements(block["c"])
-            current_section["content"].append(content)
-        elif block["t"] == "BulletList" and current_section:
-            items = []
-            for item in block["c"]:
-                item_text = join_text_elements(item[0]["c"])
-                items.append(item_text)
-            current_section["content"].append(items)
-
-    return simplified
+                finished = sections.add_header(1, title)
+                if finished is not None:
+                    yield finished
+            elif sections.root is not None:
+                sections.add_header(level, title)
+            elif dropped is not None:
+                dropped.append(f"Header{level}")
+        elif sections.root is None:
+            if dropped is not None:
+                dropped.append(block["t"])
+        else:
+            item = _simplify_block(block, dropped)
+            if item is not None:
+                sections.add_content(item)
+
+    if sections.root is not None:
+        yield sections.root
+
+
+def _simplify_blocks(blocks: list, dropped: Optional[list]) -> list:
+    """Simplified content items of blocks nested in a block quote"""
+    content = []
+    for block in blocks:
+        if block["t"] == "Header":
+            if dropped is not None:
+                dropped.append(f"Header{block['c'][0]}")
+            continue
+        item = _simplify_block(block, dropped)
+        if item is not None:
+            content.append(item)
+    return content
+
+
+def _first_text(blocks: list, dropped: Optional[list]) -> str:
+    """Text of a list item or table cell: its leading Plain or Para"""
+    first = blocks[0] if blocks else None
+    if first is not None and first["t"] in ("Plain", "Para"):
+        text = _plain_text(first["c"], dropped)
+        rest = blocks[1:]
+    else:
+        # Empty items, or ones starting with e.g. a code block
+        text = ""
+        rest = blocks
+    if dropped is not None:
+        dropped.extend(block["t"] for block in rest)
+    return text
+
+
+def _simplify_table(c: list, dropped: Optional[list]) -> dict:
+    _, caption, colspecs, head, bodies, foot = c
+    if dropped is not None:
+        if caption[1]:
+            dropped.append("Caption")
+        if len(head[1]) > 1 or foot[1]:
+            dropped.append("TableHeadRows")
+        if any(spec[1]["t"] != "ColWidthDefault" for spec in colspecs):
+            dropped.append("ColWidth")
+
+    def cells(row):
+        texts = []
+        for _, _, rowspan, colspan, blocks in row[1]:
+            if (rowspan != 1 or colspan != 1) and dropped is not None:
+                dropped.append("CellSpan")
+            texts.append(_first_text(blocks, dropped))
+        return texts
+
+    table = {
+        "type": "table",
+        "header": cells(head[1][0]) if head[1] else [],
+        "rows": [
+            cells(row) for body in bodies for row in body[2] + body[3]
+        ],
+    }
+    align = [_ALIGNMENT_NAMES[spec[0]["t"]] for spec in colspecs]
+    if any(name != "default" for name in align):
+        table["align"] = align
+    return table
+
+
+def _simplify_block(block: dict, dropped: Optional[list]):
+    """
+    Simplified content item of a pandoc block
+
+    Returns None, reporting the block as dropped, for block types the
+    schema does not keep.
+    """
+    t = block["t"]
+    c = block.get("c")
+    if t == "Para":
+        return _plain_text(c, dropped)
+    if t == "BulletList":
+        return [_first_text(item, dropped) for item in c]
+    if t == "OrderedList":
+        (start, style, delimiter), items = c
+        if dropped is not None:
+            if style["t"] != "Decimal":
+                dropped.append(style["t"])
+            if delimiter["t"] != "Period":
+                dropped.append(delimiter["t"])
+        ordered = {
+            "type": "ordered_list",
+            "items": [_first_text(item, dropped) for item in items],
+        }
+        if start != 1:
+            ordered["start"] = start
+        return ordered
+    if t == "CodeBlock":
+        (identifier, classes, attributes), text = c
+        code = {"type": "code", "text": text}
+        if classes:
+            code["language"] = classes[0]
+        if (identifier or classes[1:] or attributes) and dropped is not None:
+            dropped.append("CodeAttributes")
+        return code
+    if t == "BlockQuote":
+        return {"type": "quote", "content": _simplify_blocks(c, dropped)}
+    if t == "Table":
+        return _simplify_table(c, dropped)
+    if dropped is not None:
+        dropped.append(t)
+    return None
+
+
+def _md_to_simplified(
+    markdown: str,
+    engine: str = "pandoc",
+    dropped: Optional[list] = None,
+    jobs: int = 1,
+) -> dict:
+    """
+    Convert markdown text to simplified JSON
+
+    The native engine parses the common subset in process and falls back
+    to pandoc when the document uses anything else. If given, `dropped`
+    collects the names of elements the simplified schema cannot keep.
+    With jobs > 1 the document is split at level-1 headers and converted
+    in that many worker processes.
+    """
+    return _drive(_md_to_simplified_steps(markdown, engine, dropped, jobs))
+
+
+def _md_to_simplified_steps(
+    markdown: str,
+    engine: str = "pandoc",
+    dropped: Optional[list] = None,
+    jobs: int = 1,
+):
+    if jobs > 1:
+        from .shard import sharded_md_to_simplified
+
+        return (
+            yield (sharded_md_to_simplified, markdown, engine, dropped, jobs)
+        )
+    if engine == "native":
+        try:
+            with stage("native_parse", markdown):
+                return _parse_markdown(markdown, dropped)
+        except NativeUnsupported:
+            count("native_fallbacks")
+            if dropped is not None:
+                del dropped[:]
+    pandoc_json = yield from _md_to_json_steps(markdown)
+    with stage("simplify"):
+        return _simplify_pandoc_json(pandoc_json, dropped)
 
 
 def _simplified_to_pandoc_json(simplified_json):
-    def create_text_elements(text):
-        words = text.split()
-        elements = []
-        for word in words:
-            elements.append({"t": "Str", "c": word})
-            elements.append({"t": "Space"})
-        return elements[:-1]
-
-    pandoc_json = {
-        # "pandoc-api-version": [1, 24],
-        "meta": {},
-        "blocks": [],
-    }
+    return Document.from_simplified(simplified_json).to_pandoc_json()
+
+
+def _pandoc_bullet() -> str:
+    """Bullet list marker written by the pandoc in use ("- " or "-   ")"""
+    return _probe_bullet(getattr(get_backend(), "pandoc", "pandoc"))
+
+
+@functools.lru_cache(maxsize=None)
+def _probe_bullet(pandoc: str) -> str:
+    probe = _simplified_to_pandoc_json(
+        {"sections": [{"title": "x", "content": [["x"]]}]}
+    )
+    try:
+        markdown = _json_to_md(probe)
+    except (OSError, RuntimeError):
+        return "- "
+    return markdown.rstrip("\n").rsplit("\n", 1)[-1][:-1]
+
+
+def _simplified_to_md(
+    simplified_json: dict, engine: str = "pandoc", jobs: int = 1
+) -> str:
+    """
+    Convert simplified JSON to markdown text
+
+    The native engine renders the common subset directly, byte for byte as
+    pandoc would, and falls back to pandoc for text that needs escaping.
+    With jobs > 1 runs of sections are rendered in that many worker
+    processes. With a section memo configured, only sections it lacks
+    are rendered.
+    """
+    return _drive(_simplified_to_md_steps(simplified_json, engine, jobs))
+
 
-    for section in simplified_json["sections"]:
-        pandoc_json["blocks"].append(
-            {
-                "t": "Header",
-                "c": [
-                    1,
-                    ["", [], []],  # Changed: removed identifier
-                    create_text_elements(section["title"]),
-                ],
-            }
+def _simplified_to_md_steps(
+    simplified_json: dict, engine: str = "pandoc", jobs: int = 1
+):
+    if jobs > 1:
+        from .shard import sharded_simplified_to_md
+
+        return (
+            yield (sharded_simplified_to_md, simplified_json, engine, jobs)
+        )
+    memo = get_section_memo()
+    if memo is not None and _sections(simplified_json):
+        sections = simplified_json["sections"]
+        markdowns = yield from _memo_sections_to_md_steps(
+            [sections], engine, memo
         )
+        return markdowns[0]
+    document = Document.from_simplified(simplified_json)
+    return (yield from _document_to_md_steps(document, engine))
 
-        for content in section["content"]:
-            if isinstance(content, str):
-                pandoc_json["blocks"].append(
-                    {"t": "Para", "c": create_text_elements(content)}
-                )
-            elif isinstance(content, list):
-                bullet_items = []
-                for item in content:
-                    bullet_items.append(
-                        [{"t": "Plain", "c": create_text_elements(item)}]
-                    )
-                pandoc_json["blocks"].append(
-                    {"t": "BulletList", "c": bullet_items}
-                )
 
-        for subsection in section.get("subsections", []):
-            pandoc_json["blocks"].append(
-                {
-                    "t": "Header",
-                    "c": [
-                        2,
-                        ["", [], []],  # Changed: removed identifier
-                        create_text_elements(subsection["title"]),
-                    ],
-                }
+def _sections(simplified_json) -> Optional[list]:
+    """The sections list of a simplified document, if it is one"""
+    if isinstance(simplified_json, dict):
+        sections = simplified_json.get("sections")
+        if isinstance(sections, list):
+            return sections
+    return None
+
+
+def _document_to_md_steps(document: Document, engine: str):
+    if engine == "native":
+        bullet = yield (_pandoc_bullet,)
+        try:
+            with stage("native_render") as span:
+                markdown = span.data = _render_markdown(document, bullet)
+            return markdown
+        except NativeUnsupported:
+            count("native_fallbacks")
+    # Serialise straight to JSON text; no per-word dicts are built
+    with stage("to_pandoc_json") as span:
+        json_str = span.data = document.pandoc_json_text()
+    return (yield (_run_pandoc, json_str, "json", "markdown", True))
+
+
+def _memo_sections_to_md(
+    section_lists: List[list], engine: str, memo: "SectionMemo"
+) -> List[str]:
+    """
+    Markdown of each non-empty list of simplified sections
+
+    Sections the memo lacks are rendered once, all in one run, and the
+    markdown of each document is joined from its sections' markdown with
+    the blank line pandoc puts between sections.
+    """
+    return _drive(_memo_sections_to_md_steps(section_lists, engine, memo))
+
+
+def _memo_sections_to_md_steps(
+    section_lists: List[list], engine: str, memo: "SectionMemo"
+):
+    pandoc = getattr(get_backend(), "pandoc", "pandoc")
+    keys = [
+        [memo.key(section, pandoc) for section in sections]
+        for sections in section_lists
+    ]
+    rendered, missing = {}, {}
+    for sections, section_keys in zip(section_lists, keys):
+        for section, key in zip(sections, section_keys):
+            if key in rendered or key in missing:
+                continue
+            markdown = memo.get(key)
+            if markdown is None:
+                missing[key] = section
+            else:
+                rendered[key] = markdown
+    if missing:
+        markdowns = yield from _render_sections_steps(
+            list(missing.values()), engine
+        )
+        for key, markdown in zip(missing, markdowns):
+            memo.put(key, markdown)
+            rendered[key] = markdown
+    return [
+        "\n".join(rendered[key] for key in section_keys)
+        for section_keys in keys
+    ]
+
+
+def _render_sections_steps(sections: list, engine: str):
+    """Markdown of each simplified section on its own, from one run"""
+    from .lazy import _section_spans
+
+    document = Document.from_simplified({"sections": sections})
+    markdown = yield from _document_to_md_steps(document, engine)
+    spans = _section_spans(markdown)
+    if len(spans) != len(sections):
+        # Some section holds another level-1 header (a subsection with
+        # "level": 1), so the output cannot be split; render one by one
+        count("section_memo_fallbacks")
+        markdowns = []
+        for section in document.sections:
+            markdowns.append(
+                (yield from _document_to_md_steps(Document([section]), engine))
             )
+        return markdowns
+    # Drop the blank line separating each section from the next
+    return [
+        markdown[start : end if end == len(markdown) else end - 1]
+        for start, end in spans
+    ]
+
+
+def _write_output(
+    output_file: str, text: str, skip_unchanged: bool = False
+) -> None:
+    """Write text to output_file, optionally leaving identical files alone"""
+    if skip_unchanged:
+        try:
+            with open(output_file) as f:
+                if f.read() == text:
+                    return
+        except OSError:
+            pass
+    with open(output_file, "w") as f:
+        f.write(text)
+
+
+def _verify_md_to_json(
+    original_md: str,
+    simplified_json: dict,
+    mode: str,
+    engine: str,
+    dropped,
+    jobs: int = 1,
+) -> VerificationResult:
+    return _drive(
+        _verify_md_to_json_steps(
+            original_md, simplified_json, mode, engine, dropped, jobs
+        )
+    )
 
-            for content in subsection["content"]:
-                if isinstance(content, str):
-                    pandoc_json["blocks"].append(
-                        {"t": "Para", "c": create_text_elements(content)}
-                    )
-                elif isinstance(content, list):
-                    bullet_items = []
-                    for item in content:
-                        bullet_items.append(
-                            [{"t": "Plain", "c": create_text_elements(item)}]
-                        )
-                    pandoc_json["blocks"].append(
-                        {"t": "BulletList", "c": bullet_items}
-                    )
 
-    return pandoc_json
+def _verify_md_to_json_steps(
+    original_md, simplified_json, mode, engine, dropped, jobs=1
+):
+    if mode == "structural":
+        return structural_result(dropped)
+    test_md = yield from _simplified_to_md_steps(simplified_json, engine, jobs)
+    return _compare_markdown(original_md, test_md)
 
 
+def _compare_markdown(original_md: str, test_md: str) -> VerificationResult:
+    if test_md.strip() != original_md.strip():
+        return VerificationResult(
+            "full", True, False, "markdown differs after round trip"
+        )
+    return VerificationResult("full", True, True)
+
+
+def _verify_json_to_md(
+    simplified_json: dict,
+    markdown: str,
+    mode: str,
+    engine: str,
+    jobs: int = 1,
+) -> VerificationResult:
+    return _drive(
+        _verify_json_to_md_steps(simplified_json, markdown, mode, engine, jobs)
+    )
+
+
+def _verify_json_to_md_steps(simplified_json, markdown, mode, engine, jobs=1):
+    if mode == "structural":
+        # The JSON must survive the trip through the pandoc AST unchanged
+        test_simplified = _simplify_pandoc_json(
+            _simplified_to_pandoc_json(simplified_json)
+        )
+    else:
+        test_simplified = yield from _md_to_simplified_steps(
+            markdown, engine, jobs=jobs
+        )
+    return _compare_simplified(simplified_json, test_simplified, mode)
 
-def mdjson(
-    input_file: str, output_file: Optional[str] = None, indent: int = 2, check_reversible: bool = True
-) -> int:
+
+def _compare_simplified(
+    simplified_json: dict, test_simplified: dict, mode: str
+) -> VerificationResult:
+    if test_simplified != simplified_json:
+        return VerificationResult(
+            mode, True, False, "JSON differs after round trip"
+        )
+    return VerificationResult(mode, True, True)
+
+
+def _convert_text(text, from_format, indent, verify, engine, cache, jobs=1):
+    return _drive(
+        _convert_text_steps(
+            text, from_format, indent, verify, engine, cache, jobs
+        )
+    )
+
+
+def _convert_text_steps(
+    text, from_format, indent, verify, engine, cache, jobs=1
+):
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine: {engine}")
+    if from_format not in FORMATS:
+        raise ValueError(f"Unknown format: {from_format}")
+    mode, fraction = parse_verify(verify)
+    if jobs > 1:
+        from .shard import n_shards
+
+        jobs = n_shards(text, jobs)
+    cached = key = None
+    if cache is not None:
+        # sqlite3 is only loaded once a cache is used
+        from .cache import open_cache
+
+        cache = open_cache(cache)
+        direction = f"{from_format}2{FORMATS[from_format]}"
+        key = yield (cache.key, text.encode("utf-8"), direction)
+        with stage("cache"):
+            cached = yield (cache.get, key)
+        count("cache_misses" if cached is None else "cache_hits")
+
+    if from_format == "md":
+        # Convert markdown to simplified JSON
+        dropped = [] if mode == "structural" else None
+        if cached is not None:
+            simplified_json = cached
+        else:
+            simplified_json = yield from _md_to_simplified_steps(
+                text, engine, dropped, jobs
+            )
+        with stage("json_dump") as span:
+            output = span.data = codec.dumps(simplified_json, indent=indent)
+    else:
+        # Convert simplified JSON to markdown
+        if cached is not None:
+            output = cached
+        else:
+            with stage("json_parse", text):
+                simplified_json = codec.loads(text)
+            output = yield from _simplified_to_md_steps(
+                simplified_json, engine, jobs
+            )
+
+    if cached is not None:
+        return output, skipped("cache hit"), True
+    if mode == "none":
+        result = skipped("verification disabled")
+    elif sampled_out(fraction):
+        result = skipped("not sampled")
+    else:
+        with stage("verify"):
+            if from_format == "md":
+                result = yield from _verify_md_to_json_steps(
+                    text, simplified_json, mode, engine, dropped, jobs
+                )
+            else:
+                result = yield from _verify_json_to_md_steps(
+                    simplified_json, output, mode, engine, jobs
+                )
+
+    if cache is not None:
+        value = simplified_json if from_format == "md" else output
+        with stage("cache"):
+            yield (cache.put, key, value)
+    return output, result, False
+
+
+def convert_text(
+    text: str,
+    from_format: str,
+    indent: Optional[int] = 2,
+    verify: str = "full",
+    engine: str = "pandoc",
+    cache: Optional[Union[str, "ConversionCache"]] = None,
+    jobs: int = 1,
+) -> Tuple[str, VerificationResult]:
+    """
+    Convert markdown or simplified JSON held in memory
+
+    Args:
+        text: Markdown or simplified JSON document
+        from_format: "md" or "json"; the output is the other format
+        indent: JSON indentation level (None for compact JSON)
+        verify: Reversibility check; see convert_file()
+        engine: "pandoc" or "native"; see convert_file()
+        cache: Optional ConversionCache or SQLite path
+        jobs: Worker processes for one huge document; see convert_file()
+
+    Returns:
+        (converted text, VerificationResult)
+    """
+    output, result, _ = _convert_text(
+        text, from_format, indent, verify, engine, cache, jobs
+    )
+    return output, result
+
+
+def convert_file(
+    input_file: str,
+    output_file: Optional[str] = None,
+    indent: Optional[int] = 2,
+    verify: str = "full",
+    engine: str = "pandoc",
+    cache: Optional[Union[str, "ConversionCache"]] = None,
+    stream: bool = False,
+    jobs: int = 1,
+) -> VerificationResult:
     """
     Convert between markdown and simplified JSON based on file extensions
-    If output_file is not specified, creates output with changed extension
+    and report whether the conversion is reversible
 
     Args:
         input_file: Path to input file (.md or .json)
         output_file: Optional path to output file
-        indent: JSON indentation level
-        check_reversible: If True, checks if conversion is reversible
+        indent: JSON indentation level (None for compact JSON)
+        verify: Reversibility check: "full" converts back with pandoc,
+            "structural" compares structures in process, "sample=N%" runs
+            the full check on a random N% of calls, "none" skips it
+        engine: "pandoc", or "native" to parse and render markdown in
+            process (falls back to pandoc for unsupported constructs)
+        cache: Optional ConversionCache or SQLite path; a hit skips
+            pandoc and the reversibility check
+        stream: Convert markdown section by section in bounded memory
+            (pandoc engine only; a "full" check becomes "structural"
+            since it would need the whole document; no cache)
+        jobs: Convert the document in up to this many worker processes,
+            split into runs of whole level-1 sections; the output is the
+            same as with one. Documents under 128 KiB, or using markdown
+            that cannot be split safely, are converted in one piece.
+            Ignored with stream
+
+    Returns:
+        VerificationResult of the reversibility check
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine: {engine}")
+    input_file, output_file, from_format = _file_formats(
+        input_file, output_file
+    )
+    if stream and from_format == "md":
+        return _stream_file(input_file, output_file, indent, verify, cache)
+
+    with stage("read") as span, open(input_file) as f:
+        text = span.data = f.read()
+    output, result, hit = _convert_text(
+        text, from_format, indent, verify, engine, cache, jobs
+    )
+    with stage("write", output):
+        _write_output(output_file, output, skip_unchanged=hit)
+    return result
+
+
+def _file_formats(
+    input_file: str, output_file: Optional[str]
+) -> Tuple[str, str, str]:
+    """
+    Expanded input and output paths and the input format
+
+    The output defaults to the input path with the other extension.
     """
     input_file = os.path.expanduser(input_file)
+    if input_file.endswith(".md"):
+        from_format = "md"
+    elif input_file.endswith(".json"):
+        from_format = "json"
+    else:
+        raise ValueError("Input file must have .md or .json extension")
+
     if output_file is None:
         base = os.path.splitext(input_file)[0]
-        output_file = (
-            f"{base}.json" if input_file.endswith(".md") else f"{base}.md"
-        )
+        output_file = f"{base}.{FORMATS[from_format]}"
     else:
         output_file = os.path.expanduser(output_file)
+    return input_file, output_file, from_format
 
-    if input_file.endswith(".md"):
-        # Convert markdown to simplified JSON
-        pandoc_json = _md_to_json(input_file)
-        simplified_json = _simplify_pandoc_json(pandoc_json)
-        with open(output_file, "w") as f:
-            json.dump(simplified_json, f, indent=indent)
-
-        if check_reversible:
-            # Test reverse conversion
-            test_pandoc_json = _simplified_to_pandoc_json(simplified_json)
-            test_md = _json_to_md(test_pandoc_json)
-            original_md = open(input_file).read()
-            if test_md.strip() != original_md.strip():
-                print("Warning: Conversion was not be perfectly reversible")
 
-    elif input_file.endswith(".json"):
-        # Convert simplified JSON to markdown
-        with open(input_file) as f:
-            simplified_json = json.load(f)
-        pandoc_json = _simplified_to_pandoc_json(simplified_json)
-        markdown = _json_to_md(pandoc_json)
-        with open(output_file, "w") as f:
-            f.write(markdown)
-
-        if check_reversible:
-            # Test reverse conversion
-            test_pandoc_json = _md_to_json(output_file)
-            test_simplified = _simplify_pandoc_json(test_pandoc_json)
-            original_json = json.load(open(input_file))
-            if test_simplified != original_json:
-                print("Warning: Conversion may not be perfectly reversible")
+def _stream_file(input_file, output_file, indent, verify, cache):
+    from .stream import stream_md_to_json
 
-    else:
-        raise ValueError("Input file must have .md or .json extension")
+    if cache is not None:
+        raise ValueError("Streaming conversion does not support a cache")
+    mode, fraction = parse_verify(verify)
+    dropped = [] if mode != "none" else None
+    stream_md_to_json(input_file, output_file, indent, dropped)
+    if mode == "none":
+        return skipped("verification disabled")
+    if sampled_out(fraction):
+        return skipped("not sampled")
+    return structural_result(dropped)
+
+
+def mdjson(
+    input_file: str,
+    output_file: Optional[str] = None,
+    indent: Optional[int] = 2,
+    check_reversible: bool = True,
+    engine: str = "pandoc",
+    cache: Optional[Union[str, "ConversionCache"]] = None,
+    verify: Optional[str] = None,
+    stream: bool = False,
+    jobs: int = 1,
+) -> int:
+    """
+    Convert between markdown and simplified JSON based on file extensions
+    If output_file is not specified, creates output with changed extension
 
+    Args:
+        input_file: Path to input file (.md or .json)
+        output_file: Optional path to output file
+        indent: JSON indentation level (None for compact JSON)
+        check_reversible: If True, checks if conversion is reversible
+        engine: "pandoc", or "native" to parse and render markdown in
+            process (falls back to pandoc for unsupported constructs)
+        cache: Optional ConversionCache or SQLite path; a hit skips
+            pandoc and the reversibility check
+        verify: Verification mode overriding check_reversible ("full",
+            "structural", "sample=N%" or "none"); see convert_file()
+        stream: Convert markdown in bounded memory; see convert_file()
+        jobs: Worker processes for one huge document; see convert_file()
+
+    Issues a ReversibilityWarning if the conversion is not reversible.
+    """
+    if verify is None:
+        verify = "full" if check_reversible else "none"
+    result = convert_file(
+        input_file, output_file, indent, verify, engine, cache, stream, jobs
+    )
+    if result.reversible is False:
+        warnings.warn(
+            f"Conversion was not perfectly reversible ({result.detail})",
+            ReversibilityWarning,
+            stacklevel=2,
+        )
     return 0
 
 # def mdjson(
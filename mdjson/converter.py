@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: "2026-10-19 07:41:02 (ywatanabe)"
+# File: /home/ywatanabe/proj/mdjson/mdjson/converter.py
+
+__file__ = "/home/ywatanabe/proj/mdjson/mdjson/converter.py"
+
+import contextlib
+from typing import TYPE_CHECKING, Optional, Tuple, Union
+
+from .backend import (
+    PandocWorkerPool,
+    SubprocessBackend,
+    _using_backend,
+    pandoc_version,
+)
+from .convert import (
+    ENGINES,
+    _convert_text,
+    _md_to_simplified,
+    _simplified_to_md,
+    convert_file,
+)
+from .memo import _using_section_memo
+from .verify import VerificationResult, parse_verify
+
+if TYPE_CHECKING:
+    from .cache import ConversionCache
+    from .memo import SectionMemo
+
+
+class Converter:
+    """
+    Reusable conversion settings with their own pandoc backend
+
+    A Converter holds the settings of a conversion (engine, pandoc
+    executable and backend, JSON indentation, verification mode, cache
+    and section memo) instead of reading process-wide ones, so converters
+    with different settings can run side by side. Its pandoc calls go to
+    its own backend, not to the one set with configure_backend(), and
+    its sections to its own memo, not to set_section_memo()'s. The JSON
+    codec (codec.set_codec()) is process-wide and shared by all
+    converters.
+
+    Converters are safe for concurrent use: one instance can be shared
+    by the threads of a ThreadPoolExecutor or a web server. Conversions
+    keep their state on the stack; the backend, the cache and the stats
+    observers are thread-safe. Inputs are never modified, so the same
+    text or simplified JSON may be passed from many threads at once.
+
+    Example:
+        with Converter(pool_size=4, verify="none") as converter:
+            with ThreadPoolExecutor(4) as executor:
+                results = list(executor.map(converter.to_simplified, texts))
+
+    Args:
+        engine: "pandoc", or "native" to parse and render markdown in
+            process (falls back to pandoc for unsupported constructs)
+        pandoc: Path to the pandoc executable
+        pool_size: Warm pandoc workers shared by the converter's threads
+            (0 spawns pandoc per call)
+        indent: JSON indentation level (None for compact JSON)
+        verify: Reversibility check; see convert_file()
+        cache: Optional ConversionCache or SQLite path
+        section_memo: Optional SectionMemo for rendered sections (may be
+            shared between converters)
+    """
+
+    def __init__(
+        self,
+        engine: str = "pandoc",
+        pandoc: str = "pandoc",
+        pool_size: int = 0,
+        indent: Optional[int] = 2,
+        verify: str = "full",
+        cache: Optional[Union[str, "ConversionCache"]] = None,
+        section_memo: Optional["SectionMemo"] = None,
+    ):
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown engine: {engine}")
+        parse_verify(verify)
+        if cache is not None:
+            from .cache import open_cache
+
+            cache = open_cache(cache)
+        self.engine = engine
+        self.pandoc = pandoc
+        self.indent = indent
+        self.verify = verify
+        self.cache = cache
+        self.section_memo = section_memo
+        if pool_size > 0:
+            self.backend = PandocWorkerPool(pool_size, pandoc)
+        else:
+            self.backend = SubprocessBackend(pandoc)
+
+    @property
+    def pandoc_version(self) -> str:
+        """Version of the converter's pandoc, or "" if it cannot be run"""
+        return pandoc_version(self.pandoc)
+
+    def __repr__(self) -> str:
+        return (
+            f"Converter(engine={self.engine!r}, pandoc={self.pandoc!r},"
+            f" indent={self.indent!r}, verify={self.verify!r})"
+        )
+
+    def close(self) -> None:
+        """Stop the converter's pandoc workers"""
+        self.backend.close()
+
+    def __enter__(self) -> "Converter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    @contextlib.contextmanager
+    def _settings(self):
+        """Use the converter's backend and memo in this thread or task"""
+        with _using_backend(self.backend):
+            with _using_section_memo(self.section_memo):
+                yield
+
+    def convert_str(
+        self, text: str, from_format: str
+    ) -> Tuple[str, VerificationResult]:
+        """
+        Convert markdown or simplified JSON text without touching files
+
+        Args:
+            text: Markdown or simplified JSON document
+            from_format: "md" or "json"; the output is the other format
+
+        Returns:
+            (converted text, VerificationResult)
+        """
+        with self._settings():
+            output, result, _ = _convert_text(
+                text,
+                from_format,
+                self.indent,
+                self.verify,
+                self.engine,
+                self.cache,
+            )
+        return output, result
+
+    def convert_bytes(
+        self, data: bytes, from_format: str
+    ) -> Tuple[bytes, VerificationResult]:
+        """convert_str() for UTF-8 encoded input, returning UTF-8 output"""
+        output, result = self.convert_str(data.decode("utf-8"), from_format)
+        return output.encode("utf-8"), result
+
+    def to_simplified(self, markdown: str) -> dict:
+        """Simplified JSON of markdown, without the reversibility check"""
+        with self._settings():
+            return _md_to_simplified(markdown, self.engine)
+
+    def to_markdown(self, simplified_json: dict) -> str:
+        """Markdown of simplified JSON, without the reversibility check"""
+        with self._settings():
+            return _simplified_to_md(simplified_json, self.engine)
+
+    def convert_file(
+        self,
+        input_file: str,
+        output_file: Optional[str] = None,
+        stream: bool = False,
+    ) -> VerificationResult:
+        """Convert a file based on its extension; see convert_file()"""
+        with self._settings():
+            return convert_file(
+                input_file,
+                output_file,
+                self.indent,
+                self.verify,
+                self.engine,
+                self.cache,
+                stream,
+            )
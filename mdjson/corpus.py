@@ -0,0 +1,393 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: "2026-10-19 09:29:50 (ywatanabe)"
+# File: /home/ywatanabe/proj/mdjson/mdjson/corpus.py
+
+__file__ = "/home/ywatanabe/proj/mdjson/mdjson/corpus.py"
+
+import mmap
+import os
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from . import codec
+from .batch import (
+    ConversionResult,
+    _chunks,
+    _collecting,
+    _expand_inputs,
+    _run_tasks,
+    _verify_option,
+)
+from .convert import convert_text
+from .lazy import _replace_file
+from .multidoc import convert_texts
+from .stats import Stats, collect_stats
+from .verify import skipped
+
+CORPUS_FORMAT = "mdjson-corpus"
+CORPUS_VERSION = 1
+_ID_PREFIX = b'{"id":'
+
+
+def _index_path(path: str) -> str:
+    return path + ".idx"
+
+
+def _document_id(input_file: str, root: str) -> str:
+    """Input path relative to its root, without extension, "/"-separated"""
+    base = os.path.splitext(os.path.relpath(input_file, root or "."))[0]
+    return base.replace(os.sep, "/")
+
+
+def _check_document(document) -> dict:
+    if not isinstance(document, dict):
+        raise ValueError("Documents must be JSON objects")
+    if "id" in document:
+        raise ValueError('Documents must not have an "id" key')
+    return document
+
+
+def _record(doc_id: str, compact: str) -> bytes:
+    """One container line: the document's compact JSON with an "id" first"""
+    if compact == "{}":
+        line = '{"id":' + codec.dumps(doc_id, None) + "}"
+    else:
+        line = '{"id":' + codec.dumps(doc_id, None) + "," + compact[1:]
+    return line.encode("ascii") + b"\n"
+
+
+class CorpusWriter:
+    """
+    Write many simplified documents into one JSON Lines container
+
+    Each line holds one document in compact JSON, with its id stored as
+    an extra leading "id" key. On close() the byte offset of every line
+    is written to the path + ".idx" sidecar, so CorpusReader can seek
+    straight to any document. The container stays a plain JSON Lines
+    file for tools that know nothing about the index.
+
+    Example:
+        with CorpusWriter("notes.jsonl") as corpus:
+            corpus.add("intro", {"sections": [...]})
+
+    Args:
+        path: Container file, overwritten if it exists
+    """
+
+    def __init__(self, path: str):
+        self.path = os.path.expanduser(path)
+        self._file = open(self.path, "wb")
+        self._ids = []
+        self._offsets = [0]
+        self._seen = set()
+
+    def __enter__(self) -> "CorpusWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def add(self, doc_id: str, document: dict) -> None:
+        """Append one simplified document under a unique id"""
+        _check_document(document)
+        self._add_json(doc_id, codec.dumps(document, indent=None))
+
+    def _add_json(self, doc_id: str, compact: str) -> None:
+        """Append a document already encoded with codec.dumps(indent=None)"""
+        if doc_id in self._seen:
+            raise ValueError(f"Duplicate document id: {doc_id}")
+        record = _record(doc_id, compact)
+        self._file.write(record)
+        self._seen.add(doc_id)
+        self._ids.append(doc_id)
+        self._offsets.append(self._offsets[-1] + len(record))
+
+    def close(self) -> None:
+        if self._file is None:
+            return
+        self._file.close()
+        self._file = None
+        index = {
+            "format": CORPUS_FORMAT,
+            "version": CORPUS_VERSION,
+            "size": self._offsets[-1],
+            "ids": self._ids,
+            "offsets": self._offsets,
+        }
+        path = _index_path(self.path)
+        if not os.path.exists(path):
+            open(path, "wb").close()
+        _replace_file(
+            path, lambda f: f.write(codec.dumps(index, None).encode("ascii"))
+        )
+
+
+def _scan_offsets(data) -> Tuple[List[str], List[int]]:
+    """Rebuild the index by reading the id at the start of every line"""
+    ids = []
+    offsets = [0]
+    size = len(data)
+    while offsets[-1] < size:
+        start = offsets[-1]
+        end = data.find(b"\n", start)
+        end = size if end == -1 else end + 1
+        line = data[start:end]
+        if not line.startswith(_ID_PREFIX):
+            raise ValueError(f"Line at byte {start} has no leading id")
+        ids.append(codec.loads(line)["id"])
+        offsets.append(end)
+    return ids, offsets
+
+
+class CorpusReader:
+    """
+    Random access to the documents of a container written by CorpusWriter
+
+    The container is memory-mapped and only the offset index is loaded up
+    front, so corpus["notes/intro"] decodes that one document and nothing
+    else. If the sidecar index is missing or does not match the container
+    (e.g. after the container was written by other tools), it is rebuilt
+    by scanning the lines once.
+
+    Example:
+        with CorpusReader("notes.jsonl") as corpus:
+            for doc_id in corpus.ids():
+                ...
+            document = corpus["notes/intro"]
+
+    Args:
+        path: Container file
+    """
+
+    def __init__(self, path: str):
+        self.path = os.path.expanduser(path)
+        self._file = open(self.path, "rb")
+        try:
+            self._data = mmap.mmap(
+                self._file.fileno(), 0, access=mmap.ACCESS_READ
+            )
+        except ValueError:
+            # An empty file cannot be mapped
+            self._data = b""
+        self._ids, self._offsets = self._load_index()
+        self._positions = {doc_id: i for i, doc_id in enumerate(self._ids)}
+        if len(self._positions) != len(self._ids):
+            raise ValueError(f"{self.path} holds duplicate document ids")
+
+    def _load_index(self) -> Tuple[List[str], List[int]]:
+        try:
+            with open(_index_path(self.path), "rb") as f:
+                index = codec.loads(f.read())
+        except (OSError, ValueError):
+            index = None
+        if (
+            isinstance(index, dict)
+            and index.get("format") == CORPUS_FORMAT
+            and index.get("version") == CORPUS_VERSION
+            and index.get("size") == len(self._data)
+            and len(index["offsets"]) == len(index["ids"]) + 1
+        ):
+            return index["ids"], index["offsets"]
+        return _scan_offsets(self._data)
+
+    def close(self) -> None:
+        if self._data is not None and not isinstance(self._data, bytes):
+            self._data.close()
+        if self._file is not None:
+            self._file.close()
+        self._data = self._file = None
+
+    def __enter__(self) -> "CorpusReader":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._positions
+
+    def ids(self) -> List[str]:
+        """Document ids in container order"""
+        return list(self._ids)
+
+    def raw(self, doc_id: str) -> bytes:
+        """The container line of one document, exactly as stored"""
+        position = self._positions[doc_id]
+        start, end = self._offsets[position], self._offsets[position + 1]
+        return self._data[start:end]
+
+    def __getitem__(self, doc_id: str) -> dict:
+        document = codec.loads(self.raw(doc_id))
+        del document["id"]
+        return document
+
+    def get(self, doc_id: str, default=None) -> Optional[dict]:
+        if doc_id not in self._positions:
+            return default
+        return self[doc_id]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._ids)
+
+    def items(self) -> Iterator[Tuple[str, dict]]:
+        """(id, document) pairs, reading the container front to back"""
+        for doc_id in self._ids:
+            yield doc_id, self[doc_id]
+
+
+def _convert_for_corpus(
+    input_file: str, doc_id: str, options: dict, with_stats: bool = False
+):
+    """Convert one file to compact JSON for the container"""
+    options = _verify_option(options)
+    options.pop("stream", None)
+    options["indent"] = None
+    stats = Stats() if with_stats else None
+    output = verification = error = None
+    try:
+        with open(input_file) as f:
+            text = f.read()
+        if os.path.splitext(input_file)[1] == ".json":
+            # Already simplified: validate and re-encode compactly
+            document = _check_document(codec.loads(text))
+            output = codec.dumps(document, indent=None)
+            verification = skipped("packed without conversion")
+        elif stats is None:
+            output, verification = convert_text(text, "md", **options)
+        else:
+            with collect_stats(stats):
+                output, verification = convert_text(text, "md", **options)
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    return (
+        ConversionResult(input_file, doc_id, error, verification, stats),
+        output,
+    )
+
+
+def _convert_batch_for_corpus(
+    files: List[Tuple[str, str]], options: dict, with_stats: bool = False
+):
+    """
+    Convert (input_file, doc_id) pairs to compact JSON for the container,
+    with one pandoc run for all markdown inputs; see convert_texts()
+    """
+    options = _verify_option(options)
+    options.pop("stream", None)
+    options["indent"] = None
+    stats = Stats() if with_stats else None
+    outputs, errors, verifications, markdown = {}, {}, {}, {}
+    with _collecting(stats):
+        for i, (input_file, _doc_id) in enumerate(files):
+            try:
+                with open(input_file) as f:
+                    text = f.read()
+                if os.path.splitext(input_file)[1] == ".json":
+                    document = _check_document(codec.loads(text))
+                    outputs[i] = codec.dumps(document, indent=None)
+                    verifications[i] = skipped("packed without conversion")
+                else:
+                    markdown[i] = text
+            except Exception as e:
+                errors[i] = f"{type(e).__name__}: {e}"
+        if markdown:
+            converted = convert_texts(markdown.values(), "md", **options)
+            for i, result in zip(markdown, converted):
+                if isinstance(result, Exception):
+                    errors[i] = f"{type(result).__name__}: {result}"
+                else:
+                    outputs[i], verifications[i] = result
+    results = [
+        (
+            ConversionResult(
+                input_file, doc_id, errors.get(i), verifications.get(i)
+            ),
+            outputs.get(i),
+        )
+        for i, (input_file, doc_id) in enumerate(files)
+    ]
+    if results and stats is not None:
+        result, output = results[0]
+        results[0] = result._replace(stats=stats), output
+    return results
+
+
+def convert_to_corpus(
+    inputs: Iterable[str],
+    corpus_file: str,
+    jobs: Optional[int] = None,
+    pattern: str = "*.md",
+    pool_size: int = 0,
+    with_stats: bool = False,
+    batch_size: int = 1,
+    **options,
+) -> Iterator[ConversionResult]:
+    """
+    Convert many markdown files into a single JSON Lines container
+
+    Works like convert_many() but, instead of writing one JSON file per
+    input, appends every document to corpus_file (see CorpusWriter) under
+    an id made of its path relative to the input directory, without the
+    extension. Simplified .json inputs matched by pattern are packed
+    without conversion. Documents are stored in the order they finish;
+    the container and its index are complete once the iterator is
+    exhausted. ConversionResult.output_file holds the document id.
+
+    Args:
+        inputs: Files, directories (searched recursively) or glob patterns
+        corpus_file: Container to write
+        jobs: Number of worker processes (defaults to CPU count; 1 runs
+            in the current process)
+        pattern: File name pattern used when expanding directories
+        pool_size: Warm pandoc workers per worker process
+        with_stats: Attach per-file stage timings to ConversionResult.stats
+        batch_size: Markdown files converted together in one pandoc run;
+            see convert_many()
+        **options: Passed on to convert_text() (verify, engine, cache);
+            check_reversible is accepted as in mdjson()
+    """
+    files = (
+        (path, _document_id(path, root))
+        for path, root in _expand_inputs(inputs, pattern)
+    )
+    jobs = jobs or os.cpu_count() or 1
+    if batch_size <= 1:
+        converted = _run_tasks(
+            _convert_for_corpus,
+            (file + (options, with_stats) for file in files),
+            jobs,
+            pool_size,
+            lambda task, error: (
+                ConversionResult(task[0], task[1], error),
+                None,
+            ),
+        )
+    else:
+        batches = _run_tasks(
+            _convert_batch_for_corpus,
+            (
+                (chunk, options, with_stats)
+                for chunk in _chunks(files, batch_size)
+            ),
+            jobs,
+            pool_size,
+            lambda task, error: [
+                (ConversionResult(input_file, doc_id, error), None)
+                for input_file, doc_id in task[0]
+            ],
+        )
+        converted = (pair for batch in batches for pair in batch)
+    with CorpusWriter(corpus_file) as writer:
+        for result, output in converted:
+            if result.ok:
+                try:
+                    writer._add_json(result.output_file, output)
+                except ValueError as e:
+                    result = result._replace(error=str(e))
+            yield result
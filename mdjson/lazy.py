@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: "2026-10-19 09:21:15 (ywatanabe)"
+# File: /home/ywatanabe/proj/mdjson/mdjson/lazy.py
+
+__file__ = "/home/ywatanabe/proj/mdjson/mdjson/lazy.py"
+
+import json
+import mmap
+import os
+import re
+import shutil
+import tempfile
+from typing import Iterator, List, Optional, Union
+
+from . import codec
+from .convert import _md_to_simplified, _simplified_to_md
+from .shard import _h1_offsets
+
+# Strings and brackets are all the index needs to find section boundaries
+_TOKEN = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"|[{}\[\]]')
+_SECTIONS_KEY = b'"sections"'
+_COLON = re.compile(rb"\s*:")
+_SPACED = re.compile(rb'\{"[^"\\]*(?:\\.[^"\\]*)*": ')
+_COPY_SIZE = 1 << 20
+
+
+def _index_sections(data) -> List[List[int]]:
+    """[start, end) byte offsets of each entry of the top-level sections"""
+    spans = []
+    depth = 0
+    in_sections = expect_array = False
+    for match in _TOKEN.finditer(data):
+        token = match.group()
+        char = token[:1]
+        if char == b'"':
+            if expect_array:
+                raise ValueError('"sections" must be a JSON array')
+            if depth == 1 and token == _SECTIONS_KEY:
+                expect_array = _COLON.match(data, match.end()) is not None
+            elif depth == 2 and in_sections:
+                raise ValueError("Sections must be JSON objects")
+            continue
+        if char in b"{[":
+            if expect_array:
+                if char != b"[":
+                    raise ValueError('"sections" must be a JSON array')
+                in_sections = True
+                expect_array = False
+            elif depth == 2 and in_sections:
+                if char != b"{":
+                    raise ValueError("Sections must be JSON objects")
+                spans.append([match.start(), None])
+            depth += 1
+        else:
+            depth -= 1
+            if depth == 2 and in_sections:
+                spans[-1][1] = match.end()
+            elif depth == 1 and in_sections:
+                in_sections = False
+            elif depth < 0:
+                raise ValueError("Malformed JSON: unbalanced brackets")
+    if depth != 0:
+        raise ValueError("Malformed or truncated JSON")
+    return spans
+
+
+def _section_spans(markdown: str) -> List[List[int]]:
+    """[start, end) offsets of each level-1 section of rendered markdown"""
+    starts = _h1_offsets(markdown)
+    return [
+        [start, end] for start, end in zip(starts, starts[1:] + [len(markdown)])
+    ]
+
+
+def _replace_file(path: str, write, mode: str = "wb") -> None:
+    """
+    Atomically replace path with what write(f) writes
+
+    A new file gets the permissions open() would have given it.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, mode) as f:
+            write(f)
+        try:
+            shutil.copymode(path, tmp_path)
+        except FileNotFoundError:
+            umask = os.umask(0)
+            os.umask(umask)
+            os.chmod(tmp_path, 0o666 & ~umask)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+class LazyDocument:
+    """
+    Simplified JSON file whose sections are parsed on demand
+
+    Opening the file only builds an index of byte offsets, one entry per
+    top-level section; doc[i] decodes that section alone. Assigning
+    doc[i] = section encodes just that section, in the formatting the
+    rest of the file uses, and splices it in; the other sections are
+    copied as bytes without being decoded.
+
+    Example:
+        with LazyDocument("big.json") as doc:
+            section = doc[1234]
+            section["content"].append("New paragraph")
+            doc[1234] = section
+
+    Args:
+        json_file: Simplified JSON file
+    """
+
+    def __init__(self, json_file: str):
+        self.path = os.path.expanduser(json_file)
+        self._file = None
+        self._data = None
+        self._open()
+        self._spans = _index_sections(self._data)
+
+    def _open(self) -> None:
+        self._file = open(self.path, "rb")
+        try:
+            self._data = mmap.mmap(
+                self._file.fileno(), 0, access=mmap.ACCESS_READ
+            )
+        except ValueError:
+            # An empty file cannot be mapped
+            self._data = b""
+
+    def close(self) -> None:
+        if self._data is not None and not isinstance(self._data, bytes):
+            self._data.close()
+        if self._file is not None:
+            self._file.close()
+        self._data = self._file = None
+
+    def __enter__(self) -> "LazyDocument":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self._spans)
+
+    def _position(self, index: int) -> int:
+        if index < 0:
+            index += len(self._spans)
+        if not 0 <= index < len(self._spans):
+            raise IndexError("section index out of range")
+        return index
+
+    def raw(self, index: int) -> bytes:
+        """JSON text of one section, exactly as stored"""
+        start, end = self._spans[self._position(index)]
+        return self._data[start:end]
+
+    def __getitem__(self, index: int) -> dict:
+        return codec.loads(self.raw(index))
+
+    def __iter__(self) -> Iterator[dict]:
+        for index in range(len(self._spans)):
+            yield self[index]
+
+    def __setitem__(self, index: int, section: dict) -> None:
+        self.replace(index, section)
+
+    def _encode(self, section: dict) -> bytes:
+        """Section JSON indented like the existing sections"""
+        start = self._spans[0][0]
+        gap = self._data[max(0, start - 256) : start]
+        if b"\n" not in gap or gap.rsplit(b"\n", 1)[1].strip(b" \t"):
+            # Single-line JSON, compact (codec.dumps with indent=None) or
+            # with json.dumps' default ", " and ": " separators
+            if _SPACED.match(self._data, start):
+                return json.dumps(section).encode("ascii")
+            return codec.dumps(section, indent=None).encode("ascii")
+        prefix = gap.rsplit(b"\n", 1)[1].decode("ascii")
+        # Sections sit two levels deep: {"sections": [{...}]}
+        indent = prefix[: len(prefix) // 2]
+        text = codec.dumps(section, indent=indent)
+        return text.replace("\n", "\n" + prefix).encode("ascii")
+
+    def replace(self, index: int, section: dict) -> None:
+        """Replace one section and shift the offsets of those after it"""
+        index = self._position(index)
+        encoded = self._encode(section)
+        start, end = self._spans[index]
+        data = self._data
+
+        def write(f):
+            for begin, stop in ((0, start), (end, len(data))):
+                for offset in range(begin, stop, _COPY_SIZE):
+                    f.write(data[offset : min(offset + _COPY_SIZE, stop)])
+                if begin == 0:
+                    f.write(encoded)
+
+        _replace_file(self.path, write)
+        self.close()
+        self._open()
+        delta = len(encoded) - (end - start)
+        self._spans[index][1] = start + len(encoded)
+        for span in self._spans[index + 1 :]:
+            span[0] += delta
+            span[1] += delta
+
+
+def _render_section(section: dict, engine: str) -> str:
+    return _simplified_to_md({"sections": [section]}, engine)
+
+
+def update_section(
+    json_file: str,
+    index: int,
+    section: Union[dict, str],
+    markdown_file: Optional[str] = None,
+    engine: str = "pandoc",
+) -> dict:
+    """
+    Replace one top-level section of a converted document
+
+    Only the section itself goes through pandoc: the new section is
+    spliced into json_file and, if given, its markdown is re-rendered and
+    spliced into markdown_file in place of the old section's span. Apart
+    from copying the files' bytes, the cost follows the size of the
+    section, not of the document.
+
+    Args:
+        json_file: Simplified JSON file
+        index: Position of the section (negative counts from the end)
+        section: The new section, as simplified JSON or as markdown text
+            holding exactly one level-1 section
+        markdown_file: Markdown rendering of json_file to update as well
+        engine: Conversion engine, "pandoc" or "native"
+
+    Returns:
+        The new section as simplified JSON
+    """
+    if isinstance(section, str):
+        sections = _md_to_simplified(section, engine)["sections"]
+        if len(sections) != 1:
+            raise ValueError(
+                f"Expected markdown with one section, found {len(sections)}"
+            )
+        section = sections[0]
+
+    with LazyDocument(json_file) as doc:
+        index = doc._position(index)
+        if markdown_file is not None:
+            with open(os.path.expanduser(markdown_file)) as f:
+                markdown = f.read()
+            spans = _section_spans(markdown)
+            if len(spans) != len(doc):
+                raise ValueError(
+                    f"{markdown_file} has {len(spans)} level-1 sections but"
+                    f" {json_file} has {len(doc)}; convert the whole file"
+                )
+            start, end = spans[index]
+            rendered = _render_section(section, engine)
+            if index + 1 < len(spans):
+                # Sections are separated by a blank line
+                rendered += "\n"
+        doc.replace(index, section)
+
+    if markdown_file is not None:
+        updated = markdown[:start] + rendered + markdown[end:]
+        _replace_file(
+            os.path.expanduser(markdown_file),
+            lambda f: f.write(updated.encode("utf-8")),
+        )
+    return section
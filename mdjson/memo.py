@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: "2026-10-19 07:38:40 (ywatanabe)"
+# File: /home/ywatanabe/proj/mdjson/mdjson/memo.py
+
+__file__ = "/home/ywatanabe/proj/mdjson/mdjson/memo.py"
+
+import collections
+import contextlib
+import contextvars
+import hashlib
+import os
+import threading
+from typing import Optional
+
+from . import codec
+from .stats import count
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+class SectionMemo:
+    """
+    In-memory cache of the markdown rendered for each simplified section
+
+    Entries are keyed by a hash of the section's JSON (title, content and
+    subsections) and the pandoc executable, so a section repeated across
+    documents, such as a
+    license block or a templated subsection, goes through pandoc once per
+    process. The least recently used entries are evicted once the stored
+    markdown exceeds max_bytes. Safe to share between threads.
+
+    Args:
+        max_bytes: Upper bound on the total size of stored markdown
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = collections.OrderedDict()
+        self._size = 0
+
+    @staticmethod
+    def key(section: dict, pandoc: str = "pandoc") -> str:
+        encoded = codec.dumps(section, indent=None).encode("utf-8")
+        digest = hashlib.sha256(encoded).hexdigest()
+        return f"{pandoc}:{digest}"
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            markdown = self._entries.get(key)
+            if markdown is None:
+                self.misses += 1
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+        count(
+            "section_memo_misses" if markdown is None else "section_memo_hits"
+        )
+        return markdown
+
+    def put(self, key: str, markdown: str) -> None:
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous)
+            self._entries[key] = markdown
+            self._size += len(markdown)
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size(self) -> int:
+        """Total length of the stored markdown"""
+        return self._size
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+
+def _from_environment() -> Optional[SectionMemo]:
+    # Worker processes pick the memo up from the environment, in MiB
+    size = os.environ.get("MDJSON_SECTION_MEMO")
+    if not size:
+        return None
+    return SectionMemo(int(float(size) * 1024 * 1024))
+
+
+_memo = _from_environment()
+# Memo of the Converter running in this thread or task, if any
+_UNSET = object()
+_context_memo = contextvars.ContextVar("mdjson_section_memo", default=_UNSET)
+
+
+def get_section_memo() -> Optional[SectionMemo]:
+    """
+    Return the section memo in use: the one a running Converter selected,
+    or else the process-wide one; None when it is off
+    """
+    memo = _context_memo.get()
+    return _memo if memo is _UNSET else memo
+
+
+@contextlib.contextmanager
+def _using_section_memo(memo: Optional[SectionMemo]):
+    """Use memo (None turns it off) for this thread's (or task's) calls"""
+    token = _context_memo.set(memo)
+    try:
+        yield memo
+    finally:
+        _context_memo.reset(token)
+
+
+def set_section_memo(memo: Optional[SectionMemo]) -> None:
+    """Replace the process-wide section memo (None turns it off)"""
+    global _memo
+    _memo = memo
+
+
+def configure_section_memo(
+    max_bytes: int = DEFAULT_MAX_BYTES,
+) -> Optional[SectionMemo]:
+    """
+    Memoize rendered sections in this process
+
+    Args:
+        max_bytes: Upper bound on the stored markdown; 0 turns the memo off
+
+    Returns:
+        The new memo, or None
+    """
+    set_section_memo(SectionMemo(max_bytes) if max_bytes > 0 else None)
+    return _memo
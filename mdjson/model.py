@@ -0,0 +1,438 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: "2026-10-19 07:24:48 (ywatanabe)"
+# File: /home/ywatanabe/proj/mdjson/mdjson/model.py
+
+__file__ = "/home/ywatanabe/proj/mdjson/mdjson/model.py"
+
+from json.encoder import JSONEncoder, encode_basestring_ascii
+from typing import Iterator, List, Optional
+
+# Version of the simplified JSON schema and of how it is rendered. Bump it
+# whenever either changes: it is part of every conversion cache key, so
+# old results are not served in the new format.
+SCHEMA_VERSION = 2
+
+_SPACE = ',{"t":"Space"},'
+_ENCODER = JSONEncoder(separators=(",", ":"))
+
+
+class _Node:
+    __slots__ = ()
+
+    def __eq__(self, other):
+        return type(self) is type(other) and all(
+            getattr(self, name) == getattr(other, name)
+            for name in self.__slots__
+        )
+
+    def __repr__(self):
+        fields = ", ".join(
+            f"{name}={getattr(self, name)!r}" for name in self.__slots__
+        )
+        return f"{type(self).__name__}({fields})"
+
+
+class Paragraph(_Node):
+    __slots__ = ("text",)
+
+    def __init__(self, text: str):
+        self.text = text
+
+    def to_simplified(self) -> str:
+        return self.text
+
+    def to_pandoc(self) -> dict:
+        return {"t": "Para", "c": _inline_elements(self.text)}
+
+
+class BulletList(_Node):
+    __slots__ = ("items",)
+
+    def __init__(self, items: List[str]):
+        self.items = items
+
+    def to_simplified(self) -> list:
+        return list(self.items)
+
+    def to_pandoc(self) -> dict:
+        return {"t": "BulletList", "c": _list_items(self.items)}
+
+
+class OrderedList(_Node):
+    __slots__ = ("items", "start")
+
+    def __init__(self, items: List[str], start: int = 1):
+        self.items = items
+        self.start = start
+
+    @classmethod
+    def from_simplified(cls, item: dict) -> "OrderedList":
+        return cls(item["items"], item.get("start", 1))
+
+    def to_simplified(self) -> dict:
+        simplified = {"type": "ordered_list", "items": list(self.items)}
+        if self.start != 1:
+            simplified["start"] = self.start
+        return simplified
+
+    def to_pandoc(self) -> dict:
+        attributes = [self.start, {"t": "Decimal"}, {"t": "Period"}]
+        return {"t": "OrderedList", "c": [attributes, _list_items(self.items)]}
+
+
+class CodeBlock(_Node):
+    __slots__ = ("text", "language")
+
+    def __init__(self, text: str, language: Optional[str] = None):
+        self.text = text
+        self.language = language
+
+    @classmethod
+    def from_simplified(cls, item: dict) -> "CodeBlock":
+        return cls(item["text"], item.get("language"))
+
+    def to_simplified(self) -> dict:
+        simplified = {"type": "code", "text": self.text}
+        if self.language is not None:
+            simplified["language"] = self.language
+        return simplified
+
+    def to_pandoc(self) -> dict:
+        classes = [] if self.language is None else [self.language]
+        return {"t": "CodeBlock", "c": [["", classes, []], self.text]}
+
+
+class BlockQuote(_Node):
+    __slots__ = ("content",)
+
+    def __init__(self, content: List[_Node]):
+        self.content = content
+
+    @classmethod
+    def from_simplified(cls, item: dict) -> "BlockQuote":
+        return cls(_content_from_simplified(item["content"]))
+
+    def to_simplified(self) -> dict:
+        return {
+            "type": "quote",
+            "content": _content_to_simplified(self.content),
+        }
+
+    def to_pandoc(self) -> dict:
+        return {
+            "t": "BlockQuote",
+            "c": [item.to_pandoc() for item in self.content],
+        }
+
+
+# Simplified table alignments and their pandoc names
+ALIGNMENTS = {
+    "default": "AlignDefault",
+    "left": "AlignLeft",
+    "right": "AlignRight",
+    "center": "AlignCenter",
+}
+
+
+class Table(_Node):
+    """
+    A table of plain text cells
+
+    `align` holds one of the ALIGNMENTS keys per column, or None when
+    every column has the default alignment.
+    """
+
+    __slots__ = ("header", "rows", "align")
+
+    def __init__(
+        self,
+        header: List[str],
+        rows: List[List[str]],
+        align: Optional[List[str]] = None,
+    ):
+        self.header = header
+        self.rows = rows
+        self.align = align
+
+    @classmethod
+    def from_simplified(cls, item: dict) -> "Table":
+        return cls(item["header"], item["rows"], item.get("align"))
+
+    def to_simplified(self) -> dict:
+        simplified = {
+            "type": "table",
+            "header": list(self.header),
+            "rows": [list(row) for row in self.rows],
+        }
+        if self.align is not None:
+            simplified["align"] = list(self.align)
+        return simplified
+
+    def to_pandoc(self) -> dict:
+        n_columns = max(
+            [len(self.header), len(self.align or ())]
+            + [len(row) for row in self.rows]
+        )
+        align = list(self.align or ())
+        align += ["default"] * (n_columns - len(align))
+        colspecs = [
+            [{"t": ALIGNMENTS[name]}, {"t": "ColWidthDefault"}]
+            for name in align
+        ]
+        head = [_table_row(self.header, n_columns)] if self.header else []
+        rows = [_table_row(row, n_columns) for row in self.rows]
+        return {
+            "t": "Table",
+            "c": [
+                ["", [], []],
+                [None, []],
+                colspecs,
+                [["", [], []], head],
+                [[["", [], []], 0, [], rows]],
+                [["", [], []], []],
+            ],
+        }
+
+
+# Content item types stored as objects in simplified JSON, by "type"
+_BLOCK_TYPES = {
+    "ordered_list": OrderedList,
+    "code": CodeBlock,
+    "quote": BlockQuote,
+    "table": Table,
+}
+
+
+class Section(_Node):
+    """
+    A header and its content
+
+    Top-level sections carry a list of subsections; deeper sections have
+    None unless they contain sections of their own (and so do top-level
+    sections that omitted the key in JSON). `level` is the header level
+    when it is not one more than the parent's, None otherwise.
+    """
+
+    __slots__ = ("title", "content", "subsections", "level")
+
+    def __init__(
+        self,
+        title: str,
+        content: Optional[list] = None,
+        subsections: Optional[List["Section"]] = None,
+        level: Optional[int] = None,
+    ):
+        self.title = title
+        self.content = content if content is not None else []
+        self.subsections = subsections
+        self.level = level
+
+    @classmethod
+    def from_simplified(cls, section: dict) -> "Section":
+        subsections = section.get("subsections")
+        if subsections is not None:
+            subsections = [cls.from_simplified(sub) for sub in subsections]
+        return cls(
+            section["title"],
+            _content_from_simplified(section["content"]),
+            subsections,
+            section.get("level"),
+        )
+
+    def to_simplified(self) -> dict:
+        simplified = {"title": self.title}
+        if self.level is not None:
+            simplified["level"] = self.level
+        simplified["content"] = _content_to_simplified(self.content)
+        if self.subsections is not None:
+            simplified["subsections"] = [
+                subsection.to_simplified() for subsection in self.subsections
+            ]
+        return simplified
+
+
+class Document(_Node):
+    """
+    Typed form of the simplified JSON schema
+
+    Text stays as plain strings; pandoc's per-word Str/Space elements are
+    only produced when a conversion actually goes through pandoc.
+    """
+
+    __slots__ = ("sections",)
+
+    def __init__(self, sections: Optional[List[Section]] = None):
+        self.sections = sections if sections is not None else []
+
+    @classmethod
+    def from_simplified(cls, simplified_json: dict) -> "Document":
+        return cls(
+            [
+                Section.from_simplified(section)
+                for section in simplified_json["sections"]
+            ]
+        )
+
+    def to_simplified(self) -> dict:
+        return {
+            "sections": [section.to_simplified() for section in self.sections]
+        }
+
+    def iter_headed_content(self) -> Iterator:
+        """Yield (level, title, content) in document order, at any depth"""
+        # Sections still to visit with their parent's level, next on top
+        stack = [(0, section) for section in reversed(self.sections)]
+        while stack:
+            parent_level, section = stack.pop()
+            level = section.level or parent_level + 1
+            yield level, section.title, section.content
+            for subsection in reversed(section.subsections or ()):
+                stack.append((level, subsection))
+
+    def to_pandoc_json(self) -> dict:
+        """Pandoc AST as nested dicts (two dicts per word)"""
+        blocks = []
+        for level, title, content in self.iter_headed_content():
+            blocks.append(
+                {
+                    "t": "Header",
+                    "c": [level, ["", [], []], _inline_elements(title)],
+                }
+            )
+            blocks.extend(item.to_pandoc() for item in content)
+        return {"meta": {}, "blocks": blocks}
+
+    def pandoc_json_text(self, api_version=(1, 23, 1)) -> str:
+        """
+        Pandoc AST serialised straight to JSON text
+
+        Equivalent to json.dumps of to_pandoc_json() plus the API version,
+        without materialising the per-word element dicts.
+        """
+        version = ",".join(str(number) for number in api_version)
+        return (
+            f'{{"pandoc-api-version":[{version}],"meta":{{}},'
+            f'"blocks":[{",".join(self.pandoc_block_texts())}]}}'
+        )
+
+    def pandoc_block_texts(self) -> List[str]:
+        """JSON text of each pandoc block, as in pandoc_json_text()"""
+        parts = []
+        for level, title, content in self.iter_headed_content():
+            parts.append(
+                f'{{"t":"Header","c":[{level},["",[],[]],'
+                f"[{_inline_text(title)}]]}}"
+            )
+            for item in content:
+                if isinstance(item, Paragraph):
+                    parts.append(
+                        f'{{"t":"Para","c":[{_inline_text(item.text)}]}}'
+                    )
+                elif isinstance(item, BulletList):
+                    items = ",".join(
+                        f'[{{"t":"Plain","c":[{_inline_text(text)}]}}]'
+                        for text in item.items
+                    )
+                    parts.append(f'{{"t":"BulletList","c":[{items}]}}')
+                else:
+                    # Rarer blocks go through the dicts
+                    parts.append(_ENCODER.encode(item.to_pandoc()))
+        return parts
+
+
+class _SectionStack:
+    """
+    Single-pass builder of the simplified section tree
+
+    Level 1 headers open top-level sections; any deeper header becomes a
+    subsection of the closest open section with a lower level. Only the
+    path from the current top-level section down to the current section
+    is kept, so each header and block is placed in constant time.
+    """
+
+    __slots__ = ("root", "_path")
+
+    def __init__(self):
+        self.root = None
+        self._path = []  # (level, section) from the root down
+
+    def add_header(self, level: int, title: str) -> Optional[dict]:
+        """
+        Open a section (deeper ones need a top-level section first)
+
+        Returns the previous top-level section when a level 1 header
+        completes it.
+        """
+        if level == 1:
+            finished = self.root
+            self.root = {"title": title, "content": [], "subsections": []}
+            self._path = [(1, self.root)]
+            return finished
+        path = self._path
+        while path[-1][0] >= level:
+            path.pop()
+        parent_level, parent = path[-1]
+        section = {"title": title}
+        if level != parent_level + 1:
+            section["level"] = level
+        section["content"] = []
+        parent.setdefault("subsections", []).append(section)
+        path.append((level, section))
+        return None
+
+    def add_content(self, item) -> None:
+        self._path[-1][1]["content"].append(item)
+
+
+def _content_from_simplified(content: list) -> list:
+    # Entries of other types are ignored, as pandoc conversion always did
+    items = []
+    for item in content:
+        if isinstance(item, str):
+            items.append(Paragraph(item))
+        elif isinstance(item, list):
+            items.append(BulletList(item))
+        elif isinstance(item, dict) and item.get("type") in _BLOCK_TYPES:
+            items.append(_BLOCK_TYPES[item["type"]].from_simplified(item))
+    return items
+
+
+def _content_to_simplified(content: list) -> list:
+    return [item.to_simplified() for item in content]
+
+
+def _list_items(items: List[str]) -> list:
+    return [[{"t": "Plain", "c": _inline_elements(text)}] for text in items]
+
+
+def _table_row(cells: List[str], n_columns: int) -> list:
+    cells = list(cells) + [""] * (n_columns - len(cells))
+    return [
+        ["", [], []],
+        [
+            [
+                ["", [], []],
+                {"t": "AlignDefault"},
+                1,
+                1,
+                [{"t": "Plain", "c": _inline_elements(text)}] if text else [],
+            ]
+            for text in cells
+        ],
+    ]
+
+
+def _inline_elements(text: str) -> list:
+    elements = []
+    for word in text.split():
+        elements.append({"t": "Str", "c": word})
+        elements.append({"t": "Space"})
+    return elements[:-1]
+
+
+def _inline_text(text: str) -> str:
+    return _SPACE.join(
+        '{"t":"Str","c":' + encode_basestring_ascii(word) + "}"
+        for word in text.split()
+    )
@@ -0,0 +1,417 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: "2026-10-19 04:03:12 (ywatanabe)"
+# File: /home/ywatanabe/proj/mdjson/mdjson/multidoc.py
+
+__file__ = "/home/ywatanabe/proj/mdjson/mdjson/multidoc.py"
+
+import os
+import re
+from typing import TYPE_CHECKING, Iterable, List, Optional, Union
+
+from . import codec
+from .convert import (
+    ENGINES,
+    FORMATS,
+    _compare_markdown,
+    _compare_simplified,
+    _md_to_json,
+    _md_to_simplified,
+    _memo_sections_to_md,
+    _pandoc_bullet,
+    _run_pandoc,
+    _simplified_to_md,
+    _sections,
+    _simplify_pandoc_json,
+    _verify_json_to_md,
+)
+from .memo import get_section_memo
+from .model import Document
+from .native import NativeUnsupported, _parse_markdown, _render_markdown
+from .stats import count, stage
+from .verify import parse_verify, sampled_out, skipped, structural_result
+
+if TYPE_CHECKING:
+    from .cache import ConversionCache
+
+# Many documents are converted in one pandoc run by joining them with a
+# boundary paragraph after each one, a single word unique to the run, and
+# splitting the output at those paragraphs. A document that swallows a
+# boundary (an unclosed code fence, HTML block or div) leaves fewer
+# top-level boundaries than expected, and the run is then repeated one
+# document at a time.
+_BOUNDARY = "mdjsonboundary"
+
+# Markdown pandoc resolves across the whole input rather than within one
+# document: reference links, implicit header references and footnotes
+# (any bracketed text not followed by an inline link target), example
+# list labels and TeX macro definitions. Documents using them, or starting
+# with a title block or byte order mark, are converted on their own.
+_SHARED_STATE = re.compile(
+    r"\[[^\[\]]*\](?!\()|\(@|\\(?:re)?new|\\def|\\let|\\Declare"
+)
+
+
+def _boundaries(n_documents: int) -> List[str]:
+    token = os.urandom(8).hex()
+    return [f"{_BOUNDARY}{token}n{i}" for i in range(n_documents)]
+
+
+def _joinable(markdown: str) -> bool:
+    """Whether markdown converts the same when joined with others"""
+    return not (
+        markdown.startswith(("%", "\ufeff"))
+        or _BOUNDARY in markdown
+        or _SHARED_STATE.search(markdown)
+    )
+
+
+def _attempt(func, *args):
+    """func(*args), or the exception it raised"""
+    try:
+        return func(*args)
+    except Exception as e:
+        return e
+
+
+def _split_blocks(blocks: list, boundaries: List[str]) -> List[list]:
+    """
+    Blocks of each joined document up to the first missing boundary
+
+    A document followed by its own boundary at the top level, in order,
+    was parsed as it would be on its own.
+    """
+    parts, current = [], []
+    for block in blocks:
+        c = block.get("c")
+        if (
+            block["t"] == "Para"
+            and len(c) == 1
+            and c[0]["t"] == "Str"
+            and c[0]["c"].startswith(_BOUNDARY)
+        ):
+            if (
+                len(parts) == len(boundaries)
+                or c[0]["c"] != boundaries[len(parts)]
+            ):
+                break
+            parts.append(current)
+            current = []
+        else:
+            current.append(block)
+    return parts
+
+
+def _split_markdown(markdown: str, boundaries: List[str]) -> Optional[list]:
+    """Markdown of each joined document, or None if a boundary went missing"""
+    parts = []
+    start = 0
+    for boundary in boundaries:
+        end = markdown.find(f"\n\n{boundary}\n", start)
+        if end < 0:
+            return None
+        parts.append(markdown[start : end + 1])
+        start = end + len(boundary) + 3
+        if markdown.startswith("\n", start):
+            start += 1
+    if start != len(markdown) or any(_BOUNDARY in part for part in parts):
+        return None
+    return parts
+
+
+def _read_joined(texts: List[str]) -> List[list]:
+    """
+    Pandoc blocks of each markdown text, from a single pandoc run
+
+    Stops short at the first document that swallowed its boundary.
+    """
+    boundaries = _boundaries(len(texts))
+    joined = "".join(
+        f"{text}\n\n{boundary}\n\n"
+        for text, boundary in zip(texts, boundaries)
+    )
+    try:
+        pandoc_json = _md_to_json(text=joined)
+    except Exception:
+        parts = []
+    else:
+        parts = _split_blocks(pandoc_json["blocks"], boundaries)
+    count("joined_documents", len(parts))
+    if len(parts) < len(texts):
+        count("join_fallbacks")
+    return parts
+
+
+def _write_joined(block_texts: List[List[str]]) -> Optional[List[str]]:
+    """Markdown of each document's pandoc blocks, from a single pandoc run"""
+    boundaries = _boundaries(len(block_texts))
+    parts = []
+    for blocks, boundary in zip(block_texts, boundaries):
+        parts.extend(blocks)
+        parts.append(f'{{"t":"Para","c":[{{"t":"Str","c":"{boundary}"}}]}}')
+    json_str = (
+        '{"pandoc-api-version":[1,23,1],"meta":{},'
+        f'"blocks":[{",".join(parts)}]}}'
+    )
+    try:
+        markdown = _run_pandoc(json_str, "json", "markdown", wrap_none=True)
+    except Exception:
+        markdowns = None
+    else:
+        markdowns = _split_markdown(markdown, boundaries)
+    if markdowns is None:
+        count("join_fallbacks")
+    else:
+        count("joined_documents", len(markdowns))
+    return markdowns
+
+
+def _md_to_simplified_many(
+    texts: List[str],
+    engine: str = "pandoc",
+    dropped: Optional[List[Optional[list]]] = None,
+) -> list:
+    """
+    Simplified JSON of each markdown text, or the exception it raised
+
+    Texts the native engine cannot parse, and all texts with the pandoc
+    engine, share one pandoc run where possible. If given, dropped[i]
+    collects the elements texts[i] loses, as in _md_to_simplified().
+    """
+    dropped = dropped or [None] * len(texts)
+    results = [None] * len(texts)
+    pending = []
+    for i, text in enumerate(texts):
+        if engine == "native":
+            try:
+                with stage("native_parse", text):
+                    results[i] = _parse_markdown(text, dropped[i])
+                continue
+            except NativeUnsupported:
+                count("native_fallbacks")
+                if dropped[i] is not None:
+                    del dropped[i][:]
+        pending.append(i)
+
+    joinable = [i for i in pending if _joinable(texts[i])]
+    while len(joinable) > 1:
+        parts = _read_joined([texts[i] for i in joinable])
+        with stage("simplify"):
+            for i, blocks in zip(joinable, parts):
+                results[i] = _simplify_pandoc_json(
+                    {"blocks": blocks}, dropped[i]
+                )
+        # The document after the last intact boundary is converted alone
+        joinable = joinable[len(parts) + 1 :]
+    for i in pending:
+        if results[i] is None:
+            results[i] = _attempt(
+                _md_to_simplified, texts[i], "pandoc", dropped[i]
+            )
+    return results
+
+
+def _simplified_to_md_many(documents: List[dict], engine: str = "pandoc"):
+    """
+    Markdown of each simplified JSON document, or the exception it raised
+
+    Documents the native engine cannot render, and all documents with the
+    pandoc engine, share one pandoc run where possible. With a section
+    memo configured, that run renders only the distinct sections the memo
+    lacks.
+    """
+    results = [None] * len(documents)
+    block_texts = {}
+    memo = get_section_memo()
+    memoized = []
+    for i, simplified_json in enumerate(documents):
+        try:
+            document = Document.from_simplified(simplified_json)
+        except Exception as e:
+            results[i] = e
+            continue
+        if engine == "native":
+            try:
+                with stage("native_render") as span:
+                    results[i] = span.data = _render_markdown(
+                        document, _pandoc_bullet()
+                    )
+                continue
+            except NativeUnsupported:
+                count("native_fallbacks")
+        if memo is not None and _sections(simplified_json):
+            memoized.append(i)
+            continue
+        with stage("to_pandoc_json"):
+            block_texts[i] = document.pandoc_block_texts()
+
+    if memoized:
+        markdowns = _attempt(
+            _memo_sections_to_md,
+            [documents[i]["sections"] for i in memoized],
+            engine,
+            memo,
+        )
+        for j, i in enumerate(memoized):
+            results[i] = (
+                _attempt(_simplified_to_md, documents[i], engine)
+                if isinstance(markdowns, Exception)
+                else markdowns[j]
+            )
+
+    # A document without blocks has no text before its boundary
+    joinable = [i for i, blocks in block_texts.items() if blocks]
+    if len(joinable) > 1:
+        markdowns = _write_joined([block_texts[i] for i in joinable])
+        if markdowns is not None:
+            for i, markdown in zip(joinable, markdowns):
+                results[i] = markdown
+    for i in block_texts:
+        if results[i] is None:
+            results[i] = _attempt(_simplified_to_md, documents[i])
+    return results
+
+
+def convert_texts(
+    texts: Iterable[str],
+    from_format: str,
+    indent: Optional[int] = 2,
+    verify: str = "full",
+    engine: str = "pandoc",
+    cache: Optional[Union[str, "ConversionCache"]] = None,
+) -> list:
+    """
+    Convert many in-memory documents with as few pandoc runs as possible
+
+    The documents are joined into a single pandoc run in each direction
+    (plus one for the reversibility check) and the output is split back
+    per document. Documents using markdown that pandoc resolves across the
+    whole input, such as reference links or footnotes, and every document
+    of a run whose boundaries did not survive, are converted one at a
+    time, so each result is exactly what convert_text() returns.
+
+    Args:
+        texts: Markdown or simplified JSON documents
+        from_format: "md" or "json"; the output is the other format
+        indent: JSON indentation level (None for compact JSON)
+        verify: Reversibility check; see convert_file()
+        engine: "pandoc" or "native"; see convert_file()
+        cache: Optional ConversionCache or SQLite path
+
+    Returns:
+        One (converted text, VerificationResult) per text, in order, or
+        the exception raised converting that text
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine: {engine}")
+    if from_format not in FORMATS:
+        raise ValueError(f"Unknown format: {from_format}")
+    mode, fraction = parse_verify(verify)
+    texts = list(texts)
+    results = [None] * len(texts)
+    keys = {}
+    if cache is not None:
+        from .cache import open_cache
+
+        cache = open_cache(cache)
+        direction = f"{from_format}2{FORMATS[from_format]}"
+        for i, text in enumerate(texts):
+            keys[i] = cache.key(text.encode("utf-8"), direction)
+            with stage("cache"):
+                cached = cache.get(keys[i])
+            count("cache_misses" if cached is None else "cache_hits")
+            if cached is not None and from_format == "md":
+                with stage("json_dump") as span:
+                    cached = span.data = codec.dumps(cached, indent=indent)
+            if cached is not None:
+                results[i] = (cached, skipped("cache hit"))
+    pending = [i for i, result in enumerate(results) if result is None]
+
+    simplified, outputs = {}, {}
+    dropped = {i: [] if mode == "structural" else None for i in pending}
+    if from_format == "md":
+        converted = _md_to_simplified_many(
+            [texts[i] for i in pending], engine, [dropped[i] for i in pending]
+        )
+        for i, simplified_json in zip(pending, converted):
+            if isinstance(simplified_json, Exception):
+                results[i] = simplified_json
+                continue
+            simplified[i] = simplified_json
+            with stage("json_dump") as span:
+                outputs[i] = span.data = codec.dumps(
+                    simplified_json, indent=indent
+                )
+    else:
+        for i in pending:
+            try:
+                with stage("json_parse", texts[i]):
+                    simplified[i] = codec.loads(texts[i])
+            except Exception as e:
+                results[i] = e
+        parsed = list(simplified)
+        converted = _simplified_to_md_many(
+            [simplified[i] for i in parsed], engine
+        )
+        for i, markdown in zip(parsed, converted):
+            if isinstance(markdown, Exception):
+                results[i] = markdown
+            else:
+                outputs[i] = markdown
+
+    verifications = {}
+    checked = []
+    for i in outputs:
+        if mode == "none":
+            verifications[i] = skipped("verification disabled")
+        elif sampled_out(fraction):
+            verifications[i] = skipped("not sampled")
+        else:
+            checked.append(i)
+    if checked:
+        with stage("verify"):
+            if from_format == "md" and mode == "structural":
+                for i in checked:
+                    verifications[i] = structural_result(dropped[i])
+            elif from_format == "md":
+                test_mds = _simplified_to_md_many(
+                    [simplified[i] for i in checked], engine
+                )
+                for i, test_md in zip(checked, test_mds):
+                    verifications[i] = (
+                        test_md
+                        if isinstance(test_md, Exception)
+                        else _compare_markdown(texts[i], test_md)
+                    )
+            elif mode == "structural":
+                for i in checked:
+                    verifications[i] = _attempt(
+                        _verify_json_to_md,
+                        simplified[i],
+                        outputs[i],
+                        mode,
+                        engine,
+                    )
+            else:
+                tests = _md_to_simplified_many(
+                    [outputs[i] for i in checked], engine
+                )
+                for i, test_simplified in zip(checked, tests):
+                    verifications[i] = (
+                        test_simplified
+                        if isinstance(test_simplified, Exception)
+                        else _compare_simplified(
+                            simplified[i], test_simplified, mode
+                        )
+                    )
+
+    for i in outputs:
+        if isinstance(verifications[i], Exception):
+            results[i] = verifications[i]
+            continue
+        results[i] = (outputs[i], verifications[i])
+        if cache is not None:
+            value = simplified[i] if from_format == "md" else outputs[i]
+            with stage("cache"):
+                cache.put(keys[i], value)
+    return results
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: "2026-10-19 01:46:20 (ywatanabe)"
+# File: /home/ywatanabe/proj/mdjson/mdjson/native.py
+
+__file__ = "/home/ywatanabe/proj/mdjson/mdjson/native.py"
+
+import re
+from typing import Optional
+
+from .model import BulletList, Document, Paragraph, _SectionStack
+
+
+class NativeUnsupported(ValueError):
+    """Raised when the native engine meets markdown it cannot handle"""
+
+
+# Characters and sequences with inline meaning in pandoc markdown
+# (emphasis, code, links, raw HTML/TeX, math, smart punctuation, ...)
+_UNSAFE_TEXT = re.compile(
+    r"[*_`\[\]<>\\&'\"~^$@{}|\x00-\x08\x0b-\x1f\x7f]"
+    r"|[^\S \t]|--|\.\.\."
+)
+
+# Line starts that open blocks the native engine does not model
+_UNSAFE_START = re.compile(
+    r"[>:~%+|=(]"
+    r"|\d+[.)](?:\s|$)"
+    r"|#\."
+    r"|[A-Za-z][.)](?:\s|$)"
+    r"|[ivxlcdmIVXLCDM]+[.)](?:\s|$)"
+    r"|[-=\s]+$"
+    r"|-(?: {5,}| *\t)"
+)
+
+_HEADER = re.compile(r"(#+)(?:[ \t]+(.*?))?[ \t]*$")
+_CLOSING_HASHES = re.compile(r"#+$")
+_BULLET = re.compile(r"- {1,4}(?=\S)")
+
+# Pandoc's default abbreviations, which smart punctuation glues to the
+# following word with a non-breaking space
+_ABBREVIATIONS = frozenset(
+    """
+    aet. aetat. al. Apr. Aug. bk. Bros. c. Capt. cf. ch. chap. chs. Co.
+    col. Corp. cp. d. Dec. Dr. e.g. ed. eds. esp. f. fasc. Feb. ff. fig.
+    fl. fol. fols. Fr. Gen. Gov. Hon. i.e. ill. Inc. incl. Jan. Jr. Jul.
+    Jun. Ltd. M.A. M.D. Mar. Mr. Mrs. Ms. n. n.b. nn. No. Nov. Oct. p.
+    Ph.D. pp. Pres. Prof. pt. q.v. Rep. Rev. s.v. s.vv. saec. sec. Sen.
+    Sep. Sept. Sgt. Sr. St. univ. viz. vol. vs.
+    """.split()
+)
+
+
+def _words(line: str) -> list:
+    """Split one line of inline text into pandoc Str words"""
+    if _UNSAFE_TEXT.search(line):
+        raise NativeUnsupported(f"inline markup: {line!r}")
+    words = line.split()
+    if "." in line:
+        for word in words:
+            if word[-1] == "." and word.lstrip("(") in _ABBREVIATIONS:
+                raise NativeUnsupported(f"abbreviation: {word!r}")
+    return words
+
+
+def _join_lines(lines: list) -> str:
+    """Join inline lines the way _simplify_pandoc_json flattens inlines"""
+    return " ".join(" ".join(_words(line)) for line in lines)
+
+
+def _check_continuation(line: str, in_list: bool = True) -> str:
+    # Headers need a blank line before them, so "# x" continues a
+    # paragraph as plain text
+    stripped = line.lstrip()
+    if (
+        _UNSAFE_START.match(stripped)
+        or (in_list and stripped.startswith("#"))
+        or _BULLET.match(stripped)
+    ):
+        raise NativeUnsupported(f"block inside paragraph: {line!r}")
+    return stripped
+
+
+def _parse_markdown(markdown: str, dropped: Optional[list] = None) -> dict:
+    """
+    Convert markdown straight to simplified JSON without pandoc
+
+    Handles the common subset of what _simplify_pandoc_json keeps: ATX
+    headers, paragraphs and flat "-" bullet lists of plain text. Raises
+    NativeUnsupported for anything else so the caller can fall back.
+    Blocks the schema discards are reported in `dropped` like
+    _simplify_pandoc_json does.
+    """
+    lines = markdown.split("\n")
+    n_lines = len(lines)
+
+    simplified = {"sections": []}
+    sections = _SectionStack()
+
+    i = 0
+    while i < n_lines:
+        line = lines[i].rstrip("\r")
+        if not line.strip():
+            i += 1
+            continue
+        if line[0] in " \t" or _UNSAFE_START.match(line):
+            raise NativeUnsupported(f"unsupported block: {line!r}")
+
+        if line[0] == "#":
+            match = _HEADER.match(line)
+            if match is None or len(match.group(1)) > 6:
+                raise NativeUnsupported(f"unsupported header: {line!r}")
+            level = len(match.group(1))
+            i += 1
+            if sections.root is None and level > 1:
+                if dropped is not None:
+                    dropped.append(f"Header{level}")
+                continue
+            title = _CLOSING_HASHES.sub("", match.group(2) or "").rstrip()
+            if not title:
+                raise NativeUnsupported(f"empty header: {line!r}")
+            title = " ".join(_words(title))
+            sections.add_header(level, title)
+            if level == 1:
+                simplified["sections"].append(sections.root)
+
+        elif _BULLET.match(line):
+            items = []
+            while i < n_lines:
+                match = _BULLET.match(line)
+                item_lines = [_check_continuation(line[match.end():])]
+                i += 1
+                while i < n_lines:
+                    line = lines[i].rstrip("\r")
+                    if not line.strip() or _BULLET.match(line):
+                        break
+                    item_lines.append(_check_continuation(line))
+                    i += 1
+                items.append(_join_lines(item_lines))
+
+                # Blank lines may separate items of one (loose) list
+                j = i
+                while j < n_lines and not lines[j].strip():
+                    j += 1
+                if j == n_lines:
+                    i = j
+                    break
+                line = lines[j].rstrip("\r")
+                if _BULLET.match(line):
+                    i = j
+                    continue
+                if j > i and line[0] in " \t":
+                    raise NativeUnsupported(f"indented list content: {line!r}")
+                break
+            if sections.root is not None:
+                sections.add_content(items)
+            elif dropped is not None:
+                dropped.append("BulletList")
+
+        else:
+            para_lines = [line]
+            i += 1
+            while i < n_lines:
+                line = lines[i].rstrip("\r")
+                if not line.strip():
+                    break
+                para_lines.append(_check_continuation(line, in_list=False))
+                i += 1
+            content = _join_lines(para_lines)
+            if sections.root is not None:
+                sections.add_content(content)
+            elif dropped is not None:
+                dropped.append("Para")
+
+    return simplified
+
+
+# Words the markdown writer reproduces verbatim anywhere in a line
+_PLAIN_WORD = re.compile(
+    r"[#+=:(-]?[^\W_]+(?:[.,;:?!%/+=#()-]+[^\W_]+)*\)?[.,;:?!%#]*"
+)
+
+
+def _render_inline(text: str) -> str:
+    """Render a simplified text run as pandoc would print its Str/Space run"""
+    words = text.split()
+    if not words:
+        raise NativeUnsupported("empty text")
+    for word in words:
+        if not _PLAIN_WORD.fullmatch(word):
+            raise NativeUnsupported(f"needs escaping: {word!r}")
+    if _UNSAFE_START.match(words[0]):
+        raise NativeUnsupported(f"needs escaping: {words[0]!r}")
+    return " ".join(words)
+
+
+def _render_content(content: list, blocks: list, bullet: str) -> None:
+    previous_list = False
+    for item in content:
+        if isinstance(item, Paragraph):
+            blocks.append(_render_inline(item.text))
+            previous_list = False
+        elif not isinstance(item, BulletList):
+            raise NativeUnsupported(f"{type(item).__name__} block")
+        else:
+            # Adjacent lists need a separator comment; leave them to pandoc
+            if not item.items or previous_list:
+                raise NativeUnsupported("empty or adjacent bullet lists")
+            blocks.append(
+                "\n".join(bullet + _render_inline(text) for text in item.items)
+            )
+            previous_list = True
+
+
+def _render_markdown(document: Document, bullet: str = "- ") -> str:
+    """
+    Convert a Document straight to markdown without pandoc
+
+    Reproduces `pandoc -t markdown --wrap=none` applied to
+    Document.to_pandoc_json(). `bullet` is the list marker the installed
+    pandoc writes ("- " or "-   " depending on its version). Raises
+    NativeUnsupported for text that pandoc would escape.
+    """
+    blocks = []
+    for level, title, content in document.iter_headed_content():
+        blocks.append("#" * level + " " + _render_inline(title))
+        _render_content(content, blocks, bullet)
+    return "\n\n".join(blocks) + "\n"
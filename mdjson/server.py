@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: "2026-10-19 09:18:02 (ywatanabe)"
+# File: /home/ywatanabe/proj/mdjson/mdjson/server.py
+
+__file__ = "/home/ywatanabe/proj/mdjson/mdjson/server.py"
+
+import json
+import os
+import socket
+import sys
+from typing import List, Optional, Tuple
+
+# The client side runs on every CLI call made through a daemon, so module
+# level imports stay minimal.
+# Request:  {"argv": [...], "cwd": "...", "stdin": nbytes}\n + stdin bytes
+# Response: {"status": n, "stdout": nbytes, "stderr": nbytes}\n + stdout
+#           bytes + stderr bytes
+
+
+def _send(sock, header: dict, *payloads: bytes) -> None:
+    sock.sendall(json.dumps(header).encode("ascii") + b"\n")
+    for payload in payloads:
+        if payload:
+            sock.sendall(payload)
+
+
+def _receive(stream) -> dict:
+    line = stream.readline()
+    if not line.endswith(b"\n"):
+        raise ConnectionError("Connection closed before a complete header")
+    return json.loads(line)
+
+
+def _read_exactly(stream, n_bytes: int) -> bytes:
+    data = stream.read(n_bytes)
+    if len(data) != n_bytes:
+        raise ConnectionError("Connection closed in the middle of a message")
+    return data
+
+
+def _connect(socket_path: str) -> socket.socket:
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(os.path.expanduser(socket_path))
+    except BaseException:
+        sock.close()
+        raise
+    return sock
+
+
+def _exchange(
+    sock, argv: List[str], stdin: bytes, cwd: Optional[str]
+) -> Tuple[int, bytes, bytes]:
+    cwd = cwd or os.getcwd()
+    _send(sock, {"argv": argv, "cwd": cwd, "stdin": len(stdin)}, stdin)
+    with sock.makefile("rb") as stream:
+        response = _receive(stream)
+        stdout = _read_exactly(stream, response["stdout"])
+        stderr = _read_exactly(stream, response["stderr"])
+    return response["status"], stdout, stderr
+
+
+def request(
+    socket_path: str,
+    argv: List[str],
+    stdin: bytes = b"",
+    cwd: Optional[str] = None,
+) -> Tuple[int, bytes, bytes]:
+    """
+    Run one mdjson command line in a daemon started with `mdjson --serve`
+
+    Args:
+        socket_path: Unix socket the daemon listens on
+        argv: Command line arguments, without the program name
+        stdin: Standard input for '-' inputs
+        cwd: Directory relative paths are resolved against (default: the
+            current directory)
+
+    Returns:
+        (exit status, stdout bytes, stderr bytes)
+
+    Raises:
+        OSError: If no daemon listens on socket_path
+    """
+    with _connect(socket_path) as sock:
+        return _exchange(sock, argv, stdin, cwd)
+
+
+def run_remote(socket_path: str, argv: List[str]) -> Optional[int]:
+    """
+    Forward a command line to the daemon and relay its output
+
+    Returns the exit status, or None if no daemon is listening so the
+    caller can run the command itself.
+    """
+    try:
+        sock = _connect(socket_path)
+    except (FileNotFoundError, ConnectionRefusedError):
+        return None
+    # '-' is stdin unless it is the value of -o/--output
+    reads_stdin = any(
+        arg == "-" and previous not in ("-o", "--output")
+        for previous, arg in zip([None] + argv, argv)
+    )
+    with sock:
+        stdin = sys.stdin.buffer.read() if reads_stdin else b""
+        status, stdout, stderr = _exchange(sock, argv, stdin, None)
+    sys.stdout.buffer.write(stdout)
+    sys.stdout.flush()
+    sys.stderr.buffer.write(stderr)
+    sys.stderr.flush()
+    return status
+
+
+# Section memos kept warm across the calls forwarded to a daemon, by size
+_memos = {}
+# Settings a call sets in os.environ for its worker processes
+_ENVIRONMENT = ("MDJSON_JSON_CODEC", "MDJSON_SECTION_MEMO")
+
+
+def _section_memo(max_bytes: int):
+    """The daemon's section memo of this size, created on first use"""
+    from .memo import SectionMemo
+
+    memo = _memos.get(max_bytes)
+    if memo is None:
+        memo = _memos[max_bytes] = SectionMemo(max_bytes)
+    return memo
+
+
+def _run(argv: List[str], cwd: str, stdin: bytes) -> Tuple[int, bytes, bytes]:
+    """
+    Run the CLI in this process with redirected stdio and cwd
+
+    Process-wide settings a call makes (pandoc backend, JSON codec,
+    section memo and their environment variables) are undone afterwards,
+    so they do not leak into later calls.
+    """
+    import io
+
+    from . import codec, memo
+    from .backend import get_backend, set_backend
+    from .cli import main
+
+    stdout, stderr = io.BytesIO(), io.BytesIO()
+    streams = (
+        io.TextIOWrapper(io.BytesIO(stdin), encoding="utf-8"),
+        io.TextIOWrapper(stdout, encoding="utf-8"),
+        io.TextIOWrapper(stderr, encoding="utf-8"),
+    )
+    saved = sys.stdin, sys.stdout, sys.stderr
+    saved_cwd = os.getcwd()
+    saved_backend = get_backend()
+    saved_codec = codec.get_codec().name
+    saved_memo = memo.get_section_memo()
+    saved_env = {name: os.environ.get(name) for name in _ENVIRONMENT}
+    sys.stdin, sys.stdout, sys.stderr = streams
+    try:
+        os.chdir(cwd)
+        status = main(argv, remote=True)
+    except SystemExit as e:
+        if e.code is None or isinstance(e.code, int):
+            status = e.code or 0
+        else:
+            print(e.code, file=sys.stderr)
+            status = 1
+    except Exception as e:
+        print(f"mdjson: {type(e).__name__}: {e}", file=sys.stderr)
+        status = 1
+    finally:
+        for stream in streams[1:]:
+            stream.flush()
+        sys.stdin, sys.stdout, sys.stderr = saved
+        os.chdir(saved_cwd)
+        # Closes any pool the call configured, keeping the daemon's warm
+        set_backend(saved_backend)
+        codec.set_codec(saved_codec)
+        memo.set_section_memo(saved_memo)
+        for name, value in saved_env.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+    return status, stdout.getvalue(), stderr.getvalue()
+
+
+def _remove_stale_socket(path: str) -> None:
+    """Remove a socket left behind by a dead server; refuse anything else"""
+    import stat
+
+    try:
+        mode = os.lstat(path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise OSError(f"{path} exists and is not a socket")
+    try:
+        with _connect(path):
+            pass
+    except ConnectionRefusedError:
+        os.unlink(path)
+    else:
+        raise OSError(f"A server is already listening on {path}")
+
+
+def serve(socket_path: str, pool_size: int = 1) -> None:
+    """
+    Serve mdjson command lines on a Unix socket until interrupted
+
+    The daemon keeps the interpreter, the imported modules and pool_size
+    warm pandoc workers alive, so each client call costs only a socket
+    round trip and the conversion itself. Requests are handled one at a
+    time; batch commands still fan out over --jobs worker processes. The
+    socket is only accessible to the current user, since requests
+    read and write files with the daemon's permissions.
+
+    Args:
+        socket_path: Unix socket to listen on (replaced if stale)
+        pool_size: Warm pandoc workers kept by the daemon
+    """
+    import socketserver
+
+    from .backend import configure_backend
+
+    socket_path = os.path.expanduser(socket_path)
+    _remove_stale_socket(socket_path)
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            try:
+                header = _receive(self.rfile)
+                stdin = _read_exactly(self.rfile, header["stdin"])
+            except (ConnectionError, ValueError, KeyError):
+                return
+            status, stdout, stderr = _run(header["argv"], header["cwd"], stdin)
+            response = {
+                "status": status,
+                "stdout": len(stdout),
+                "stderr": len(stderr),
+            }
+            try:
+                _send(self.connection, response, stdout, stderr)
+            except OSError:
+                pass
+
+    bound = False
+
+    class Server(socketserver.UnixStreamServer):
+        def server_bind(self):
+            nonlocal bound
+            # Set first: a signal may interrupt server_bind() right after
+            # the socket file is created
+            bound = True
+            try:
+                super().server_bind()
+            except OSError:
+                # e.g. EADDRINUSE: the path is someone else's
+                bound = False
+                raise
+
+    configure_backend(pool_size=pool_size)
+    server = None
+    umask = os.umask(0o177)
+    try:
+        # A signal may arrive while the socket is bound but not yet
+        # listening, so cleanup covers construction too. A failed bind
+        # leaves the path alone: it may belong to a daemon started since.
+        server = Server(socket_path, Handler)
+        os.umask(umask)
+        server.serve_forever()
+    finally:
+        os.umask(umask)
+        if server is not None:
+            server.server_close()
+        if bound:
+            try:
+                os.unlink(socket_path)
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,591 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: "2026-10-19 09:23:48 (ywatanabe)"
+# File: /home/ywatanabe/proj/mdjson/mdjson/service.py
+
+__file__ = "/home/ywatanabe/proj/mdjson/mdjson/service.py"
+
+import http.server
+import os
+import queue
+import socketserver
+import sys
+import threading
+import time
+from concurrent import futures
+from typing import List, Optional, Tuple, Union
+from urllib.parse import parse_qs, urlsplit
+
+from . import codec
+from .backend import PandocWorkerPool, _using_backend, pandoc_version
+from .cache import ConversionCache
+from .convert import ENGINES, FORMATS
+from .multidoc import convert_texts
+from .server import _remove_stale_socket
+from .stats import Stats, observe
+from .verify import VerificationResult, parse_verify
+
+# Endpoint -> input format, and the content type of the output
+ROUTES = {"/md2json": "md", "/json2md": "json"}
+_CONTENT_TYPES = {
+    "md": "application/json",
+    "json": "text/markdown; charset=utf-8",
+}
+_STOP = object()
+
+
+class Overloaded(Exception):
+    """Raised when the request queue is full"""
+
+
+class _Request:
+    __slots__ = ("key", "future", "queued")
+
+    def __init__(self, key: tuple):
+        self.key = key
+        self.future = futures.Future()
+        self.queued = time.perf_counter()
+
+
+class ConversionService:
+    """
+    Conversion queue for long-running servers
+
+    Requests wait in a bounded queue; submit() raises Overloaded once it
+    is full instead of letting latency grow without limit. Each
+    dispatcher thread takes up to max_batch queued requests at a time
+    and converts every distinct input once, so identical documents
+    submitted concurrently share one conversion; distinct documents with
+    the same options share one pandoc run (see convert_texts()).
+    Dispatchers share the service's own pandoc backend, not the one set
+    with configure_backend(); start() warms it with one pandoc worker per
+    dispatcher.
+
+    Example:
+        with ConversionService(workers=4) as service:
+            output, verification = service.convert("md", "# Title\\n")
+
+    Args:
+        workers: Dispatcher threads (and warm pandoc workers)
+        queue_size: Requests allowed to wait before submit() refuses
+        max_batch: Requests a dispatcher takes from the queue at once
+        indent: Default JSON indentation (None for compact JSON)
+        verify: Default reversibility check; see convert_file()
+        engine: Default conversion engine, "pandoc" or "native"
+        cache: Optional ConversionCache or SQLite path
+        stats_window: Latency samples kept per stage for percentiles
+    """
+
+    def __init__(
+        self,
+        workers: int = 2,
+        queue_size: int = 64,
+        max_batch: int = 16,
+        indent: Optional[int] = 2,
+        verify: str = "full",
+        engine: str = "pandoc",
+        cache: Optional[Union[str, ConversionCache]] = None,
+        stats_window: int = 10000,
+    ):
+        if workers < 1 or queue_size < 1 or max_batch < 1:
+            raise ValueError("workers, queue_size and max_batch must be >= 1")
+        self.workers = workers
+        self.queue_size = queue_size
+        self.max_batch = max_batch
+        self.options = self._options(indent, verify, engine)
+        self.cache = cache
+        self.stats = Stats(window=stats_window)
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._threads = []
+        self.backend = None
+        self._observing = None
+        self._closed = False
+        self._started = time.monotonic()
+
+    def __enter__(self) -> "ConversionService":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    @staticmethod
+    def _options(indent, verify, engine) -> Tuple:
+        parse_verify(verify)
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown engine: {engine}")
+        if indent is not None and (not isinstance(indent, int) or indent < 0):
+            raise ValueError(f"Invalid indent: {indent}")
+        return indent, verify, engine
+
+    def start(self) -> None:
+        """Warm the pandoc backend and start the dispatcher threads"""
+        if self._threads:
+            return
+        self.backend = PandocWorkerPool(self.workers)
+        # Per-stage timings (pandoc, verify, ...) of every conversion
+        self._observing = observe(self.stats)
+        self._observing.__enter__()
+        for i in range(self.workers):
+            thread = threading.Thread(
+                target=self._dispatch, name=f"mdjson-dispatch-{i}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def close(self) -> None:
+        """Finish the queued requests and stop the dispatchers"""
+        if self._closed:
+            return
+        self._closed = True
+        for _ in self._threads:
+            self._queue.put(_STOP)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        if self._observing is not None:
+            self._observing.__exit__(None, None, None)
+            self._observing = None
+        if self.backend is not None:
+            self.backend.close()
+
+    def submit(
+        self,
+        from_format: str,
+        text: str,
+        indent: Union[int, None, str] = "default",
+        verify: Optional[str] = None,
+        engine: Optional[str] = None,
+    ) -> futures.Future:
+        """
+        Queue one conversion
+
+        Options left out use the service defaults (indent="default" keeps
+        the default indentation, since None selects compact JSON).
+
+        Returns:
+            Future resolving to (converted text, VerificationResult)
+
+        Raises:
+            Overloaded: If the queue is full
+            ValueError: For an unknown format or invalid options
+        """
+        if self._closed:
+            raise RuntimeError("ConversionService is closed")
+        if not self._threads:
+            self.start()
+        if from_format not in FORMATS:
+            raise ValueError(f"Unknown format: {from_format}")
+        default_indent, default_verify, default_engine = self.options
+        options = self._options(
+            default_indent if indent == "default" else indent,
+            verify or default_verify,
+            engine or default_engine,
+        )
+        request = _Request((from_format, text) + options)
+        try:
+            self._queue.put_nowait(request)
+        except queue.Full:
+            self.stats.count("rejected_requests")
+            raise Overloaded(
+                f"{self.queue_size} requests are already waiting"
+            ) from None
+        return request.future
+
+    def convert(
+        self,
+        from_format: str,
+        text: str,
+        timeout: Optional[float] = None,
+        **options,
+    ) -> Tuple[str, VerificationResult]:
+        """submit() and wait for the result"""
+        return self.submit(from_format, text, **options).result(timeout)
+
+    def _take(self) -> List[_Request]:
+        """Block for one request, then take what else is already queued"""
+        batch = [self._queue.get()]
+        while batch[-1] is not _STOP and len(batch) < self.max_batch:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _dispatch(self) -> None:
+        with _using_backend(self.backend):
+            while True:
+                batch = self._take()
+                stop = batch[-1] is _STOP
+                if stop:
+                    batch.pop()
+                if batch:
+                    self._convert_batch(batch)
+                if stop:
+                    return
+
+    def _convert_batch(self, batch: List[_Request]) -> None:
+        started = time.perf_counter()
+        distinct = {}
+        for request in batch:
+            self.stats.record("queue_wait", started - request.queued)
+            distinct.setdefault(request.key, []).append(request)
+        self.stats.count("batches")
+        self.stats.count("coalesced_requests", len(batch) - len(distinct))
+        # Distinct documents with the same options share one pandoc run
+        groups = {}
+        for key in distinct:
+            from_format, text, indent, verify, engine = key
+            groups.setdefault((from_format, indent, verify, engine), [])
+            groups[from_format, indent, verify, engine].append(key)
+        for (from_format, indent, verify, engine), keys in groups.items():
+            try:
+                results = convert_texts(
+                    [key[1] for key in keys],
+                    from_format,
+                    indent,
+                    verify,
+                    engine,
+                    self.cache,
+                )
+            except Exception as e:
+                results = [e] * len(keys)
+            finished = time.perf_counter()
+            stage = f"request_{from_format}2{FORMATS[from_format]}"
+            for key, result in zip(keys, results):
+                requests = distinct[key]
+                if isinstance(result, Exception):
+                    self.stats.count("failed_requests", len(requests))
+                    for request in requests:
+                        request.future.set_exception(result)
+                    continue
+                for request in requests:
+                    self.stats.record(
+                        stage, finished - request.queued, len(key[1])
+                    )
+                    request.future.set_result(result)
+
+    def health(self) -> dict:
+        """Liveness and load figures, as served on /health"""
+        return {
+            "status": "closed" if self._closed else "ok",
+            "uptime_seconds": time.monotonic() - self._started,
+            "workers": len(self._threads),
+            "queue_depth": self._queue.qsize(),
+            "queue_size": self.queue_size,
+            "pandoc": pandoc_version(
+                getattr(self.backend, "pandoc", "pandoc")
+            ),
+        }
+
+    def metrics(self) -> str:
+        """Latency summaries, counters and queue gauges in Prometheus text"""
+        health = self.health()
+        gauges = [
+            "# TYPE mdjson_queue_depth gauge",
+            f"mdjson_queue_depth {health['queue_depth']}",
+            "# TYPE mdjson_queue_size gauge",
+            f"mdjson_queue_size {health['queue_size']}",
+            "# TYPE mdjson_workers gauge",
+            f"mdjson_workers {health['workers']}",
+        ]
+        return "\n".join([self.stats.format("prometheus")] + gauges) + "\n"
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    """Routes requests to the server's ConversionService"""
+
+    protocol_version = "HTTP/1.1"
+    server_version = "mdjson"
+
+    def log_message(self, format, *args) -> None:
+        if self.server.access_log:
+            super().log_message(format, *args)
+
+    def address_string(self) -> str:
+        # Unix socket peers have no address
+        return self.client_address[0] if self.client_address else "unix"
+
+    def _reply(
+        self, status: int, body: str, content_type: str, headers=()
+    ) -> None:
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _error(self, status: int, message: str, headers=()) -> None:
+        body = codec.dumps({"error": message}, indent=None)
+        self._reply(status, body, "application/json", headers)
+
+    def do_GET(self) -> None:
+        path = urlsplit(self.path).path
+        service = self.server.service
+        if path == "/health":
+            self._reply(
+                200, codec.dumps(service.health()), "application/json"
+            )
+        elif path == "/metrics":
+            self._reply(
+                200, service.metrics(), "text/plain; version=0.0.4"
+            )
+        elif path in ROUTES:
+            self._error(405, "Use POST", [("Allow", "POST")])
+        else:
+            self._error(404, f"No such endpoint: {path}")
+
+    def do_POST(self) -> None:
+        url = urlsplit(self.path)
+        from_format = ROUTES.get(url.path)
+        if from_format is None:
+            self._error(404, f"No such endpoint: {url.path}")
+            return
+        try:
+            length = int(self.headers.get("Content-Length", ""))
+        except ValueError:
+            self._error(411, "Content-Length required")
+            return
+        if length < 0:
+            # rfile.read(-1) would wait for the client to close
+            self.close_connection = True
+            self._error(
+                400, "Invalid Content-Length", [("Connection", "close")]
+            )
+            return
+        if length > self.server.max_body:
+            # The unread body would be taken for the next request
+            self.close_connection = True
+            self._error(
+                413,
+                f"Body exceeds {self.server.max_body} bytes",
+                [("Connection", "close")],
+            )
+            return
+        body = self.rfile.read(length)
+        try:
+            options = {
+                name: values[-1]
+                for name, values in parse_qs(url.query).items()
+                if name in ("indent", "verify", "engine")
+            }
+            if "indent" in options:
+                indent = options["indent"]
+                options["indent"] = None if indent == "none" else int(indent)
+            future = self.server.service.submit(
+                from_format, body.decode("utf-8"), **options
+            )
+        except Overloaded as e:
+            self._error(503, str(e), [("Retry-After", "1")])
+            return
+        except (ValueError, UnicodeDecodeError) as e:
+            self._error(400, str(e))
+            return
+        try:
+            output, verification = future.result(self.server.request_timeout)
+        except futures.TimeoutError:
+            self._error(504, "Conversion timed out")
+            return
+        except (ValueError, KeyError, TypeError) as e:
+            # Malformed JSON or documents that do not follow the schema
+            self._error(400, f"{type(e).__name__}: {e}")
+            return
+        except Exception as e:
+            self._error(500, f"{type(e).__name__}: {e}")
+            return
+        headers = [("X-Mdjson-Reversible", str(verification.reversible))]
+        if verification.detail:
+            headers.append(("X-Mdjson-Verification", verification.detail))
+        self._reply(200, output, _CONTENT_TYPES[from_format], headers)
+
+
+# socketserver's default backlog of 5 resets bursts of connections
+_BACKLOG = 128
+
+
+class _TCPServer(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = _BACKLOG
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+    request_queue_size = _BACKLOG
+
+    def server_close(self) -> None:
+        super().server_close()
+        if os.path.exists(self.server_address):
+            os.unlink(self.server_address)
+
+
+def make_server(
+    service: ConversionService,
+    host: str = "127.0.0.1",
+    port: int = 8787,
+    unix_socket: Optional[str] = None,
+    timeout: Optional[float] = 300,
+    max_body: int = 64 * 1024 * 1024,
+    access_log: bool = False,
+) -> socketserver.BaseServer:
+    """
+    HTTP server exposing a ConversionService
+
+    Endpoints:
+        POST /md2json, POST /json2md: the body is the document (UTF-8);
+            ?indent=N|none, ?verify= and ?engine= override the service
+            defaults. The X-Mdjson-Reversible header carries the check's
+            outcome. A full queue answers 503 with Retry-After.
+        GET /health: JSON with queue depth, workers and pandoc version
+        GET /metrics: Prometheus text with request latency (including
+            queue wait) and per-stage timings, counters and queue gauges
+
+    Call serve_forever() on the result, and server_close() when done.
+
+    Args:
+        service: Service handling the conversions
+        host: Interface to listen on (loopback by default)
+        port: TCP port (0 picks a free one; see server_address)
+        unix_socket: Listen on this Unix socket instead of TCP; created
+            accessible to the current user only
+        timeout: Seconds a request may wait for its conversion
+        max_body: Largest accepted request body in bytes
+        access_log: Log every request to stderr
+    """
+    if unix_socket is not None:
+        unix_socket = os.path.expanduser(unix_socket)
+        _remove_stale_socket(unix_socket)
+        umask = os.umask(0o177)
+        try:
+            server = _UnixServer(unix_socket, _Handler)
+        finally:
+            os.umask(umask)
+    else:
+        server = _TCPServer((host, port), _Handler)
+    server.service = service
+    server.request_timeout = timeout
+    server.max_body = max_body
+    server.access_log = access_log
+    return server
+
+
+def main(
+    argv: Optional[List[str]] = None, prog: str = "python -m mdjson.service"
+) -> int:
+    """mdjson serve (or python -m mdjson.service): run the HTTP server"""
+    import argparse
+    import signal
+
+    parser = argparse.ArgumentParser(
+        prog=prog,
+        description=(
+            "Serve POST /md2json, POST /json2md, GET /health and GET /metrics"
+        ),
+    )
+    parser.add_argument(
+        "--host", default="127.0.0.1", help="Interface to listen on"
+    )
+    parser.add_argument(
+        "--port", type=int, default=8787, help="TCP port (0 picks a free one)"
+    )
+    parser.add_argument(
+        "--unix",
+        metavar="SOCKET",
+        help="Listen on a Unix socket instead of TCP",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Conversion threads and warm pandoc workers (default: CPU count)",
+    )
+    parser.add_argument(
+        "--queue-size",
+        type=int,
+        default=64,
+        help="Requests allowed to wait; more are refused with 503",
+    )
+    parser.add_argument(
+        "--max-batch",
+        type=int,
+        default=16,
+        help="Queued requests a worker takes at once",
+    )
+    parser.add_argument(
+        "--indent", "-i", type=int, default=2, help="Default JSON indent level"
+    )
+    parser.add_argument(
+        "--compact", action="store_true", help="Default to compact JSON"
+    )
+    parser.add_argument(
+        "--engine",
+        choices=ENGINES,
+        default="pandoc",
+        help="Default conversion engine",
+    )
+    parser.add_argument(
+        "--verify",
+        default="full",
+        help=(
+            "Default reversibility check: full, structural, sample=N%% "
+            "or none"
+        ),
+    )
+    parser.add_argument(
+        "--cache", help="SQLite file caching results by input content hash"
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=300,
+        help="Seconds a request may wait for its conversion",
+    )
+    parser.add_argument(
+        "--access-log", action="store_true", help="Log requests to stderr"
+    )
+    args = parser.parse_args(argv)
+    try:
+        service = ConversionService(
+            args.workers,
+            args.queue_size,
+            args.max_batch,
+            None if args.compact else args.indent,
+            args.verify,
+            args.engine,
+            args.cache,
+        )
+        server = make_server(
+            service,
+            args.host,
+            args.port,
+            args.unix,
+            args.timeout,
+            access_log=args.access_log,
+        )
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    if args.unix:
+        address = args.unix
+    else:
+        host, port = server.server_address[:2]
+        address = f"http://{host}:{port}"
+    print(
+        f"Serving on {address}; press Ctrl-C to stop",
+        file=sys.stderr,
+        flush=True,
+    )
+    try:
+        with service:
+            server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
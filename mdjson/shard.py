@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: "2026-10-19 09:32:14 (ywatanabe)"
+# File: /home/ywatanabe/proj/mdjson/mdjson/shard.py
+
+__file__ = "/home/ywatanabe/proj/mdjson/mdjson/shard.py"
+
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+
+from .convert import _md_to_simplified, _simplified_to_md
+from . import stats
+from .stats import count, observe, stage
+
+# A huge document is split at level-1 headers and its shards converted in
+# worker processes. A header only starts a shard when it follows a blank
+# line outside any code fence, as pandoc requires; documents using
+# anything that could carry one shard's parse into the next are converted
+# in one piece instead, so the merged result is always the serial one.
+_H1 = re.compile(r"#(?:[ \t]|$)")
+# A backtick fence's info string has no backticks; a closing fence has
+# nothing but whitespace after it
+_FENCE_OPEN = re.compile(r" {0,3}(`{3,}(?=[^`]*$)|~{3,})")
+_FENCE_CLOSE = re.compile(r" {0,3}(`{3,}|~{3,})[ \t]*$")
+# Blocks that may span blank lines and swallow a header: raw HTML and
+# comments, fenced divs, raw TeX environments, fences indented past the
+# scanner's view, and YAML metadata or multiline tables (a dashed line
+# followed directly by text)
+_SPANNING = re.compile(
+    r"^(?: {0,3}<| {0,3}:::|\\begin\{|[ \t]{4,}(?:```|~~~)"
+    r"|-{3,}[- \t]*\n[ \t]*\S)",
+    re.MULTILINE,
+)
+# State one shard may take from another: reference and footnote
+# definitions, footnote references, example lists numbered across the
+# document and TeX macros
+_SHARED_STATE = re.compile(
+    r"^ {0,3}\[[^\]\n]+\]:|\[\^|\(@|\\(?:re)?new|\\def|\\let|\\Declare",
+    re.MULTILINE,
+)
+# Bracketed text, which pandoc links to a header of the same name
+_LABEL = re.compile(r"\[([^\[\]]+)\](?!\()")
+_HEADER = re.compile(
+    r"^#{1,6}[ \t]+(.*?)[ \t#]*$|^(.+)\n(?:=+|-+)[ \t]*$", re.MULTILINE
+)
+# Shards smaller than this are not worth a worker process
+_MIN_SHARD_SIZE = 1 << 16
+
+
+def n_shards(text: str, jobs: int) -> int:
+    """Shards worth converting text in, given `jobs` worker processes"""
+    return max(1, min(jobs, len(text) // _MIN_SHARD_SIZE))
+
+
+def _words(text: str) -> str:
+    return " ".join(re.findall(r"\w+", text.lower()))
+
+
+def _shardable(markdown: str) -> bool:
+    """Whether markdown converts the same when split at level-1 headers"""
+    if _SPANNING.search(markdown) or _SHARED_STATE.search(markdown):
+        return False
+    labels = {_words(label) for label in _LABEL.findall(markdown)}
+    if not labels:
+        return True
+    # Implicit header references resolve across the whole document
+    headers = {
+        _words(atx or setext) for atx, setext in _HEADER.findall(markdown)
+    }
+    return labels.isdisjoint(headers)
+
+
+def _h1_offsets(markdown: str) -> List[int]:
+    """Offsets of the lines pandoc reads as level-1 headers"""
+    offsets = []
+    fence = None
+    blank = True
+    offset = 0
+    for line in markdown.splitlines(True):
+        match = (_FENCE_OPEN if fence is None else _FENCE_CLOSE).match(line)
+        if fence is not None:
+            if match and match.group(1)[0] == fence[0] and (
+                len(match.group(1)) >= len(fence)
+            ):
+                fence = None
+        elif match:
+            fence = match.group(1)
+        elif blank and _H1.match(line):
+            offsets.append(offset)
+        blank = not line.strip()
+        offset += len(line)
+    return offsets
+
+
+def _split_points(markdown: str) -> List[int]:
+    """Offsets of the level-1 headers markdown can be split at"""
+    return [offset for offset in _h1_offsets(markdown) if offset]
+
+
+def _md_shards(markdown: str, n_shards: int) -> List[str]:
+    """
+    Markdown split at level-1 headers into about n_shards similar sizes
+
+    Returns the whole text as one shard when it cannot be split safely.
+    """
+    if n_shards < 2:
+        return [markdown]
+    if not _shardable(markdown):
+        count("shard_fallbacks")
+        return [markdown]
+    target = len(markdown) / n_shards
+    starts = [0]
+    for point in _split_points(markdown):
+        # Cut at the first header past each multiple of the target size
+        if point >= target * len(starts):
+            starts.append(point)
+    ends = starts[1:] + [len(markdown)]
+    return [markdown[start:end] for start, end in zip(starts, ends)]
+
+
+def _section_chunks(sections: list, n_chunks: int) -> List[list]:
+    """sections in n_chunks consecutive runs of similar length"""
+    n_chunks = min(n_chunks, len(sections))
+    size, extra = divmod(len(sections), n_chunks)
+    chunks, start = [], 0
+    for i in range(n_chunks):
+        end = start + size + (i < extra)
+        chunks.append(sections[start:end])
+        start = end
+    return chunks
+
+
+def _init_worker(pandoc: str) -> None:
+    # A forked worker must not share the parent's warm pandoc processes,
+    # including those of a Converter it inherited from the parent's context
+    from .backend import _context_backend, configure_backend
+
+    _context_backend.set(None)
+    configure_backend(pool_size=0, pandoc=pandoc)
+
+
+class _Recorder:
+    """Observer keeping a worker's stage timings and counters in order"""
+
+    __slots__ = ("events",)
+
+    def __init__(self):
+        self.events = []
+
+    def record(self, stage: str, seconds: float, n_bytes: int = 0) -> None:
+        self.events.append(("record", stage, seconds, n_bytes))
+
+    def count(self, name: str, n: int = 1) -> None:
+        self.events.append(("count", name, n))
+
+
+def _run_shard(func, observed: bool, shard, *args):
+    if not observed:
+        return func(shard, *args), ()
+    with observe(_Recorder()) as recorder:
+        result = func(shard, *args)
+    return result, recorder.events
+
+
+def _map_shards(func, shards: list, jobs: int, *args) -> list:
+    """
+    [func(shard, *args) for shard in shards], run in worker processes
+
+    Stage timings and counters of the workers go to this process's
+    observers.
+    """
+    from .backend import get_backend
+
+    count("shards", len(shards))
+    observers = stats._observers
+    # Workers run the pandoc of the active backend, e.g. a Converter's
+    pandoc = getattr(get_backend(), "pandoc", "pandoc")
+    with ProcessPoolExecutor(
+        max_workers=min(jobs, len(shards)),
+        initializer=_init_worker,
+        initargs=(pandoc,),
+    ) as executor:
+        futures = [
+            executor.submit(_run_shard, func, bool(observers), shard, *args)
+            for shard in shards
+        ]
+        results = []
+        for future in futures:
+            result, events = future.result()
+            for kind, *event in events:
+                for observer in observers:
+                    getattr(observer, kind)(*event)
+            results.append(result)
+    return results
+
+
+def _simplify_shard(markdown: str, engine: str, with_dropped: bool):
+    dropped = [] if with_dropped else None
+    return _md_to_simplified(markdown, engine, dropped), dropped
+
+
+def _render_shard(sections: list, engine: str) -> str:
+    return _simplified_to_md({"sections": sections}, engine)
+
+
+def sharded_md_to_simplified(
+    markdown: str,
+    engine: str = "pandoc",
+    dropped: Optional[list] = None,
+    jobs: int = 2,
+) -> dict:
+    """
+    Convert markdown to simplified JSON in up to `jobs` worker processes
+
+    The result, and what is reported in `dropped`, is identical to
+    _md_to_simplified(); documents that cannot be split safely are
+    converted in this process.
+    """
+    with stage("shard", markdown):
+        shards = _md_shards(markdown, jobs)
+    if len(shards) == 1:
+        return _md_to_simplified(markdown, engine, dropped)
+    sections = []
+    for simplified, shard_dropped in _map_shards(
+        _simplify_shard, shards, jobs, engine, dropped is not None
+    ):
+        sections.extend(simplified["sections"])
+        if dropped is not None:
+            dropped.extend(shard_dropped)
+    return {"sections": sections}
+
+
+def sharded_simplified_to_md(
+    simplified_json: dict, engine: str = "pandoc", jobs: int = 2
+) -> str:
+    """
+    Convert simplified JSON to markdown in up to `jobs` worker processes
+
+    Runs of whole sections are rendered separately and joined with the
+    blank line pandoc puts between sections, so the markdown is identical
+    to _simplified_to_md().
+    """
+    sections = simplified_json["sections"]
+    if jobs < 2 or len(sections) < 2:
+        return _simplified_to_md(simplified_json, engine)
+    chunks = _section_chunks(sections, jobs)
+    return "\n".join(_map_shards(_render_shard, chunks, jobs, engine))
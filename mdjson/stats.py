@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: "2026-10-18 22:31:09 (ywatanabe)"
+# File: /home/ywatanabe/proj/mdjson/mdjson/stats.py
+
+__file__ = "/home/ywatanabe/proj/mdjson/mdjson/stats.py"
+
+import collections
+import contextlib
+import json
+import threading
+import time
+from typing import Optional, Union
+
+# Observers currently receiving events; replaced, never mutated, so the
+# hot path can read it without locking
+_observers = ()
+_observers_lock = threading.Lock()
+
+
+class Stats:
+    """
+    Collects per-stage wall times, byte counts and counters
+
+    Stages nest: "verify" includes the pandoc call it makes, and "pandoc"
+    is also recorded on its own. Any object with the same record() and
+    count() methods can be passed to observe() instead.
+
+    Args:
+        window: Keep only the latest `window` samples of each stage for
+            the percentiles, so long-running processes stay bounded in
+            memory; counts and totals still cover every sample
+    """
+
+    def __init__(self, window: Optional[int] = None):
+        self._lock = threading.Lock()
+        self.window = window
+        self.samples = {}
+        self.bytes = {}
+        self.counters = {}
+        # stage -> [count, total seconds], for samples beyond the window
+        self._totals = {}
+
+    def _samples(self, stage: str):
+        samples = self.samples.get(stage)
+        if samples is None:
+            samples = self.samples[stage] = (
+                collections.deque(maxlen=self.window) if self.window else []
+            )
+        return samples
+
+    def _add(self, stage: str, samples, count: int, total: float) -> None:
+        self._samples(stage).extend(samples)
+        if self.window:
+            totals = self._totals.setdefault(stage, [0, 0.0])
+            totals[0] += count
+            totals[1] += total
+
+    def _total(self, stage: str):
+        """(count, total seconds) of every sample recorded for stage"""
+        if stage in self._totals:
+            return tuple(self._totals[stage])
+        samples = self.samples[stage]
+        return len(samples), sum(samples)
+
+    def record(self, stage: str, seconds: float, n_bytes: int = 0) -> None:
+        with self._lock:
+            self._add(stage, (seconds,), 1, seconds)
+            self.bytes[stage] = self.bytes.get(stage, 0) + n_bytes
+
+    def count(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def merge(self, other: "Stats") -> None:
+        """Add the measurements of another Stats, e.g. from a worker"""
+        with self._lock:
+            for stage, samples in other.samples.items():
+                self._add(stage, samples, *other._total(stage))
+            for stage, n_bytes in other.bytes.items():
+                self.bytes[stage] = self.bytes.get(stage, 0) + n_bytes
+            for name, n in other.counters.items():
+                self.counters[name] = self.counters.get(name, 0) + n
+
+    def __getstate__(self):
+        return (
+            self.samples, self.bytes, self.counters, self.window, self._totals
+        )
+
+    def __setstate__(self, state):
+        self._lock = threading.Lock()
+        (
+            self.samples, self.bytes, self.counters, self.window, self._totals
+        ) = state
+
+    def summary(self) -> dict:
+        """Per-stage count, total, p50 and p95 seconds and bytes"""
+        with self._lock:
+            stages = {}
+            for stage, samples in self.samples.items():
+                ordered = sorted(samples)
+                count, total = self._total(stage)
+                stages[stage] = {
+                    "count": count,
+                    "total_seconds": total,
+                    "p50_seconds": _percentile(ordered, 50),
+                    "p95_seconds": _percentile(ordered, 95),
+                    "bytes": self.bytes.get(stage, 0),
+                }
+            return {"stages": stages, "counters": dict(self.counters)}
+
+    def format(self, fmt: str = "table") -> str:
+        """Render the summary as "table", "json" or "prometheus" text"""
+        summary = self.summary()
+        if fmt == "json":
+            return json.dumps(summary, indent=2)
+        if fmt == "prometheus":
+            return _prometheus(summary)
+        if fmt == "table":
+            return _table(summary)
+        raise ValueError(f"Unknown stats format: {fmt}")
+
+
+def _percentile(ordered: list, percent: float) -> float:
+    """Nearest-rank percentile of a sorted list"""
+    if not ordered:
+        return 0.0
+    rank = max(1, -(-len(ordered) * percent // 100))
+    return ordered[int(rank) - 1]
+
+
+def _table(summary: dict) -> str:
+    lines = [
+        f"{'stage':<20} {'count':>7} {'total s':>9} {'p50 ms':>9}"
+        f" {'p95 ms':>9} {'MB':>9}"
+    ]
+    for stage, s in sorted(summary["stages"].items()):
+        lines.append(
+            f"{stage:<20} {s['count']:>7} {s['total_seconds']:>9.3f}"
+            f" {s['p50_seconds'] * 1e3:>9.2f} {s['p95_seconds'] * 1e3:>9.2f}"
+            f" {s['bytes'] / 1e6:>9.2f}"
+        )
+    for name, n in sorted(summary["counters"].items()):
+        lines.append(f"{name:<20} {n:>7}")
+    return "\n".join(lines)
+
+
+def _prometheus(summary: dict) -> str:
+    lines = ["# TYPE mdjson_stage_seconds summary"]
+    for stage, s in sorted(summary["stages"].items()):
+        label = f'stage="{stage}"'
+        for quantile, key in (("0.5", "p50_seconds"), ("0.95", "p95_seconds")):
+            lines.append(
+                f'mdjson_stage_seconds{{{label},quantile="{quantile}"}}'
+                f" {s[key]}"
+            )
+        lines.append(f"mdjson_stage_seconds_sum{{{label}}} {s['total_seconds']}")
+        lines.append(f"mdjson_stage_seconds_count{{{label}}} {s['count']}")
+    lines.append("# TYPE mdjson_stage_bytes_total counter")
+    for stage, s in sorted(summary["stages"].items()):
+        lines.append(
+            f'mdjson_stage_bytes_total{{stage="{stage}"}} {s["bytes"]}'
+        )
+    for name, n in sorted(summary["counters"].items()):
+        lines.append(f"# TYPE mdjson_{name}_total counter")
+        lines.append(f"mdjson_{name}_total {n}")
+    return "\n".join(lines)
+
+
+@contextlib.contextmanager
+def observe(observer):
+    """Send stage timings and counters to observer while in the block"""
+    global _observers
+    with _observers_lock:
+        _observers = _observers + (observer,)
+    try:
+        yield observer
+    finally:
+        with _observers_lock:
+            remaining = list(_observers)
+            remaining.remove(observer)
+            _observers = tuple(remaining)
+
+
+def collect_stats(stats: Optional[Stats] = None):
+    """
+    Context manager collecting conversion statistics
+
+    Example:
+        with collect_stats() as stats:
+            mdjson("input.md")
+        print(stats.format("table"))
+    """
+    return observe(stats if stats is not None else Stats())
+
+
+class _Span:
+    """Handle yielded by stage(); set `data` once the output is known"""
+
+    __slots__ = ("data",)
+
+    def __init__(self, data=None):
+        self.data = data
+
+
+class _NullSpan:
+    """Stand-in span when nothing observes, so no data is retained"""
+
+    __slots__ = ()
+
+    def __setattr__(self, name, value):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+@contextlib.contextmanager
+def stage(name: str, data: Union[str, bytes, None] = None):
+    """
+    Time the enclosed block as stage `name`
+
+    Bytes are counted from `data`, or from what the block assigns to the
+    yielded span's `data` attribute.
+    """
+    observers = _observers
+    if not observers:
+        yield _NULL_SPAN
+        return
+    span = _Span(data)
+    start = time.perf_counter()
+    try:
+        yield span
+    finally:
+        elapsed = time.perf_counter() - start
+        data = span.data
+        if isinstance(data, str):
+            n_bytes = len(data.encode("utf-8"))
+        else:
+            n_bytes = len(data) if data is not None else 0
+        for observer in observers:
+            observer.record(name, elapsed, n_bytes)
+
+
+def count(name: str, n: int = 1) -> None:
+    for observer in _observers:
+        observer.count(name, n)
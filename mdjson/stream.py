@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: "2026-10-19 06:31:20 (ywatanabe)"
+# File: /home/ywatanabe/proj/mdjson/mdjson/stream.py
+
+__file__ = "/home/ywatanabe/proj/mdjson/mdjson/stream.py"
+
+import io
+import json
+import os
+import re
+import subprocess
+import tempfile
+from typing import IO, Iterable, Iterator, Optional, Union
+
+from . import codec
+from .backend import PandocError, get_backend
+from .convert import _iter_simplified_sections
+from .lazy import _replace_file
+from .stats import count
+
+_CHUNK_SIZE = 1 << 16
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_decoder = json.JSONDecoder()
+
+
+class _JsonReader:
+    """Decode JSON values one at a time from a text stream"""
+
+    def __init__(self, stream: IO[str]):
+        self.stream = stream
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self, size: int = _CHUNK_SIZE) -> bool:
+        # Drop consumed text so the buffer only spans the current value
+        if self.pos:
+            self.buf = self.buf[self.pos:]
+            self.pos = 0
+        chunk = self.stream.read(size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf += chunk
+        return True
+
+    def peek(self) -> str:
+        """Next non-whitespace character, or "" at the end of the stream"""
+        while True:
+            self.pos = _WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, chars: str) -> str:
+        char = self.peek()
+        if not char or char not in chars:
+            raise ValueError(
+                f"Malformed pandoc JSON: expected {chars!r}, got {char!r}"
+            )
+        self.pos += 1
+        return char
+
+    def value(self):
+        self.peek()
+        size = _CHUNK_SIZE
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                end = None
+            # A value ending at the buffer end may be cut short (e.g. a
+            # number), so only trust it once more input has been seen
+            if end is not None and (end < len(self.buf) or self.eof):
+                self.pos = end
+                return value
+            if not self._fill(size):
+                if end is not None:
+                    self.pos = end
+                    return value
+                raise ValueError("Malformed or truncated pandoc JSON")
+            # Grow reads while one value spans many chunks, keeping the
+            # repeated decoding attempts linear overall
+            size *= 2
+
+
+def iter_pandoc_blocks(stream: IO[str]) -> Iterator[dict]:
+    """Yield the blocks of a pandoc JSON document read from a text stream"""
+    reader = _JsonReader(stream)
+    reader.expect("{")
+    if reader.peek() == "}":
+        return
+    while True:
+        key = reader.value()
+        reader.expect(":")
+        if key == "blocks":
+            reader.expect("[")
+            if reader.peek() == "]":
+                reader.pos += 1
+            else:
+                while True:
+                    yield reader.value()
+                    if reader.expect(",]") == "]":
+                        break
+        else:
+            reader.value()
+        if reader.expect(",}") == "}":
+            return
+
+
+def iter_sections(
+    markdown_file: str, dropped: Optional[list] = None
+) -> Iterator[dict]:
+    """
+    Yield the simplified sections of a markdown file one at a time
+
+    pandoc reads the file itself and its JSON output is decoded block by
+    block, so memory stays bounded by the largest section rather than
+    the document. If given, `dropped` collects the elements the
+    simplified schema cannot keep.
+
+    pandoc is the executable of the backend in use when this is called
+    (a Converter's own, inside its methods), not when iteration starts.
+    """
+    pandoc = getattr(get_backend(), "pandoc", "pandoc")
+    # An absolute path cannot be mistaken for a pandoc option
+    return _iter_sections(pandoc, os.path.abspath(markdown_file), dropped)
+
+
+def _iter_sections(
+    pandoc: str, path: str, dropped: Optional[list]
+) -> Iterator[dict]:
+    count("pandoc_calls")
+    with tempfile.TemporaryFile() as errors:
+        process = subprocess.Popen(
+            [pandoc, "-f", "markdown", "-t", "json", path],
+            stdout=subprocess.PIPE,
+            stderr=errors,
+        )
+        stdout = io.TextIOWrapper(process.stdout, encoding="utf-8")
+        try:
+            try:
+                blocks = iter_pandoc_blocks(stdout)
+                yield from _iter_simplified_sections(blocks, dropped)
+            except ValueError:
+                if process.wait() == 0:
+                    raise
+            if process.wait() != 0:
+                errors.seek(0)
+                raise PandocError(
+                    errors.read().decode("utf-8", "replace"),
+                    "markdown",
+                    "json",
+                )
+        finally:
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+            stdout.close()
+
+
+def write_sections(
+    f: IO[str], sections: Iterable[dict], indent: Union[int, str, None] = 2
+) -> int:
+    """
+    Write {"sections": [...]} to f one section at a time
+
+    The output is identical to codec.dumps({"sections": list(sections)},
+    indent), compact for indent=None. Returns the number of sections
+    written.
+    """
+    if indent is None:
+        newline = step = ""
+        colon = ":"
+    else:
+        step = indent if isinstance(indent, str) else " " * indent
+        newline = "\n"
+        colon = ": "
+    inner = newline + step * 2
+
+    n_sections = 0
+    for section in sections:
+        if n_sections:
+            f.write(",")
+        else:
+            f.write("{" + newline + step + '"sections"' + colon + "[")
+        f.write(inner + codec.dumps(section, indent).replace("\n", inner))
+        n_sections += 1
+    if n_sections:
+        f.write(newline + step + "]" + newline + "}")
+    else:
+        f.write(
+            "{" + newline + step + '"sections"' + colon + "[]" + newline + "}"
+        )
+    return n_sections
+
+
+def stream_md_to_json(
+    markdown_file: str,
+    output_file: str,
+    indent: Union[int, str, None] = 2,
+    dropped: Optional[list] = None,
+) -> int:
+    """
+    Convert a markdown file to simplified JSON in constant memory
+
+    The output is written to a temporary file that replaces output_file
+    once the conversion succeeds, so a pandoc failure leaves a previous
+    output intact. Returns the number of sections written.
+    """
+    sections = iter_sections(markdown_file, dropped)
+    written = []
+
+    def write(f):
+        written.append(write_sections(f, sections, indent))
+
+    _replace_file(output_file, write, "w")
+    return written[0]
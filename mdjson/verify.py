@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: "2026-10-18 13:20:51 (ywatanabe)"
+# File: /home/ywatanabe/proj/mdjson/mdjson/verify.py
+
+__file__ = "/home/ywatanabe/proj/mdjson/mdjson/verify.py"
+
+import random
+import re
+from collections import Counter
+from typing import NamedTuple, Optional, Tuple
+
+VERIFY_MODES = ("none", "full", "structural", "sample=N%")
+
+_SAMPLE = re.compile(r"sample=(\d+(?:\.\d+)?)%")
+
+
+class ReversibilityWarning(UserWarning):
+    """Issued by mdjson() when a conversion cannot be reversed exactly"""
+
+
+class VerificationResult(NamedTuple):
+    """
+    Outcome of a reversibility check
+
+    Attributes:
+        mode: Check that was performed ("full", "structural" or "none")
+        checked: False when the check was skipped (mode "none", a cache
+            hit, or a file left out of a sample)
+        reversible: True/False when checked, None otherwise
+        detail: Human readable explanation
+    """
+
+    mode: str
+    checked: bool
+    reversible: Optional[bool]
+    detail: str = ""
+
+
+def parse_verify(verify: str) -> Tuple[str, float]:
+    """Split a verification mode into (mode, sampled fraction)"""
+    if verify in ("none", "full", "structural"):
+        return verify, 1.0
+    match = _SAMPLE.fullmatch(verify)
+    if match is None or float(match.group(1)) > 100:
+        raise ValueError(
+            f"Unknown verification mode: {verify} "
+            f"(expected one of {', '.join(VERIFY_MODES)})"
+        )
+    return "full", float(match.group(1)) / 100
+
+
+def skipped(detail: str) -> VerificationResult:
+    return VerificationResult("none", False, None, detail)
+
+
+def sampled_out(fraction: float) -> bool:
+    return fraction < 1.0 and random.random() >= fraction
+
+
+def structural_result(dropped: list) -> VerificationResult:
+    """Summarise the pandoc elements the simplified schema could not keep"""
+    if not dropped:
+        return VerificationResult("structural", True, True)
+    counts = Counter(dropped)
+    detail = "dropped " + ", ".join(
+        f"{name} x{count}" if count > 1 else name
+        for name, count in sorted(counts.items())
+    )
+    return VerificationResult("structural", True, False, detail)
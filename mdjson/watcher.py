@@ -0,0 +1,401 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: "2026-10-19 07:15:36 (ywatanabe)"
+# File: /home/ywatanabe/proj/mdjson/mdjson/watcher.py
+
+__file__ = "/home/ywatanabe/proj/mdjson/mdjson/watcher.py"
+
+import ctypes
+import ctypes.util
+import errno
+import fnmatch
+import hashlib
+import os
+import select
+import struct
+import sys
+import time
+from typing import Iterator, List, NamedTuple, Optional, Set
+
+from .batch import ConversionResult, _convert_one, _output_path
+from .convert import FORMATS
+
+# inotify(7) constants
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ONLYDIR = 0x01000000
+_IN_ISDIR = 0x40000000
+_WATCH_MASK = (
+    _IN_CLOSE_WRITE
+    | _IN_MOVED_FROM
+    | _IN_MOVED_TO
+    | _IN_CREATE
+    | _IN_DELETE
+    | _IN_ONLYDIR
+)
+_EVENT = struct.Struct("iIII")
+
+
+class WatchEvent(NamedTuple):
+    """
+    One change applied to the output tree
+
+    action is "converted" (result holds the conversion outcome), "moved"
+    (the source was renamed; its output was renamed instead of converted
+    again) or "removed" (the source is gone; so is its output).
+    """
+
+    action: str
+    input_file: str
+    output_file: str
+    result: Optional[ConversionResult] = None
+
+
+class _InotifySource:
+    """Changed paths under a directory tree, reported by inotify"""
+
+    def __init__(self, root: str):
+        libc_name = ctypes.util.find_library("c")
+        if not sys.platform.startswith("linux") or libc_name is None:
+            raise OSError(errno.ENOSYS, "inotify is not available")
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self._fd = self._libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self._fd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error))
+        self._dirs = {}
+        try:
+            self._add_tree(root)
+        except OSError:
+            self.close()
+            raise
+
+    def _add_tree(self, top: str) -> None:
+        for dirpath, _, _ in os.walk(top):
+            wd = self._libc.inotify_add_watch(
+                self._fd, os.fsencode(dirpath), _WATCH_MASK
+            )
+            if wd < 0:
+                error = ctypes.get_errno()
+                # The directory may vanish while walking; anything else
+                # (e.g. ENOSPC, out of watches) means inotify cannot cover
+                # the tree
+                if error in (errno.ENOENT, errno.ENOTDIR):
+                    continue
+                raise OSError(error, os.strerror(error), dirpath)
+            self._dirs[wd] = dirpath
+
+    def _remove_tree(self, top: str) -> None:
+        prefix = top + os.sep
+        for wd, dirpath in list(self._dirs.items()):
+            if dirpath == top or dirpath.startswith(prefix):
+                self._libc.inotify_rm_watch(self._fd, wd)
+                del self._dirs[wd]
+
+    def wait(self, timeout: Optional[float]) -> Set[str]:
+        """
+        Block up to timeout seconds; return the paths that changed
+
+        Paths may be files or directories. If the kernel queue overflowed,
+        the watched root itself is returned so the whole tree is rescanned.
+        """
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return set()
+        changed = set()
+        while True:
+            try:
+                data = os.read(self._fd, 1 << 16)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = _EVENT.unpack_from(data, offset)
+                offset += _EVENT.size
+                name = data[offset : offset + length].rstrip(b"\0")
+                offset += length
+                if mask & _IN_Q_OVERFLOW:
+                    changed.update(self._dirs.values())
+                    continue
+                dirpath = self._dirs.get(wd)
+                if dirpath is None:
+                    continue
+                if mask & _IN_IGNORED:
+                    del self._dirs[wd]
+                    continue
+                path = os.path.join(dirpath, os.fsdecode(name))
+                if mask & _IN_ISDIR:
+                    if mask & (_IN_CREATE | _IN_MOVED_TO):
+                        self._add_tree(path)
+                    elif mask & _IN_MOVED_FROM:
+                        self._remove_tree(path)
+                elif mask & _IN_CREATE:
+                    # Content follows with IN_CLOSE_WRITE
+                    continue
+                changed.add(path)
+        return changed
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+class _PollingSource:
+    """Changed paths under a directory tree, found by rescanning it"""
+
+    def __init__(self, root: str, pattern: str, interval: float = 1.0):
+        self.root = root
+        self.pattern = pattern
+        self.interval = interval
+        self._snapshot = self._scan()
+        self._next_scan = time.monotonic() + interval
+
+    def _scan(self) -> dict:
+        snapshot = {}
+        for path in _walk(self.root, self.pattern):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def wait(self, timeout: Optional[float]) -> Set[str]:
+        now = time.monotonic()
+        if timeout is not None and now + timeout < self._next_scan:
+            time.sleep(timeout)
+            return set()
+        time.sleep(max(0.0, self._next_scan - now))
+        self._next_scan = time.monotonic() + self.interval
+        snapshot = self._scan()
+        changed = {
+            path
+            for path in snapshot.keys() | self._snapshot.keys()
+            if snapshot.get(path) != self._snapshot.get(path)
+        }
+        self._snapshot = snapshot
+        return changed
+
+    def close(self) -> None:
+        pass
+
+
+def _walk(top: str, pattern: str) -> Iterator[str]:
+    for dirpath, dirnames, filenames in os.walk(top):
+        dirnames.sort()
+        for name in sorted(fnmatch.filter(filenames, pattern)):
+            yield os.path.join(dirpath, name)
+
+
+def _digest(path: str) -> Optional[str]:
+    try:
+        with open(path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except (FileNotFoundError, IsADirectoryError, NotADirectoryError):
+        return None
+
+
+class Watcher:
+    """
+    Keeps converted outputs of a directory tree in sync with its sources
+
+    Only sources whose content changed are converted again; renamed
+    sources have their outputs renamed, and deleted sources have their
+    outputs deleted. Conversions run in this process, so a warm pandoc
+    backend (see configure_backend) stays alive between events.
+
+    Args:
+        root: Directory to watch, recursively
+        output_dir: Mirror outputs under this directory instead of
+            writing them next to the sources
+        pattern: File name pattern of the sources
+        debounce: Quiet period in seconds that ends a burst of edits
+        poll_interval: Rescan the tree this often instead of using inotify
+            (used automatically when inotify is unavailable)
+        **options: Passed on to convert_file() (indent, verify, engine,
+            cache); check_reversible is accepted as in mdjson()
+    """
+
+    def __init__(
+        self,
+        root: str,
+        output_dir: Optional[str] = None,
+        pattern: str = "*.md",
+        debounce: float = 0.2,
+        poll_interval: Optional[float] = None,
+        **options,
+    ):
+        self.root = os.path.abspath(os.path.expanduser(root))
+        if not os.path.isdir(self.root):
+            raise NotADirectoryError(f"Not a directory: {root}")
+        self.output_dir = output_dir
+        self.pattern = pattern
+        self.debounce = debounce
+        self.options = options
+        self._digests = {}
+        self._source = None
+        if poll_interval is None:
+            try:
+                self._source = _InotifySource(self.root)
+            except OSError:
+                poll_interval = 1.0
+        if self._source is None:
+            self._source = _PollingSource(self.root, pattern, poll_interval)
+
+    @property
+    def polling(self) -> bool:
+        return isinstance(self._source, _PollingSource)
+
+    def _target(self, input_file: str) -> str:
+        output_file = _output_path(input_file, self.root, self.output_dir)
+        if output_file is None:
+            base, ext = os.path.splitext(input_file)
+            output_file = f"{base}.{FORMATS.get(ext.lstrip('.'), 'json')}"
+        return output_file
+
+    def sync(self) -> List[WatchEvent]:
+        """
+        Convert the sources whose output is missing or older
+
+        Also records every source's content hash, so later events only
+        convert files that really changed.
+        """
+        events = []
+        for path in _walk(self.root, self.pattern):
+            digest = _digest(path)
+            if digest is None:
+                continue
+            self._digests[path] = digest
+            output_file = self._target(path)
+            try:
+                stale = os.path.getmtime(output_file) < os.path.getmtime(path)
+            except OSError:
+                stale = True
+            if stale:
+                events.append(self._convert(path, output_file))
+        return events
+
+    def step(self, timeout: Optional[float] = None) -> List[WatchEvent]:
+        """
+        Wait up to timeout seconds for changes and apply them
+
+        A burst of changes is collected until nothing changes for
+        `debounce` seconds (or ten times that has passed), then handled
+        at once. Changes that need no work, such as outputs being written
+        or a save without edits, do not end the wait. Returns an empty
+        list if nothing needed doing.
+        """
+        end = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if end is None else end - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return []
+            paths = self._source.wait(remaining)
+            if not paths:
+                continue
+            deadline = time.monotonic() + 10 * self.debounce
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                more = self._source.wait(min(self.debounce, remaining))
+                if not more:
+                    break
+                paths |= more
+            events = self.apply(paths)
+            if events:
+                return events
+
+    def _expand(self, paths: Set[str]) -> List[str]:
+        """Sources affected by changes to these files or directories"""
+        sources = set()
+        for path in paths:
+            if os.path.isdir(path):
+                sources.update(_walk(path, self.pattern))
+            elif fnmatch.fnmatch(os.path.basename(path), self.pattern):
+                sources.add(path)
+            prefix = path + os.sep
+            sources.update(
+                known for known in self._digests if known.startswith(prefix)
+            )
+        return sorted(sources)
+
+    def apply(self, paths: Set[str]) -> List[WatchEvent]:
+        """Bring the outputs of the given changed paths up to date"""
+        events = []
+        changed = []
+        gone = {}
+        for path in self._expand(paths):
+            digest = _digest(path)
+            if digest is None:
+                if path in self._digests:
+                    gone[path] = self._digests.pop(path)
+            elif digest != self._digests.get(path) or not os.path.exists(
+                self._target(path)
+            ):
+                changed.append((path, digest))
+
+        for path, digest in changed:
+            # A new source with the content of a vanished one was renamed
+            old_path = None
+            if path not in self._digests:
+                old_path = next(
+                    (old for old, d in gone.items() if d == digest), None
+                )
+            self._digests[path] = digest
+            output_file = self._target(path)
+            if old_path is not None and os.path.exists(self._target(old_path)):
+                del gone[old_path]
+                os.makedirs(os.path.dirname(output_file) or ".", exist_ok=True)
+                os.replace(self._target(old_path), output_file)
+                events.append(WatchEvent("moved", path, output_file))
+            else:
+                events.append(self._convert(path, output_file))
+
+        for path in gone:
+            output_file = self._target(path)
+            try:
+                os.remove(output_file)
+            except FileNotFoundError:
+                continue
+            events.append(WatchEvent("removed", path, output_file))
+        return events
+
+    def _convert(self, input_file: str, output_file: str) -> WatchEvent:
+        result = _convert_one(input_file, output_file, self.options)
+        return WatchEvent("converted", input_file, output_file, result)
+
+    def close(self) -> None:
+        self._source.close()
+
+    def __enter__(self) -> "Watcher":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def watch(root: str, **kwargs) -> Iterator[WatchEvent]:
+    """
+    Sync root once, then yield a WatchEvent for every change until closed
+
+    Example:
+        for event in watch("notes", output_dir="json"):
+            print(event.action, event.input_file)
+
+    Args:
+        root: Directory to watch, recursively
+        **kwargs: Passed on to Watcher
+    """
+    with Watcher(root, **kwargs) as watcher:
+        yield from watcher.sync()
+        while True:
+            yield from watcher.step()
@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
-# Time-stamp: "2025-01-01 19:27:02 (ywatanabe)"
+# Time-stamp: "2026-10-18 20:16:30 (ywatanabe)"
 # File: /home/ywatanabe/proj/mdjson/setup.py
 
 __file__ = "/home/ywatanabe/proj/mdjson/setup.py"
@@ -14,6 +14,9 @@ setup(
     install_requires=[
         "pandoc",
     ],
+    extras_require={
+        "fast": ["orjson"],
+    },
     python_requires=">=3.6",
     description="Convert between Markdown and simplified JSON format",
     author="Yusuke Watanabe",
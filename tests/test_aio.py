@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: "2026-10-19 09:26:31 (ywatanabe)"
+# File: /home/ywatanabe/proj/mdjson/tests/test_aio.py
+
+__file__ = "/home/ywatanabe/proj/mdjson/tests/test_aio.py"
+
+import asyncio
+import os
+import stat
+import tempfile
+import time
+import unittest
+import warnings
+
+from mdjson import aio
+from mdjson.aio import aconvert_text, ajson_to_md, amd_to_json, amdjson
+from mdjson.backend import (
+    PandocError,
+    PandocWarning,
+    PandocWorkerPool,
+    SubprocessBackend,
+    get_backend,
+    set_backend,
+)
+from mdjson.convert import _json_to_md, _md_to_json, convert_text, mdjson
+from mdjson.memo import SectionMemo, set_section_memo
+from mdjson.stats import collect_stats
+from mdjson.verify import ReversibilityWarning
+
+MARKDOWN = "# Section 1\n\nThis is content 1\n\n## Subsection 1.1\n\n- Item 1\n- Item 2\n"
+
+
+class TestAsyncConversion(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        aio.set_concurrency(aio.DEFAULT_CONCURRENCY)
+        self.tmpdir.cleanup()
+
+    async def test_matches_sync(self):
+        pandoc_json = await amd_to_json(text=MARKDOWN)
+        self.assertEqual(pandoc_json, _md_to_json(text=MARKDOWN))
+        self.assertEqual(await ajson_to_md(pandoc_json), _json_to_md(pandoc_json))
+
+    async def test_amdjson_matches_mdjson(self):
+        md_file = os.path.join(self.tmpdir.name, "doc.md")
+        with open(md_file, "w") as f:
+            f.write(MARKDOWN)
+        for engine in ("pandoc", "native"):
+            sync_file = os.path.join(self.tmpdir.name, f"sync_{engine}.json")
+            async_file = os.path.join(self.tmpdir.name, f"async_{engine}.json")
+            mdjson(md_file, sync_file, engine=engine)
+            self.assertEqual(await amdjson(md_file, async_file, engine=engine), 0)
+            with open(sync_file) as f, open(async_file) as g:
+                self.assertEqual(f.read(), g.read())
+
+    async def test_warns_when_not_reversible(self):
+        md_file = os.path.join(self.tmpdir.name, "doc.md")
+        with open(md_file, "w") as f:
+            f.write("# A\n\n*emphasis*\n")
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            await amdjson(md_file)
+        self.assertEqual([w.category for w in caught], [ReversibilityWarning])
+
+    async def test_many_in_flight(self):
+        aio.set_concurrency(4)
+        results = await asyncio.gather(
+            *(aconvert_text(f"# Doc {i}\n", "md", verify="none") for i in range(40))
+        )
+        for i, (output, result) in enumerate(results):
+            self.assertIn(f'"Doc {i}"', output)
+            self.assertFalse(result.checked)
+
+    async def test_pool_backend(self):
+        previous = get_backend()
+        set_backend(PandocWorkerPool(2))
+        try:
+            output, result = await aconvert_text(MARKDOWN, "md")
+        finally:
+            set_backend(previous)
+        self.assertTrue(result.reversible)
+        self.assertIn("Subsection", output)
+
+    async def test_same_pipeline_as_sync(self):
+        simplified = convert_text(MARKDOWN, "md")[0]
+        set_section_memo(SectionMemo())
+        self.addCleanup(set_section_memo, None)
+        with collect_stats() as stats:
+            output, result = await aconvert_text(simplified, "json", jobs=2)
+        self.assertEqual(output, MARKDOWN)
+        self.assertTrue(result.reversible)
+        self.assertEqual(stats.counters["section_memo_misses"], 1)
+        self.assertIn("verify", stats.summary()["stages"])
+        with collect_stats() as stats:
+            await aconvert_text(simplified, "json", verify="none")
+        self.assertEqual(stats.counters["section_memo_hits"], 1)
+        self.assertNotIn("pandoc_calls", stats.counters)
+
+    async def test_error(self):
+        with self.assertRaises(PandocError):
+            await ajson_to_md({"blocks": [{"t": "Nonsense"}]})
+
+    async def test_warning(self):
+        with self.assertWarns(PandocWarning):
+            await amd_to_json(text="[a]: x\n[a]: y\n\n[a]\n")
+
+    async def test_cancel_kills_pandoc(self):
+        pid_file = os.path.join(self.tmpdir.name, "pid")
+        script = os.path.join(self.tmpdir.name, "slow-pandoc")
+        with open(script, "w") as f:
+            f.write(f"#!/bin/sh\necho $$ > {pid_file}\nexec sleep 30\n")
+        os.chmod(script, stat.S_IRWXU)
+
+        previous = get_backend()
+        set_backend(SubprocessBackend(script))
+        try:
+            task = asyncio.ensure_future(amd_to_json(text=MARKDOWN))
+            while not os.path.exists(pid_file) or not os.path.getsize(pid_file):
+                await asyncio.sleep(0.01)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+        finally:
+            set_backend(previous)
+
+        with open(pid_file) as f:
+            pid = int(f.read())
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline:
+            try:
+                os.kill(pid, 0)
+            except ProcessLookupError:
+                break
+            await asyncio.sleep(0.01)
+        else:
+            self.fail("pandoc process was not killed")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: "2026-10-19 09:26:31 (ywatanabe)"
+# File: /home/ywatanabe/proj/mdjson/tests/test_backend.py
+
+__file__ = "/home/ywatanabe/proj/mdjson/tests/test_backend.py"
+
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from mdjson.backend import (
+    PandocError,
+    PandocWarning,
+    PandocWorkerPool,
+    SubprocessBackend,
+    get_backend,
+    set_backend,
+)
+from mdjson.convert import _json_to_md, _md_to_json, _simplified_to_pandoc_json
+
+
+class TestPandocBackends(unittest.TestCase):
+    def setUp(self):
+        self.sample_md = """# Section 1
+This is content 1
+
+## Subsection 1.1
+- Item 1
+- Item 2
+"""
+        self.pool = PandocWorkerPool(2)
+
+    def tearDown(self):
+        self.pool.close()
+
+    def test_pool_matches_subprocess(self):
+        subprocess_backend = SubprocessBackend()
+        for args in [
+            ("markdown", "json", False),
+            ("markdown", "markdown", True),
+        ]:
+            self.assertEqual(
+                self.pool.convert(self.sample_md, *args),
+                subprocess_backend.convert(self.sample_md, *args),
+            )
+
+    def test_pool_reuses_workers(self):
+        self.pool.convert(self.sample_md, "markdown", "json")
+        worker = self.pool._idle.queue[-1]
+        for _ in range(5):
+            self.pool.convert(self.sample_md, "markdown", "json")
+        self.assertIs(self.pool._idle.queue[-1], worker)
+        self.assertTrue(worker.alive)
+
+    def test_pool_concurrent_use(self):
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            outputs = list(
+                executor.map(
+                    lambda i: self.pool.convert(
+                        f"# Doc {i}\n", "markdown", "markdown", True
+                    ),
+                    range(32),
+                )
+            )
+        self.assertEqual(outputs, [f"# Doc {i}\n" for i in range(32)])
+        self.assertLessEqual(self.pool._idle.qsize(), 2)
+
+    def test_pool_error_keeps_worker(self):
+        with self.assertRaises(RuntimeError):
+            self.pool.convert("{not json", "json", "markdown")
+        self.assertEqual(
+            self.pool.convert("# Title\n", "markdown", "markdown"),
+            "# Title\n",
+        )
+
+    def test_closed_pool_rejects_work(self):
+        self.pool.close()
+        with self.assertRaises(RuntimeError):
+            self.pool.convert(self.sample_md, "markdown", "json")
+
+    def test_conversions_route_through_backend(self):
+        previous = get_backend()
+        set_backend(self.pool)
+        try:
+            markdown = _json_to_md(
+                _simplified_to_pandoc_json(
+                    {"sections": [{"title": "A", "content": ["b"]}]}
+                )
+            )
+        finally:
+            set_backend(previous)
+        self.assertEqual(markdown, "# A\n\nb\n")
+
+    def test_errors_carry_diagnostics(self):
+        bad = {"blocks": [{"t": "Nonsense"}]}
+        for backend in (SubprocessBackend(), self.pool):
+            previous = get_backend()
+            set_backend(backend)
+            try:
+                with self.assertRaises(PandocError) as cm:
+                    _json_to_md(bad)
+            finally:
+                set_backend(previous)
+            self.assertEqual(cm.exception.from_format, "json")
+            self.assertTrue(cm.exception.stderr)
+            self.assertIn("Nonsense", cm.exception.excerpt)
+        self.assertNotIn("pandoc-api-version", bad)
+
+    def test_subprocess_forwards_warnings(self):
+        duplicate = "[a]: x\n[a]: y\n\n[a]\n"
+        with self.assertWarns(PandocWarning) as cm:
+            SubprocessBackend().convert(duplicate, "markdown", "json")
+        self.assertIn("Duplicate link reference", str(cm.warning))
+
+    def test_md_to_json_accepts_text(self):
+        result = _md_to_json(text=self.sample_md)
+        self.assertEqual(result["blocks"][0]["t"], "Header")
+
+
+if __name__ == "__main__":
+    unittest.main()
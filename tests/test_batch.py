@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: "2026-10-19 00:44:30 (ywatanabe)"
+# File: /home/ywatanabe/proj/mdjson/tests/test_batch.py
+
+__file__ = "/home/ywatanabe/proj/mdjson/tests/test_batch.py"
+
+import json
+import os
+import tempfile
+import unittest
+
+from mdjson import convert_many
+
+
+class TestConvertMany(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.root = self.tmpdir.name
+        os.makedirs(os.path.join(self.root, "notes", "sub"))
+        self.md_files = []
+        for i, rel in enumerate(["notes/a.md", "notes/b.md", "notes/sub/c.md"]):
+            path = os.path.join(self.root, rel)
+            with open(path, "w") as f:
+                f.write(f"# Note {i}\n\nBody {i}\n")
+            self.md_files.append(path)
+        with open(os.path.join(self.root, "notes", "skip.txt"), "w") as f:
+            f.write("not markdown")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _run(self, inputs, **kwargs):
+        kwargs.setdefault("check_reversible", False)
+        return sorted(convert_many(inputs, **kwargs))
+
+    def test_directory_in_process(self):
+        results = self._run([os.path.join(self.root, "notes")], jobs=1)
+        self.assertEqual([r.input_file for r in results], sorted(self.md_files))
+        self.assertTrue(all(r.ok for r in results))
+        with open(os.path.join(self.root, "notes", "sub", "c.json")) as f:
+            self.assertEqual(json.load(f)["sections"][0]["title"], "Note 2")
+
+    def test_process_pool_with_output_dir(self):
+        out_dir = os.path.join(self.root, "mirror")
+        results = self._run(
+            [os.path.join(self.root, "notes")], jobs=2, output_dir=out_dir
+        )
+        self.assertTrue(all(r.ok for r in results))
+        self.assertTrue(
+            os.path.exists(os.path.join(out_dir, "sub", "c.json"))
+        )
+        self.assertEqual(len(results), 3)
+
+    def test_glob_and_failures_are_per_file(self):
+        missing = os.path.join(self.root, "missing.md")
+        bad = os.path.join(self.root, "notes", "skip.txt")
+        results = self._run(
+            [os.path.join(self.root, "notes", "*.md"), missing, bad], jobs=2
+        )
+        by_input = {r.input_file: r for r in results}
+        self.assertEqual(len(results), 4)
+        self.assertTrue(by_input[self.md_files[0]].ok)
+        self.assertIn("FileNotFoundError", by_input[missing].error)
+        self.assertIn("ValueError", by_input[bad].error)
+
+    def test_batches_match_single_files(self):
+        notes = os.path.join(self.root, "notes")
+        missing = os.path.join(self.root, "missing.md")
+        expected = {}
+        single = os.path.join(self.root, "single")
+        for r in self._run([notes], jobs=1, output_dir=single):
+            with open(r.output_file) as f:
+                expected[r.input_file] = f.read()
+        for jobs in (1, 2):
+            with self.subTest(jobs=jobs):
+                out_dir = os.path.join(self.root, f"batched{jobs}")
+                results = self._run(
+                    [notes, missing],
+                    jobs=jobs,
+                    output_dir=out_dir,
+                    batch_size=2,
+                    verify="full",
+                )
+                by_input = {r.input_file: r for r in results}
+                self.assertIn("FileNotFoundError", by_input.pop(missing).error)
+                for input_file, r in by_input.items():
+                    self.assertIs(r.verification.reversible, True)
+                    with open(r.output_file) as f:
+                        self.assertEqual(f.read(), expected[input_file])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: "2026-10-19 07:27:30 (ywatanabe)"
+# File: /home/ywatanabe/proj/mdjson/tests/test_cache.py
+
+__file__ = "/home/ywatanabe/proj/mdjson/tests/test_cache.py"
+
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from mdjson.backend import SubprocessBackend, get_backend, set_backend
+from mdjson.cache import ConversionCache
+from mdjson.convert import mdjson
+
+
+class CountingBackend(SubprocessBackend):
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    def convert(self, *args, **kwargs):
+        self.calls += 1
+        return super().convert(*args, **kwargs)
+
+
+class TestConversionCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.md_file = os.path.join(self.tmpdir.name, "doc.md")
+        with open(self.md_file, "w") as f:
+            f.write("# Section 1\n\nThis is content 1\n")
+        self.cache = ConversionCache(os.path.join(self.tmpdir.name, "c.db"))
+        self.previous = get_backend()
+        self.backend = CountingBackend()
+        set_backend(self.backend)
+
+    def tearDown(self):
+        set_backend(self.previous)
+        self.cache.close()
+        self.tmpdir.cleanup()
+
+    def test_hit_skips_pandoc(self):
+        mdjson(self.md_file, cache=self.cache)
+        self.assertEqual(self.backend.calls, 2)
+        json_file = os.path.join(self.tmpdir.name, "doc.json")
+        with open(json_file) as f:
+            first = f.read()
+        os.remove(json_file)
+
+        mdjson(self.md_file, cache=self.cache)
+        self.assertEqual(self.backend.calls, 2)
+        with open(json_file) as f:
+            self.assertEqual(f.read(), first)
+
+    def test_changed_content_misses(self):
+        mdjson(self.md_file, check_reversible=False, cache=self.cache)
+        with open(self.md_file, "a") as f:
+            f.write("\nMore\n")
+        mdjson(self.md_file, check_reversible=False, cache=self.cache)
+        self.assertEqual(self.backend.calls, 2)
+        with open(os.path.join(self.tmpdir.name, "doc.json")) as f:
+            content = json.load(f)["sections"][0]["content"]
+        self.assertEqual(content, ["This is content 1", "More"])
+
+    def test_direction_is_part_of_key(self):
+        self.assertNotEqual(
+            self.cache.key(b"same", "md2json"), self.cache.key(b"same", "json2md")
+        )
+
+    def test_schema_version_is_part_of_key(self):
+        key = self.cache.key(b"same", "md2json")
+        with mock.patch("mdjson.cache.SCHEMA_VERSION", 0):
+            self.assertNotEqual(self.cache.key(b"same", "md2json"), key)
+
+    def test_pandoc_version_is_stored(self):
+        key = self.cache.key(b"same", "md2json")
+        reopened = ConversionCache(self.cache.path)
+        with mock.patch("mdjson.cache.pandoc_version") as probe:
+            self.assertEqual(reopened.key(b"same", "md2json"), key)
+        probe.assert_not_called()
+        reopened.close()
+
+    def test_lru_eviction(self):
+        cache = ConversionCache(
+            os.path.join(self.tmpdir.name, "small.db"), max_bytes=100
+        )
+        for i in range(10):
+            cache.put(f"k{i}", "x" * 30)
+        cache.get("k7")
+        cache.put("k10", "x" * 30)
+        self.assertLessEqual(len(cache), 3)
+        self.assertIsNotNone(cache.get("k7"))
+        self.assertIsNone(cache.get("k0"))
+        cache.close()
+
+        # The size bound is stored with the database
+        reopened = ConversionCache(os.path.join(self.tmpdir.name, "small.db"))
+        self.assertEqual(reopened.max_bytes, 100)
+        reopened.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
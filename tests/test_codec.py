@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: "2026-10-18 20:12:48 (ywatanabe)"
+# File: /home/ywatanabe/proj/mdjson/tests/test_codec.py
+
+__file__ = "/home/ywatanabe/proj/mdjson/tests/test_codec.py"
+
+import gc
+import json
+import unittest
+
+from mdjson import codec, convert_text
+
+DOCUMENT = {
+    "sections": [
+        {
+            "title": "This’ll be Θ \U0001f600 \x7f \"q\" \\ / \t",
+            "content": ["Text", ["a", "b"], []],
+            "subsections": [],
+        }
+    ],
+    "meta": {},
+    "pandoc-api-version": [1, 23, 1],
+}
+
+
+class TestCodecs(unittest.TestCase):
+    def tearDown(self):
+        codec.set_codec()
+
+    def codecs(self):
+        for name in codec.CODECS:
+            try:
+                yield name, codec.set_codec(name)
+            except ImportError:
+                continue
+
+    def test_output_matches_json_module(self):
+        for name, current in self.codecs():
+            for indent in (2, 4, "\t", 0):
+                with self.subTest(codec=name, indent=indent):
+                    self.assertEqual(
+                        current.dumps(DOCUMENT, indent),
+                        json.dumps(DOCUMENT, indent=indent),
+                    )
+            with self.subTest(codec=name, indent=None):
+                self.assertEqual(
+                    current.dumps(DOCUMENT, None),
+                    json.dumps(DOCUMENT, separators=(",", ":")),
+                )
+
+    def test_round_trip(self):
+        text = json.dumps(DOCUMENT)
+        for name, current in self.codecs():
+            with self.subTest(codec=name):
+                self.assertEqual(current.loads(text), DOCUMENT)
+                self.assertEqual(current.loads(text.encode("utf-8")), DOCUMENT)
+
+    def test_unsupported_values_fall_back(self):
+        for name, current in self.codecs():
+            for value in ({"big": 2**70}, ["\ud800"], {1: "non-string key"}):
+                with self.subTest(codec=name, value=value):
+                    self.assertEqual(
+                        current.dumps(value, 2), json.dumps(value, indent=2)
+                    )
+            with self.subTest(codec=name):
+                self.assertEqual(current.loads("[NaN, 1e999]")[1], float("inf"))
+                with self.assertRaises(ValueError):
+                    current.loads("{")
+
+    def test_large_inputs_keep_gc_setting(self):
+        text = json.dumps(["x" * 100] * 1000)
+        self.assertTrue(gc.isenabled())
+        codec.loads(text)
+        self.assertTrue(gc.isenabled())
+        gc.disable()
+        try:
+            codec.loads(text)
+            self.assertFalse(gc.isenabled())
+        finally:
+            gc.enable()
+
+    def test_unknown_codec(self):
+        with self.assertRaises(ValueError):
+            codec.set_codec("yaml")
+
+    def test_compact_output(self):
+        output, _ = convert_text("# A\n\nB\n", "md", indent=None, verify="none")
+        self.assertEqual(
+            output, '{"sections":[{"title":"A","content":["B"],"subsections":[]}]}'
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
-# Time-stamp: "2025-01-01 19:05:31 (ywatanabe)"
+# Time-stamp: "2026-10-19 02:05:12 (ywatanabe)"
 # File: /home/ywatanabe/proj/mdjson/tests/test_conversion.py
 
 __file__ = "/home/ywatanabe/proj/mdjson/tests/test_conversion.py"
@@ -16,6 +16,8 @@ from mdjson.convert import (
     _simplify_pandoc_json,
     _simplified_to_pandoc_json,
     _json_to_md,
+    _md_to_json,
+    _simplified_to_md,
     mdjson,
 )
 
@@ -248,5 +250,134 @@ This is content 2
             os.unlink(json_file.name)
             os.unlink(output_md)
 
+class TestInlineFlattening(unittest.TestCase):
+    def simplify(self, markdown, dropped=None):
+        pandoc_json = _md_to_json(text=markdown)
+        return _simplify_pandoc_json(pandoc_json, dropped)["sections"][0]
+
+    def test_single_spaces(self):
+        section = self.simplify("# Two  words\n\nwrapped\nline here\n")
+        self.assertEqual(section["title"], "Two words")
+        self.assertEqual(section["content"], ["wrapped line here"])
+
+    def test_formatting_keeps_text(self):
+        dropped = []
+        section = self.simplify(
+            "# A *b* **c**\n\n"
+            "Use `x = 1` with [the docs](http://x.org) and ***d***.\n\n"
+            "- a ~~b~~ \"q\"\n",
+            dropped,
+        )
+        self.assertEqual(section["title"], "A b c")
+        self.assertEqual(
+            section["content"],
+            ["Use x = 1 with the docs and d.", ['a b "q"']],
+        )
+        self.assertEqual(
+            sorted(dropped),
+            ["Code", "Emph", "Emph", "Link", "Quoted", "Strikeout", "Strong",
+             "Strong"],
+        )
+
+    def test_footnotes_and_raw_inlines_have_no_text(self):
+        section = self.simplify("# T\n\nText<br>[^1] end\n\n[^1]: Note\n")
+        self.assertEqual(section["content"], ["Text end"])
+
+    def test_list_items_without_text(self):
+        dropped = []
+        section = self.simplify("# T\n\n-\n-     code\n- item\n", dropped)
+        self.assertEqual(section["content"], [["", "", "item"]])
+        self.assertEqual(dropped, ["CodeBlock"])
+
+
+MANUAL_MD = """# Manual
+
+## Install
+
+1. one
+2. two
+
+### Linux
+
+```bash
+make install
+```
+
+#### Notes
+
+> quoted *text*
+>
+> - a
+
+### Mac
+
+| A | B |
+|:--|--:|
+| 1 | 2 |
+
+## Skip
+
+#### Deep
+
+3. x
+"""
+
+
+class TestSectionTree(unittest.TestCase):
+    def setUp(self):
+        self.dropped = []
+        self.simplified = _simplify_pandoc_json(
+            _md_to_json(text=MANUAL_MD), self.dropped
+        )
+
+    def test_nesting_and_blocks(self):
+        install, skip = self.simplified["sections"][0]["subsections"]
+        linux, mac = install["subsections"]
+        self.assertEqual(
+            install["content"], [{"type": "ordered_list", "items": ["one", "two"]}]
+        )
+        self.assertEqual(
+            linux["content"],
+            [{"type": "code", "text": "make install", "language": "bash"}],
+        )
+        self.assertEqual(
+            linux["subsections"][0]["content"],
+            [{"type": "quote", "content": ["quoted text", ["a"]]}],
+        )
+        self.assertEqual(
+            mac["content"],
+            [
+                {
+                    "type": "table",
+                    "header": ["A", "B"],
+                    "rows": [["1", "2"]],
+                    "align": ["left", "right"],
+                }
+            ],
+        )
+        self.assertNotIn("subsections", mac)
+        # A skipped level is recorded so the header comes back as it was
+        self.assertEqual(
+            skip["subsections"],
+            [
+                {
+                    "title": "Deep",
+                    "level": 4,
+                    "content": [
+                        {"type": "ordered_list", "items": ["x"], "start": 3}
+                    ],
+                }
+            ],
+        )
+        self.assertEqual(self.dropped, ["Emph"])
+
+    def test_round_trip(self):
+        markdown = _simplified_to_md(self.simplified)
+        self.assertIn("#### Deep", markdown)
+        self.assertEqual(
+            _simplify_pandoc_json(_md_to_json(text=markdown)), self.simplified
+        )
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: "2026-10-19 07:43:19 (ywatanabe)"
+# File: /home/ywatanabe/proj/mdjson/tests/test_converter.py
+
+__file__ = "/home/ywatanabe/proj/mdjson/tests/test_converter.py"
+
+import copy
+import json
+import os
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from mdjson import Converter, SectionMemo, convert_text, set_section_memo
+from mdjson.backend import get_backend
+
+TEXTS = [
+    f"# Note {i}\n\nBody *{i}*\n\n## Part\n\n- a\n- b {i}\n" for i in range(24)
+]
+
+
+class TestConverter(unittest.TestCase):
+    def setUp(self):
+        self.converter = Converter(pool_size=4, verify="structural")
+        self.addCleanup(self.converter.close)
+
+    def test_concurrent_use_matches_serial(self):
+        expected = [
+            convert_text(text, "md", verify="structural") for text in TEXTS
+        ]
+        with ThreadPoolExecutor(8) as executor:
+            results = list(
+                executor.map(
+                    lambda text: self.converter.convert_str(text, "md"), TEXTS
+                )
+            )
+        self.assertEqual(results, expected)
+
+    def test_shared_input_is_not_modified(self):
+        simplified = json.loads(convert_text(TEXTS[0], "md")[0])
+        original = copy.deepcopy(simplified)
+        with ThreadPoolExecutor(8) as executor:
+            markdowns = set(
+                executor.map(
+                    lambda _: self.converter.to_markdown(simplified), range(16)
+                )
+            )
+        self.assertEqual(simplified, original)
+        self.assertEqual(len(markdowns), 1)
+        self.assertEqual(
+            self.converter.to_simplified(markdowns.pop()), original
+        )
+
+    def test_converters_keep_their_own_backend(self):
+        broken = Converter(
+            pandoc=os.path.join(tempfile.gettempdir(), "no-pandoc")
+        )
+        self.assertEqual(broken.pandoc_version, "")
+
+        def convert(i):
+            converter = broken if i % 2 else self.converter
+            try:
+                simplified = converter.to_simplified(TEXTS[i])
+            except OSError:
+                return None
+            return simplified["sections"][0]["title"]
+
+        with ThreadPoolExecutor(8) as executor:
+            titles = list(executor.map(convert, range(len(TEXTS))))
+        self.assertEqual(
+            titles, [None if i % 2 else f"Note {i}" for i in range(len(TEXTS))]
+        )
+        self.assertIsNot(get_backend(), self.converter.backend)
+
+    def test_converters_keep_their_own_section_memo(self):
+        shared = SectionMemo()
+        set_section_memo(shared)
+        self.addCleanup(set_section_memo, None)
+        simplified = self.converter.to_simplified(TEXTS[0])
+        self.converter.to_markdown(simplified)
+        self.assertEqual(len(shared), 0)
+
+        memo = SectionMemo()
+        with Converter(section_memo=memo) as converter:
+            markdown = converter.to_markdown(simplified)
+        self.assertEqual((len(memo), memo.misses), (1, 1))
+        self.assertEqual(len(shared), 0)
+        self.assertEqual(self.converter.to_markdown(simplified), markdown)
+
+    def test_bytes_and_files(self):
+        output, result = self.converter.convert_bytes(TEXTS[0].encode(), "md")
+        self.assertIsInstance(output, bytes)
+        self.assertTrue(result.checked)
+        self.assertEqual(
+            self.converter.convert_bytes(output, "json")[0].decode(),
+            self.converter.convert_str(output.decode(), "json")[0],
+        )
+        with tempfile.TemporaryDirectory() as tmpdir:
+            md_file = os.path.join(tmpdir, "note.md")
+            with open(md_file, "w") as f:
+                f.write(TEXTS[0])
+            self.converter.convert_file(md_file)
+            with open(md_file[:-3] + ".json", "rb") as f:
+                self.assertEqual(f.read(), output)
+
+    def test_invalid_settings(self):
+        with self.assertRaises(ValueError):
+            Converter(engine="other")
+        with self.assertRaises(ValueError):
+            Converter(verify="sometimes")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: "2026-10-19 00:45:12 (ywatanabe)"
+# File: /home/ywatanabe/proj/mdjson/tests/test_corpus.py
+
+__file__ = "/home/ywatanabe/proj/mdjson/tests/test_corpus.py"
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from mdjson import CorpusReader, CorpusWriter, convert_to_corpus
+
+DOCUMENTS = {
+    f"doc/{i}": {
+        "sections": [
+            {"title": f"Título {i}", "content": [f"Text {i}", ["a"]]}
+        ]
+    }
+    for i in range(5)
+}
+
+
+class TestCorpus(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.root = self.tmpdir.name
+        self.path = os.path.join(self.root, "corpus.jsonl")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def write(self):
+        with CorpusWriter(self.path) as writer:
+            for doc_id, document in DOCUMENTS.items():
+                writer.add(doc_id, document)
+
+    def test_round_trip(self):
+        self.write()
+        with CorpusReader(self.path) as corpus:
+            self.assertEqual(len(corpus), 5)
+            self.assertEqual(corpus.ids(), list(DOCUMENTS))
+            self.assertEqual(corpus["doc/3"], DOCUMENTS["doc/3"])
+            self.assertEqual(dict(corpus.items()), DOCUMENTS)
+            self.assertIn("doc/0", corpus)
+            self.assertIsNone(corpus.get("missing"))
+            with self.assertRaises(KeyError):
+                corpus["missing"]
+
+    def test_container_is_json_lines(self):
+        self.write()
+        with open(self.path) as f:
+            lines = [json.loads(line) for line in f]
+        self.assertEqual([line.pop("id") for line in lines], list(DOCUMENTS))
+        self.assertEqual(lines, list(DOCUMENTS.values()))
+
+    def test_stale_index_is_rebuilt(self):
+        self.write()
+        with open(self.path, "a") as f:
+            f.write('{"id":"extra","sections":[]}\n')
+        with CorpusReader(self.path) as corpus:
+            self.assertEqual(corpus["extra"], {"sections": []})
+            self.assertEqual(corpus["doc/4"], DOCUMENTS["doc/4"])
+        os.remove(self.path + ".idx")
+        with CorpusReader(self.path) as corpus:
+            self.assertEqual(len(corpus), 6)
+
+    def test_invalid_documents(self):
+        with CorpusWriter(self.path) as writer:
+            writer.add("a", {})
+            for doc_id, document in (("a", {}), ("b", []), ("c", {"id": 1})):
+                with self.subTest(doc_id=doc_id):
+                    with self.assertRaises(ValueError):
+                        writer.add(doc_id, document)
+        with CorpusReader(self.path) as corpus:
+            self.assertEqual(corpus["a"], {})
+
+    def test_convert_to_corpus(self):
+        notes = os.path.join(self.root, "notes")
+        os.makedirs(os.path.join(notes, "sub"))
+        for rel in ("a.md", "sub/b.md"):
+            with open(os.path.join(notes, rel), "w") as f:
+                f.write(f"# {rel}\n\nBody\n")
+        for jobs, batch_size in ((1, 1), (2, 1), (1, 2)):
+            with self.subTest(jobs=jobs, batch_size=batch_size):
+                results = list(
+                    convert_to_corpus(
+                        [notes], self.path, jobs=jobs, batch_size=batch_size
+                    )
+                )
+                self.assertTrue(all(r.ok for r in results))
+                with CorpusReader(self.path) as corpus:
+                    self.assertEqual(sorted(corpus.ids()), ["a", "sub/b"])
+                    section = corpus["sub/b"]["sections"][0]
+                    self.assertEqual(section["title"], "sub/b.md")
+
+    def test_cli(self):
+        notes = os.path.join(self.root, "notes")
+        os.makedirs(notes)
+        with open(os.path.join(notes, "a.md"), "w") as f:
+            f.write("# A\n\nBody\n")
+        with open(os.path.join(notes, "b.json"), "w") as f:
+            json.dump(DOCUMENTS["doc/0"], f)
+        proc = subprocess.run(
+            [sys.executable, "-m", "mdjson.cli", notes, "--pattern", "*",
+             "--corpus", self.path, "-j", "1"],
+            capture_output=True, text=True,
+        )
+        self.assertEqual(proc.returncode, 0, proc.stderr)
+        self.assertIn("Converted 2 of 2 files", proc.stderr)
+        with CorpusReader(self.path) as corpus:
+            self.assertEqual(corpus["b"], DOCUMENTS["doc/0"])
+            self.assertEqual(corpus["a"]["sections"][0]["content"], ["Body"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: "2026-10-19 09:21:15 (ywatanabe)"
+# File: /home/ywatanabe/proj/mdjson/tests/test_lazy.py
+
+__file__ = "/home/ywatanabe/proj/mdjson/tests/test_lazy.py"
+
+import json
+import os
+import tempfile
+import unittest
+
+from mdjson.convert import _simplified_to_md
+from mdjson.lazy import LazyDocument, _index_sections, update_section
+
+DOCUMENT = {
+    "sections": [
+        {
+            "title": f"Section {i}",
+            "content": [f"Text {i} with \"quotes\" and ü", ["a", "b"]],
+            "subsections": [{"title": "Sub", "content": ["x"]}],
+        }
+        for i in range(4)
+    ]
+}
+NEW_SECTION = {"title": "New", "content": ["Changed"], "subsections": []}
+
+
+class TestLazyDocument(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.json_file = os.path.join(self.tmpdir.name, "doc.json")
+        self.md_file = os.path.join(self.tmpdir.name, "doc.md")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def write(self, indent=2):
+        with open(self.json_file, "w") as f:
+            json.dump(DOCUMENT, f, indent=indent)
+        with open(self.md_file, "w") as f:
+            f.write(_simplified_to_md(DOCUMENT))
+
+    def expected(self, index, section):
+        sections = list(DOCUMENT["sections"])
+        sections[index] = section
+        return {"sections": sections}
+
+    def test_sections_are_read_on_demand(self):
+        self.write()
+        with LazyDocument(self.json_file) as doc:
+            self.assertEqual(len(doc), 4)
+            self.assertEqual(doc[2], DOCUMENT["sections"][2])
+            self.assertEqual(doc[-1], DOCUMENT["sections"][-1])
+            self.assertEqual(list(doc), DOCUMENT["sections"])
+            with self.assertRaises(IndexError):
+                doc[4]
+
+    def test_replace_keeps_formatting(self):
+        for indent in (2, 4, None, "\t"):
+            with self.subTest(indent=indent):
+                self.write(indent)
+                with LazyDocument(self.json_file) as doc:
+                    doc[1] = NEW_SECTION
+                    self.assertEqual(doc[1], NEW_SECTION)
+                    self.assertEqual(doc[2], DOCUMENT["sections"][2])
+                    doc[2] = NEW_SECTION
+                with open(self.json_file) as f:
+                    expected = self.expected(1, NEW_SECTION)
+                    expected["sections"][2] = NEW_SECTION
+                    self.assertEqual(f.read(), json.dumps(expected, indent=indent))
+
+    def test_update_section_splices_markdown(self):
+        self.write()
+        update_section(self.json_file, 1, NEW_SECTION, self.md_file)
+        expected = self.expected(1, NEW_SECTION)
+        with open(self.json_file) as f:
+            self.assertEqual(json.load(f), expected)
+        with open(self.md_file) as f:
+            self.assertEqual(f.read(), _simplified_to_md(expected))
+
+    def test_update_section_from_markdown(self):
+        self.write()
+        section = update_section(
+            self.json_file, -1, "# Last\n\nEdited *text*\n", self.md_file
+        )
+        self.assertEqual(section["content"], ["Edited text"])
+        expected = self.expected(-1, section)
+        with open(self.md_file) as f:
+            self.assertEqual(f.read(), _simplified_to_md(expected))
+        with self.assertRaises(ValueError):
+            update_section(self.json_file, 0, "# One\n\n# Two\n")
+
+    def test_mismatched_markdown_is_rejected(self):
+        self.write()
+        with open(self.md_file, "a") as f:
+            f.write("\n# Extra\n")
+        with self.assertRaises(ValueError):
+            update_section(self.json_file, 0, NEW_SECTION, self.md_file)
+
+    def test_hash_in_paragraph_is_not_a_section(self):
+        self.write()
+        with open(self.md_file) as f:
+            markdown = f.read()
+        # A wrapped line starting with "# " continues the paragraph
+        markdown = markdown.replace("Text 0 with", "Text 0\n# 1 with", 1)
+        with open(self.md_file, "w") as f:
+            f.write(markdown)
+        update_section(self.json_file, 2, NEW_SECTION, self.md_file)
+        with open(self.md_file) as f:
+            updated = f.read()
+        self.assertIn("Text 0\n# 1 with", updated)
+        self.assertIn("# New\n", updated)
+        self.assertNotIn("# Section 2\n", updated)
+
+    def test_index_errors(self):
+        self.assertEqual(_index_sections(b'{"sections": []}'), [])
+        for data in (b'{"sections": "x"}', b'{"sections": ["x"]}', b'{"sections": ['):
+            with self.subTest(data=data), self.assertRaises(ValueError):
+                _index_sections(data)
+
+
+if __name__ == "__main__":
+    unittest.main()
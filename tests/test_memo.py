@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: "2026-10-19 04:20:44 (ywatanabe)"
+# File: /home/ywatanabe/proj/mdjson/tests/test_memo.py
+
+__file__ = "/home/ywatanabe/proj/mdjson/tests/test_memo.py"
+
+import json
+import unittest
+
+from mdjson import SectionMemo, convert_text, convert_texts, set_section_memo
+from mdjson.convert import _simplified_to_md
+from mdjson.stats import collect_stats
+
+LICENSE = {
+    "title": "License",
+    "content": ["MIT, see LICENSE", ["Use", "Share"]],
+    "subsections": [
+        {"title": "Notice", "content": [{"type": "code", "text": "(c) 2026"}]}
+    ],
+}
+
+
+def document(i: int) -> dict:
+    return {
+        "sections": [
+            {
+                "title": f"Note {i}",
+                "content": [f"Body {i}"],
+                "subsections": [],
+            },
+            LICENSE,
+        ]
+    }
+
+
+class TestSectionMemo(unittest.TestCase):
+    def setUp(self):
+        self.memo = SectionMemo()
+        set_section_memo(self.memo)
+        self.addCleanup(set_section_memo, None)
+
+    def test_lru_bound(self):
+        memo = SectionMemo(max_bytes=10)
+        memo.put("a", "12345")
+        memo.put("b", "12345")
+        self.assertEqual(memo.get("a"), "12345")
+        memo.put("c", "1")
+        self.assertIsNone(memo.get("b"))
+        self.assertEqual((len(memo), memo.size), (2, 6))
+        self.assertEqual((memo.hits, memo.misses), (1, 1))
+        self.assertEqual(
+            SectionMemo.key({"title": "x", "content": []}),
+            SectionMemo.key(json.loads('{"title":"x","content":[]}')),
+        )
+
+    def test_matches_rendering_without_memo(self):
+        documents = [
+            document(1),
+            {
+                "sections": [
+                    LICENSE,
+                    {"title": "Deep", "level": 3, "content": []},
+                ]
+            },
+            # A level-1 subsection splits the rendered markdown unevenly
+            {
+                "sections": [
+                    {
+                        "title": "A",
+                        "content": ["a"],
+                        "subsections": [
+                            {"title": "B", "level": 1, "content": []}
+                        ],
+                    },
+                    LICENSE,
+                ]
+            },
+            {"sections": []},
+        ]
+        with_memo = [_simplified_to_md(doc) for doc in documents]
+        set_section_memo(None)
+        self.assertEqual(
+            with_memo, [_simplified_to_md(doc) for doc in documents]
+        )
+
+    def test_repeated_sections_render_once(self):
+        text = json.dumps(document(1))
+        first = convert_text(text, "json", verify="none")
+        with collect_stats() as stats:
+            second = convert_text(text, "json", verify="none")
+        self.assertEqual(second, first)
+        self.assertNotIn("pandoc_calls", stats.counters)
+        self.assertEqual(stats.counters["section_memo_hits"], 2)
+
+    def test_batch_renders_each_distinct_section_once(self):
+        texts = [json.dumps(document(i)) for i in range(4)]
+        with collect_stats() as stats:
+            results = convert_texts(texts, "json", verify="none")
+        self.assertEqual(stats.counters["pandoc_calls"], 1)
+        # Four notes and the license they share
+        self.assertEqual(len(self.memo), 5)
+        self.assertEqual(stats.counters["section_memo_misses"], 5)
+        set_section_memo(None)
+        self.assertEqual(
+            results,
+            [convert_text(text, "json", verify="none") for text in texts],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: "2026-10-19 02:09:40 (ywatanabe)"
+# File: /home/ywatanabe/proj/mdjson/tests/test_model.py
+
+__file__ = "/home/ywatanabe/proj/mdjson/tests/test_model.py"
+
+import json
+import unittest
+
+from mdjson.convert import _json_to_md, _run_pandoc
+from mdjson.model import (
+    BulletList,
+    CodeBlock,
+    Document,
+    Paragraph,
+    Section,
+    Table,
+)
+
+SIMPLIFIED = {
+    "sections": [
+        {
+            "title": "Section  1",
+            "content": ["Text with \"quotes\", \\\\ and ünïcode", ["a", "b  c"]],
+            "subsections": [
+                {"title": "Sub", "content": [["x"], "y", []]},
+            ],
+        },
+        {"title": "No subsections key", "content": [""]},
+    ]
+}
+
+DEEP = {
+    "sections": [
+        {
+            "title": "Top",
+            "content": [{"type": "code", "text": "x = 1"}],
+            "subsections": [
+                {
+                    "title": "Two",
+                    "content": [
+                        {"type": "quote", "content": ["q", ["a"]]},
+                        {"type": "ordered_list", "items": ["i"], "start": 2},
+                    ],
+                    "subsections": [
+                        {
+                            "title": "Four",
+                            "level": 4,
+                            "content": [
+                                {
+                                    "type": "table",
+                                    "header": ["h"],
+                                    "rows": [["1", "2"]],
+                                }
+                            ],
+                        }
+                    ],
+                },
+                {"title": "Two again", "content": []},
+            ],
+        }
+    ]
+}
+
+
+class TestDocumentModel(unittest.TestCase):
+    def setUp(self):
+        self.document = Document.from_simplified(SIMPLIFIED)
+
+    def test_structure(self):
+        first = self.document.sections[0]
+        self.assertEqual(first.content[1], BulletList(["a", "b  c"]))
+        self.assertEqual(first.subsections[0].subsections, None)
+        self.assertIsNone(self.document.sections[1].subsections)
+        self.assertEqual(
+            Section("T", [Paragraph("p")]), Section("T", [Paragraph("p")])
+        )
+        self.assertNotEqual(Paragraph("p"), BulletList(["p"]))
+        self.assertFalse(hasattr(Paragraph("p"), "__dict__"))
+
+    def test_simplified_round_trip(self):
+        self.assertEqual(self.document.to_simplified(), SIMPLIFIED)
+
+    def test_pandoc_json_text_matches_dicts(self):
+        expected = self.document.to_pandoc_json()
+        expected["pandoc-api-version"] = [1, 23, 1]
+        self.assertEqual(json.loads(self.document.pandoc_json_text()), expected)
+
+    def test_pandoc_accepts_text(self):
+        self.assertEqual(
+            _run_pandoc(
+                self.document.pandoc_json_text(), "json", "markdown", True
+            ),
+            _json_to_md(self.document.to_pandoc_json()),
+        )
+
+    def test_deep_sections_and_blocks(self):
+        document = Document.from_simplified(DEEP)
+        top = document.sections[0]
+        self.assertEqual(top.content, [CodeBlock("x = 1")])
+        self.assertIsInstance(
+            top.subsections[0].subsections[0].content[0], Table
+        )
+        self.assertEqual(
+            [
+                (level, title)
+                for level, title, _ in document.iter_headed_content()
+            ],
+            [(1, "Top"), (2, "Two"), (4, "Four"), (2, "Two again")],
+        )
+        self.assertEqual(document.to_simplified(), DEEP)
+        expected = document.to_pandoc_json()
+        expected["pandoc-api-version"] = [1, 23, 1]
+        self.assertEqual(json.loads(document.pandoc_json_text()), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
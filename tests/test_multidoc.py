@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: "2026-10-19 00:52:37 (ywatanabe)"
+# File: /home/ywatanabe/proj/mdjson/tests/test_multidoc.py
+
+__file__ = "/home/ywatanabe/proj/mdjson/tests/test_multidoc.py"
+
+import unittest
+
+from mdjson import collect_stats, convert_text, convert_texts
+
+NOTES = [
+    f"# Note {i}\n\nBody {i}\n\n## Part\n\n- a\n- b {i}\n"
+    for i in range(6)
+]
+
+# Documents that would change each other if pandoc saw them as one input
+NEIGHBOURS = [
+    "# Title\n\nText\n",
+    "# Refs\n\nSee [Title] and [x] and a note[^1]\n",
+    "[x]: http://example.com\n\n[^1]: Footnote\n",
+    "# Fence\n\n```\nnever closed\n",
+    "# After the fence\n\nText\n",
+    "<div>\nnever closed\n",
+    "::: note\nnever closed\n",
+    ":   a definition for the previous paragraph\n",
+    "% Title block\n\n# Body\n",
+    "# Examples\n\n(@) first example\n",
+    "# More\n\n(@) second example\n",
+    "# Last\n\nno final newline",
+    "",
+]
+
+
+class TestConvertTexts(unittest.TestCase):
+    def assertMatchesSingle(self, texts, from_format, **options):
+        results = convert_texts(texts, from_format, **options)
+        for text, result in zip(texts, results):
+            with self.subTest(text=text, **options):
+                self.assertEqual(
+                    result, convert_text(text, from_format, **options)
+                )
+                self.assertNotIn("mdjsonboundary", result[0])
+        return results
+
+    def test_matches_single_conversions(self):
+        texts = NOTES + NEIGHBOURS
+        for verify in ("full", "structural"):
+            for engine in ("pandoc", "native"):
+                results = self.assertMatchesSingle(
+                    texts, "md", verify=verify, engine=engine
+                )
+                self.assertMatchesSingle(
+                    [output for output, _ in results],
+                    "json",
+                    verify=verify,
+                    engine=engine,
+                )
+
+    def test_boundaries_do_not_leak(self):
+        results = self.assertMatchesSingle(NEIGHBOURS, "md", verify="none")
+        self.assertIn('"See [Title] and [x] and a note[^1]"', results[1][0])
+        self.assertIn('"title": "After the fence"', results[4][0])
+
+    def test_one_pandoc_run_per_direction(self):
+        with collect_stats() as stats:
+            results = convert_texts(NOTES, "md", verify="full")
+        self.assertTrue(all(result.reversible for _, result in results))
+        self.assertEqual(stats.summary()["counters"]["pandoc_calls"], 2)
+
+        with collect_stats() as stats:
+            convert_texts([output for output, _ in results], "json")
+        self.assertEqual(stats.summary()["counters"]["pandoc_calls"], 2)
+
+    def test_swallowed_boundary(self):
+        texts = NOTES[:2] + ["<div>\nnever closed\n"] + NOTES[2:4]
+        with collect_stats() as stats:
+            results = convert_texts(texts, "md", verify="none")
+        for text, result in zip(texts, results):
+            self.assertEqual(result, convert_text(text, "md", verify="none"))
+        counters = stats.summary()["counters"]
+        # Joined run, the unclosed div alone, then the rest joined
+        self.assertEqual(counters["pandoc_calls"], 3)
+        self.assertEqual(counters["join_fallbacks"], 1)
+
+    def test_failures_are_per_document(self):
+        simplified = convert_text(NOTES[0], "md")[0]
+        results = convert_texts(
+            ["{", simplified, '{"sections": 1}', simplified], "json"
+        )
+        self.assertIsInstance(results[0], ValueError)
+        self.assertIsInstance(results[2], TypeError)
+        self.assertEqual(results[1][0], NOTES[0])
+        self.assertEqual(results[3][0], NOTES[0])
+        with self.assertRaises(ValueError):
+            convert_texts(NOTES, "html")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: "2026-10-18 17:26:31 (ywatanabe)"
+# File: /home/ywatanabe/proj/mdjson/tests/test_native.py
+
+__file__ = "/home/ywatanabe/proj/mdjson/tests/test_native.py"
+
+import json
+import os
+import tempfile
+import unittest
+
+from mdjson.convert import (
+    _json_to_md,
+    _pandoc_bullet,
+    _run_pandoc,
+    _simplified_to_pandoc_json,
+    _simplify_pandoc_json,
+    mdjson,
+)
+from mdjson.model import Document
+from mdjson.native import NativeUnsupported, _parse_markdown, _render_markdown
+
+# Documents the native engine must convert exactly like pandoc
+SUPPORTED = [
+    "",
+    "# Section 1\nThis is content 1\n\n## Subsection 1.1\n- Item 1\n- Item 2\n\n"
+    "# Section 2\nThis is content 2\n",
+    "Preamble text\n\n## Orphan subsection\n\nDropped\n\n# Kept\n\nText\n",
+    "# Title ##\n\n## C# notes #\n\nUse C# and F#\n",
+    "# A\n## B\n### C\nStill in B\n#### D\n\nMore B\n",
+    "# Lines\nfirst line  \nsecond   line\n# not a header\n",
+    "# Lists\n-   Pandoc style\n-   items\n\n- loose\n\n- list\n",
+    "# Lazy\n- item that\ncontinues here\n  and here\n- next\n\nAfter list\n",
+    "# Unicode\nThéta Θ ß 日本語 50% a+b x=y 10:30 end.\n",
+    "# CRLF\r\nWindows\r\nline endings\r\n\r\n- a\r\n",
+    "## Before any section\n- dropped\n\n# S\n- kept\n",
+]
+
+# Documents that must be handed over to pandoc
+UNSUPPORTED = [
+    "# Emphasis\nSome *emph* text\n",
+    "# Link\nSee [here](http://example.com)\n",
+    "# Quote\n> quoted\n",
+    "# Ordered\n1. one\n2. two\n",
+    "# Nested\n- a\n  - b\n",
+    "# Code\n\n    indented code\n",
+    "Setext\n======\n",
+    "# Smart\nIt's -- quite... smart\n",
+    "# Abbrev\nSee e.g. this\n",
+    "---\ntitle: yaml\n---\n",
+    "# Star\n* item\n",
+]
+
+
+# Simplified documents the native renderer must print exactly like pandoc
+RENDERABLE = [
+    {"sections": []},
+    {
+        "sections": [
+            {
+                "title": "Section  1",
+                "content": ["This  is  content  1"],
+                "subsections": [
+                    {"title": "Subsection 1.1", "content": [["Item 1", "Item 2"]]}
+                ],
+            },
+            {"title": "Section 2", "content": ["Text", ["a"], "More"]},
+        ]
+    },
+    {
+        "sections": [
+            {
+                "title": "C# and F# notes #1",
+                "content": [
+                    "Costs 50% more, e.g. 10:30 or a/b (really). Why? Yes!",
+                    ["-1 degrees", "#tag", "f(x) equals y"],
+                ],
+                "subsections": [],
+            }
+        ]
+    },
+]
+
+# Simplified documents whose markdown needs pandoc's escaping rules
+UNRENDERABLE = [
+    {"sections": [{"title": "Emph *x*", "content": []}]},
+    {"sections": [{"title": "T", "content": ["1. not a list"]}]},
+    {"sections": [{"title": "T", "content": ["# not a header"]}]},
+    {"sections": [{"title": "T", "content": [["a"], ["b"]]}]},
+    {"sections": [{"title": "T", "content": [""]}]},
+    {"sections": [{"title": "T", "content": ["It's quoted"]}]},
+]
+
+
+def _pandoc_simplified(markdown):
+    return _simplify_pandoc_json(
+        json.loads(_run_pandoc(markdown, "markdown", "json"))
+    )
+
+
+class TestNativeParser(unittest.TestCase):
+    def test_parity_with_pandoc(self):
+        for markdown in SUPPORTED:
+            with self.subTest(markdown=markdown):
+                self.assertEqual(
+                    _parse_markdown(markdown), _pandoc_simplified(markdown)
+                )
+
+    def test_unsupported_raises(self):
+        for markdown in UNSUPPORTED:
+            with self.subTest(markdown=markdown):
+                with self.assertRaises(NativeUnsupported):
+                    _parse_markdown(markdown)
+
+    def test_mdjson_falls_back_to_pandoc(self):
+        for markdown in SUPPORTED + UNSUPPORTED:
+            with self.subTest(markdown=markdown):
+                with tempfile.TemporaryDirectory() as tmpdir:
+                    md_file = os.path.join(tmpdir, "doc.md")
+                    with open(md_file, "w", encoding="utf-8") as f:
+                        f.write(markdown)
+                    mdjson(md_file, check_reversible=False, engine="native")
+                    with open(os.path.join(tmpdir, "doc.json")) as f:
+                        result = json.load(f)
+                self.assertEqual(result, _pandoc_simplified(markdown))
+
+    def test_render_parity_with_pandoc(self):
+        for simplified in RENDERABLE:
+            with self.subTest(simplified=simplified):
+                self.assertEqual(
+                    _render_markdown(
+                        Document.from_simplified(simplified), _pandoc_bullet()
+                    ),
+                    _json_to_md(_simplified_to_pandoc_json(simplified)),
+                )
+
+    def test_render_unsupported_raises(self):
+        for simplified in UNRENDERABLE:
+            with self.subTest(simplified=simplified):
+                with self.assertRaises(NativeUnsupported):
+                    _render_markdown(Document.from_simplified(simplified))
+
+    def test_mdjson_renders_natively(self):
+        for simplified in RENDERABLE + UNRENDERABLE:
+            with self.subTest(simplified=simplified):
+                with tempfile.TemporaryDirectory() as tmpdir:
+                    json_file = os.path.join(tmpdir, "doc.json")
+                    with open(json_file, "w") as f:
+                        json.dump(simplified, f)
+                    mdjson(json_file, check_reversible=False, engine="native")
+                    with open(os.path.join(tmpdir, "doc.md")) as f:
+                        result = f.read()
+                self.assertEqual(
+                    result, _json_to_md(_simplified_to_pandoc_json(simplified))
+                )
+
+    def test_unknown_engine(self):
+        with self.assertRaises(ValueError):
+            mdjson("doc.md", engine="fast")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: "2026-10-19 09:23:48 (ywatanabe)"
+# File: /home/ywatanabe/proj/mdjson/tests/test_service.py
+
+__file__ = "/home/ywatanabe/proj/mdjson/tests/test_service.py"
+
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+import mdjson
+from mdjson.backend import get_backend, set_backend
+from mdjson.multidoc import convert_texts
+from mdjson.service import ConversionService, Overloaded, make_server
+
+MARKDOWN = "# Title\n\nSome text\n"
+
+
+class UnixConnection(http.client.HTTPConnection):
+    def __init__(self, path):
+        super().__init__("localhost")
+        self.path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.path)
+
+
+class ServiceTestCase(unittest.TestCase):
+    def setUp(self):
+        self.previous = get_backend()
+
+    def tearDown(self):
+        set_backend(self.previous)
+
+
+class TestConversionService(ServiceTestCase):
+    def test_identical_requests_are_coalesced(self):
+        release = threading.Event()
+        calls = []
+
+        def blocking_convert(texts, *args):
+            calls.extend(texts)
+            release.wait(10)
+            return convert_texts(texts, *args)
+
+        with mock.patch("mdjson.service.convert_texts", blocking_convert):
+            with ConversionService(workers=1, max_batch=8) as service:
+                try:
+                    first = service.submit("md", "# Busy\n", verify="none")
+                    while not calls:
+                        release.wait(0.01)
+                    same = [
+                        service.submit("md", MARKDOWN, verify="none")
+                        for _ in range(3)
+                    ]
+                    other = service.submit("md", MARKDOWN, indent=None)
+                finally:
+                    release.set()
+                results = [f.result(10)[0] for f in [first] + same + [other]]
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(results[1], results[2])
+        self.assertEqual(json.loads(results[1]), json.loads(results[4]))
+        counters = service.stats.summary()["counters"]
+        self.assertEqual(counters["coalesced_requests"], 2)
+
+    def test_full_queue_is_refused(self):
+        release = threading.Event()
+        started = threading.Event()
+
+        def blocking_convert(texts, *args):
+            started.set()
+            release.wait(10)
+            return [("{}", None)] * len(texts)
+
+        with mock.patch("mdjson.service.convert_texts", blocking_convert):
+            with ConversionService(workers=1, queue_size=2) as service:
+                try:
+                    futures = [service.submit("md", "busy")]
+                    started.wait(10)
+                    futures += [service.submit("md", str(i)) for i in (1, 2)]
+                    with self.assertRaises(Overloaded):
+                        service.submit("md", "3")
+                finally:
+                    release.set()
+                for future in futures:
+                    future.result(10)
+        counters = service.stats.summary()["counters"]
+        self.assertEqual(counters["rejected_requests"], 1)
+
+    def test_invalid_options(self):
+        with ConversionService(workers=1) as service:
+            for options in ({"verify": "x"}, {"engine": "x"}, {"indent": -1}):
+                with self.subTest(options=options):
+                    with self.assertRaises(ValueError):
+                        service.submit("md", MARKDOWN, **options)
+            with self.assertRaises(ValueError):
+                service.submit("html", MARKDOWN)
+
+    def test_own_backend(self):
+        with ConversionService(workers=1, verify="none") as service:
+            self.assertIs(get_backend(), self.previous)
+            self.assertIsNot(service.backend, self.previous)
+            output, _ = service.convert("md", MARKDOWN, timeout=60)
+            self.assertIn('"sections"', output)
+        self.assertTrue(service.backend._closed)
+        self.assertIs(get_backend(), self.previous)
+
+
+class TestHttpServer(ServiceTestCase):
+    def setUp(self):
+        super().setUp()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.service = ConversionService(workers=2, verify="none")
+        self.service.start()
+        self.servers = []
+
+    def tearDown(self):
+        for server, thread in self.servers:
+            server.shutdown()
+            server.server_close()
+            thread.join()
+        self.service.close()
+        self.tmpdir.cleanup()
+        super().tearDown()
+
+    def serve(self, **kwargs):
+        server = make_server(self.service, port=0, **kwargs)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        self.servers.append((server, thread))
+        return server
+
+    def request(self, connection, method, path, body=None):
+        connection.request(method, path, body=body)
+        response = connection.getresponse()
+        return response, response.read().decode("utf-8")
+
+    def test_endpoints(self):
+        server = self.serve()
+        # BaseServer.timeout is handle_request()'s; keep it unset
+        self.assertIsNone(server.timeout)
+        self.assertEqual(server.request_timeout, 300)
+        connection = http.client.HTTPConnection(*server.server_address[:2])
+        response, body = self.request(connection, "POST", "/md2json", MARKDOWN)
+        self.assertEqual(response.status, 200)
+        self.assertEqual(json.loads(body)["sections"][0]["title"], "Title")
+
+        response, markdown = self.request(
+            connection, "POST", "/json2md?verify=full", body
+        )
+        self.assertEqual(response.status, 200)
+        self.assertEqual(response.getheader("X-Mdjson-Reversible"), "True")
+        self.assertEqual(markdown, MARKDOWN)
+
+        response, body = self.request(
+            connection, "POST", "/md2json?indent=none", MARKDOWN
+        )
+        self.assertNotIn("\n", body)
+
+        response, body = self.request(connection, "GET", "/health")
+        self.assertEqual(json.loads(body)["status"], "ok")
+        response, body = self.request(connection, "GET", "/metrics")
+        self.assertIn(
+            'mdjson_stage_seconds_count{stage="request_md2json"} 2', body
+        )
+        self.assertIn("mdjson_queue_depth 0", body)
+        connection.close()
+
+    def test_errors(self):
+        server = self.serve(max_body=1000)
+        connection = http.client.HTTPConnection(*server.server_address[:2])
+        for method, path, body, status in (
+            ("POST", "/json2md", "{", 400),
+            ("POST", "/json2md", '{"sections": 1}', 400),
+            ("POST", "/md2json?engine=x", MARKDOWN, 400),
+            ("GET", "/md2json", None, 405),
+            ("GET", "/nowhere", None, 404),
+            ("POST", "/md2json", "x" * 2000, 413),
+        ):
+            with self.subTest(path=path, body=body):
+                response, text = self.request(connection, method, path, body)
+                self.assertEqual(response.status, status)
+                self.assertIn("error", json.loads(text))
+                if response.getheader("Connection") == "close":
+                    connection.close()
+
+    def test_negative_content_length(self):
+        server = self.serve()
+        with socket.create_connection(server.server_address[:2]) as sock:
+            sock.settimeout(10)
+            sock.sendall(
+                b"POST /md2json HTTP/1.1\r\nHost: x\r\n"
+                b"Content-Length: -1\r\n\r\n"
+            )
+            response = b""
+            while True:
+                data = sock.recv(4096)
+                if not data:
+                    break
+                response += data
+        self.assertTrue(response.startswith(b"HTTP/1.1 400"), response)
+
+    def test_command_line(self):
+        # __file__ is pinned, so find the checkout through the package
+        root = os.path.dirname(mdjson.__path__[0])
+        env = dict(os.environ, PYTHONPATH=root)
+        for command in (["mdjson.cli", "serve"], ["mdjson.service"]):
+            with self.subTest(command=command):
+                process = subprocess.Popen(
+                    [sys.executable, "-m", *command, "--port", "0",
+                     "--workers", "1"],
+                    stderr=subprocess.PIPE, text=True, env=env,
+                )
+                try:
+                    line = process.stderr.readline()
+                    self.assertIn("Serving on http://", line)
+                    address = line.split("http://", 1)[1].split(";", 1)[0]
+                    connection = http.client.HTTPConnection(
+                        address, timeout=10
+                    )
+                    response, body = self.request(
+                        connection, "GET", "/health"
+                    )
+                    self.assertEqual(json.loads(body)["status"], "ok")
+                    connection.close()
+                finally:
+                    process.terminate()
+                    process.wait(timeout=10)
+                    process.stderr.close()
+
+    def test_unix_socket(self):
+        path = os.path.join(self.tmpdir.name, "mdjson.sock")
+        self.serve(unix_socket=path)
+        self.assertEqual(os.stat(path).st_mode & 0o777, 0o600)
+        connection = UnixConnection(path)
+        response, body = self.request(connection, "POST", "/md2json", MARKDOWN)
+        self.assertEqual(response.status, 200)
+        self.assertIn("Title", body)
+        connection.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
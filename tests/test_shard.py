@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: "2026-10-19 09:32:14 (ywatanabe)"
+# File: /home/ywatanabe/proj/mdjson/tests/test_shard.py
+
+__file__ = "/home/ywatanabe/proj/mdjson/tests/test_shard.py"
+
+import os
+import stat
+import tempfile
+import unittest
+from unittest import mock
+
+from mdjson import shard
+from mdjson.backend import PandocWorkerPool, _using_backend
+from mdjson.convert import convert_file, convert_text
+from mdjson.stats import collect_stats
+
+MARKDOWN = """Preamble *dropped*
+
+## Orphan
+
+# One
+
+Text of one
+
+```
+# not a header
+
+# still code
+```
+
+## Sub
+
+1. a
+2. b
+
+#hashtag is a paragraph
+
+# Two
+
+- x
+- y
+text [in brackets]
+# continues the paragraph
+
+# Three
+
+### Deep
+
+> quoted
+
+# Four
+
+| A | B |
+|---|---|
+| 1 | 2 |
+"""
+
+
+class TestSharding(unittest.TestCase):
+    def setUp(self):
+        # Shard even tiny documents
+        patcher = mock.patch.object(shard, "_MIN_SHARD_SIZE", 1)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_split_points(self):
+        starts = [
+            MARKDOWN[point:].split("\n", 1)[0]
+            for point in shard._split_points(MARKDOWN)
+        ]
+        self.assertEqual(starts, ["# One", "# Two", "# Three", "# Four"])
+        shards = shard._md_shards(MARKDOWN, 3)
+        self.assertEqual("".join(shards), MARKDOWN)
+        self.assertEqual(len(shards), 3)
+
+    def test_unsafe_markdown_is_not_split(self):
+        for extra in (
+            "[ref]\n\n[ref]: http://x.org\n",
+            "Note[^1]\n",
+            "See [Three]\n",
+            "<div>\n\n# Hidden\n\n</div>\n",
+            "::: note\n\n# Hidden\n\n:::\n",
+        ):
+            with self.subTest(extra=extra):
+                with collect_stats() as stats:
+                    shards = shard._md_shards(MARKDOWN + "\n" + extra, 4)
+                self.assertEqual(shards, [MARKDOWN + "\n" + extra])
+                self.assertEqual(stats.counters["shard_fallbacks"], 1)
+
+    def test_fence_closes_only_on_a_bare_fence(self):
+        markdown = (
+            "# Big\n\ntext\n\n"
+            "```\n```python\nx = 1\n\n# looks like a header\n\nmore\n```"
+            "\n\n~~~~\n~~~\n\n# still code\n~~~~\n\n# Tail\n\ntext\n"
+        )
+        starts = [
+            markdown[point:].split("\n", 1)[0]
+            for point in shard._split_points(markdown)
+        ]
+        self.assertEqual(starts, ["# Tail"])
+        simplified = convert_text(markdown, "md", verify="none", jobs=2)[0]
+        self.assertEqual(
+            simplified, convert_text(markdown, "md", verify="none")[0]
+        )
+
+    def test_matches_serial_conversion(self):
+        for verify in ("structural", "full"):
+            with self.subTest(verify=verify):
+                serial = convert_text(MARKDOWN, "md", verify=verify)
+                with collect_stats() as stats:
+                    sharded = convert_text(
+                        MARKDOWN, "md", verify=verify, jobs=3
+                    )
+                self.assertEqual(sharded, serial)
+                # The full check renders the sections back in shards too
+                self.assertEqual(
+                    stats.counters["shards"], 3 if verify == "structural" else 6
+                )
+                self.assertGreaterEqual(stats.counters["pandoc_calls"], 3)
+
+                simplified = serial[0]
+                self.assertEqual(
+                    convert_text(simplified, "json", verify=verify, jobs=3),
+                    convert_text(simplified, "json", verify=verify),
+                )
+
+    def test_workers_use_the_active_pandoc(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            log = os.path.join(tmpdir, "calls")
+            script = os.path.join(tmpdir, "logging-pandoc")
+            with open(script, "w") as f:
+                f.write(f'#!/bin/sh\necho "$1" >> {log}\nexec pandoc "$@"\n')
+            os.chmod(script, stat.S_IRWXU)
+            # Workers spawn the pool's pandoc per call, not its workers
+            with PandocWorkerPool(2, script) as pool, _using_backend(pool):
+                with collect_stats() as stats:
+                    convert_text(MARKDOWN, "md", verify="none", jobs=3)
+            with open(log) as f:
+                calls = f.read().split()
+        self.assertEqual(stats.counters["shards"], 3)
+        self.assertEqual(calls, ["-f"] * stats.counters["pandoc_calls"])
+
+    def test_small_documents_stay_in_process(self):
+        with mock.patch.object(shard, "_MIN_SHARD_SIZE", 1 << 16):
+            with collect_stats() as stats:
+                convert_text(MARKDOWN, "md", verify="none", jobs=4)
+        self.assertNotIn("shards", stats.counters)
+
+    def test_convert_file(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            md_file = os.path.join(tmpdir, "manual.md")
+            with open(md_file, "w") as f:
+                f.write(MARKDOWN)
+            serial_file = os.path.join(tmpdir, "serial.json")
+            convert_file(md_file, serial_file, verify="none")
+            convert_file(md_file, verify="none", jobs=2)
+            with open(serial_file) as f, open(md_file[:-3] + ".json") as g:
+                self.assertEqual(g.read(), f.read())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: "2026-10-19 09:29:05 (ywatanabe)"
+# File: /home/ywatanabe/proj/mdjson/tests/test_startup.py
+
+__file__ = "/home/ywatanabe/proj/mdjson/tests/test_startup.py"
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+
+import mdjson
+from mdjson import server
+from mdjson.backend import PandocWorkerPool, get_backend, set_backend
+from mdjson.memo import get_section_memo
+
+# The checkout, for subprocesses run outside it (__file__ is pinned)
+ROOT = os.path.dirname(mdjson.__path__[0])
+ENV = dict(os.environ, PYTHONPATH=ROOT)
+
+# Modules that only specific features need; none may load at startup
+HEAVY = (
+    "asyncio",
+    "concurrent.futures",
+    "ctypes",
+    "sqlite3",
+    "subprocess",
+    "tempfile",
+    "mdjson.convert",
+)
+
+
+def imported_modules(statement: str) -> set:
+    """Modules loaded by running statement in a fresh interpreter"""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True, text=True, check=True, env=ENV,
+    )
+    return {
+        line.rsplit("|", 1)[1].strip()
+        for line in proc.stderr.splitlines()
+        if line.startswith("import time:") and "|" in line
+    }
+
+
+class TestImportTime(unittest.TestCase):
+    def test_package_import_is_lazy(self):
+        modules = imported_modules("import mdjson")
+        self.assertEqual(
+            [name for name in HEAVY if name in modules], []
+        )
+
+    def test_cli_import_is_lazy(self):
+        modules = imported_modules("import mdjson.cli, mdjson.server")
+        self.assertEqual(
+            [name for name in HEAVY if name in modules], []
+        )
+
+    def test_aio_import_skips_the_cache(self):
+        self.assertNotIn("sqlite3", imported_modules("import mdjson.aio"))
+
+    def test_lazy_exports(self):
+        self.assertIn("convert_many", dir(mdjson))
+        self.assertIs(mdjson.convert_text, mdjson.convert.convert_text)
+        from mdjson.watcher import Watcher, watch
+
+        self.assertIs(mdjson.watch, watch)
+        self.assertIs(mdjson.Watcher, Watcher)
+        self.assertIs(mdjson.watcher.Watcher, Watcher)
+        with self.assertRaises(AttributeError):
+            mdjson.missing
+
+
+class TestServer(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.root = self.tmpdir.name
+        self.socket = os.path.join(self.root, "mdjson.sock")
+        self.daemon = subprocess.Popen(
+            [sys.executable, "-m", "mdjson.cli", "--serve", self.socket],
+            stderr=subprocess.PIPE,
+            text=True,
+            env=ENV,
+            cwd=self.root,
+        )
+        self.assertIn("Serving", self.daemon.stderr.readline())
+        deadline = time.monotonic() + 10
+        while not os.path.exists(self.socket):
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.01)
+
+    def tearDown(self):
+        self.daemon.terminate()
+        self.daemon.wait(timeout=10)
+        self.daemon.stderr.close()
+        self.tmpdir.cleanup()
+
+    def client(self, *args, stdin=""):
+        env = dict(ENV, MDJSON_SOCKET=self.socket)
+        return subprocess.run(
+            [sys.executable, "-m", "mdjson.cli", *args],
+            input=stdin, capture_output=True, text=True, env=env,
+            cwd=self.root,
+        )
+
+    def test_requests_run_in_the_daemon(self):
+        with open(os.path.join(self.root, "a.md"), "w") as f:
+            f.write("# A\n\nText\n")
+        proc = self.client("a.md", "--verify", "none")
+        self.assertEqual(proc.returncode, 0, proc.stderr)
+        self.assertTrue(os.path.exists(os.path.join(self.root, "a.json")))
+
+        proc = self.client("-", "--from", "md", "--compact", stdin="# B\n")
+        self.assertEqual(proc.returncode, 0, proc.stderr)
+        self.assertEqual(
+            proc.stdout,
+            '{"sections":[{"title":"B","content":[],"subsections":[]}]}\n',
+        )
+
+        proc = self.client("missing.md")
+        self.assertEqual(proc.returncode, 2)
+        self.assertIn("missing.md", proc.stderr)
+        proc = self.client(self.root, "--watch")
+        self.assertEqual(proc.returncode, 2)
+
+    def test_socket_is_private_and_removed(self):
+        self.assertEqual(os.stat(self.socket).st_mode & 0o777, 0o600)
+        self.daemon.terminate()
+        self.daemon.wait(timeout=10)
+        self.assertFalse(os.path.exists(self.socket))
+
+    def test_without_daemon_runs_locally(self):
+        self.daemon.terminate()
+        self.daemon.wait(timeout=10)
+        proc = self.client("-", "--from", "md", "--verify=none", stdin="# C\n")
+        self.assertEqual(proc.returncode, 0, proc.stderr)
+        self.assertIn('"C"', proc.stdout)
+
+
+class TestForwardedCalls(unittest.TestCase):
+    def setUp(self):
+        self.addCleanup(server._memos.clear)
+
+    def run_cli(self, *argv):
+        document = '{"sections": [{"title": "A", "content": ["a"]}]}'
+        status, stdout, stderr = server._run(
+            ["-", "--from", "json", "--verify", "none", *argv],
+            os.getcwd(),
+            document.encode("utf-8"),
+        )
+        self.assertEqual(status, 0, stderr)
+        return stdout
+
+    def test_settings_do_not_leak(self):
+        environment = {
+            name: os.environ.get(name) for name in server._ENVIRONMENT
+        }
+        self.run_cli("--section-memo", "1", "--json-codec", "json")
+        self.assertIsNone(get_section_memo())
+        self.assertEqual(
+            {name: os.environ.get(name) for name in server._ENVIRONMENT},
+            environment,
+        )
+        self.run_cli()
+        (memo,) = server._memos.values()
+        self.assertEqual((memo.hits, memo.misses), (0, 1))
+        self.run_cli("--section-memo", "1")
+        self.assertEqual((memo.hits, memo.misses), (1, 1))
+
+    def test_backend_is_kept(self):
+        previous = get_backend()
+        pool = PandocWorkerPool(1)
+        set_backend(pool)
+        self.addCleanup(set_backend, previous)
+        self.run_cli("--pool-size", "2")
+        self.assertIs(get_backend(), pool)
+        self.assertFalse(pool._closed)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: "2026-10-19 08:21:10 (ywatanabe)"
+# File: /home/ywatanabe/proj/mdjson/tests/test_stats.py
+
+__file__ = "/home/ywatanabe/proj/mdjson/tests/test_stats.py"
+
+import json
+import os
+import pickle
+import tempfile
+import unittest
+
+from mdjson.batch import convert_many
+from mdjson.cache import ConversionCache
+from mdjson.convert import convert_file
+from mdjson.stats import Stats, _percentile, collect_stats, observe
+
+MARKDOWN = "# Section 1\n\nThis is content 1\n\n- Item 1\n"
+
+
+class Recorder:
+    def __init__(self):
+        self.events = []
+
+    def record(self, stage, seconds, n_bytes):
+        self.events.append(("record", stage, n_bytes))
+
+    def count(self, name, n):
+        self.events.append(("count", name, n))
+
+
+class TestStats(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.md_file = os.path.join(self.tmpdir.name, "doc.md")
+        with open(self.md_file, "w") as f:
+            f.write(MARKDOWN)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_stages_and_counters(self):
+        with collect_stats() as stats:
+            convert_file(self.md_file)
+        summary = stats.summary()
+        for stage in ("read", "pandoc", "json_parse", "simplify", "verify", "write"):
+            self.assertIn(stage, summary["stages"])
+        self.assertEqual(summary["counters"]["pandoc_calls"], 2)
+        self.assertEqual(
+            summary["stages"]["read"]["bytes"], len(MARKDOWN.encode("utf-8"))
+        )
+
+        with collect_stats() as stats:
+            convert_file(self.md_file, verify="none")
+        self.assertEqual(stats.counters["pandoc_calls"], 1)
+        self.assertNotIn("verify", stats.samples)
+
+    def test_cache_counters(self):
+        cache = ConversionCache(os.path.join(self.tmpdir.name, "c.db"))
+        try:
+            with collect_stats() as stats:
+                convert_file(self.md_file, cache=cache)
+                convert_file(self.md_file, cache=cache)
+        finally:
+            cache.close()
+        self.assertEqual(stats.counters["cache_misses"], 1)
+        self.assertEqual(stats.counters["cache_hits"], 1)
+        self.assertEqual(stats.counters["pandoc_calls"], 2)
+
+    def test_custom_observer(self):
+        recorder = Recorder()
+        with observe(recorder):
+            convert_file(self.md_file, verify="none", engine="native")
+        stages = [event[1] for event in recorder.events if event[0] == "record"]
+        self.assertIn("native_parse", stages)
+        self.assertNotIn("pandoc", stages)
+
+        # Nothing is recorded once the block is left
+        n_events = len(recorder.events)
+        convert_file(self.md_file, verify="none")
+        self.assertEqual(len(recorder.events), n_events)
+
+    def test_batch_stats_from_workers(self):
+        aggregate = Stats()
+        for result in convert_many([self.tmpdir.name], jobs=2, with_stats=True):
+            aggregate.merge(pickle.loads(pickle.dumps(result.stats)))
+        self.assertEqual(aggregate.counters["pandoc_calls"], 2)
+
+    def test_formats(self):
+        stats = Stats()
+        for ms in range(1, 101):
+            stats.record("pandoc", ms / 1000, 10)
+        stats.count("pandoc_calls", 100)
+        summary = json.loads(stats.format("json"))
+        self.assertAlmostEqual(summary["stages"]["pandoc"]["p50_seconds"], 0.05)
+        self.assertAlmostEqual(summary["stages"]["pandoc"]["p95_seconds"], 0.095)
+        self.assertEqual(summary["stages"]["pandoc"]["bytes"], 1000)
+        text = stats.format("prometheus")
+        self.assertIn('mdjson_stage_seconds_count{stage="pandoc"} 100', text)
+        self.assertIn("mdjson_pandoc_calls_total 100", text)
+        self.assertIn("pandoc", stats.format("table"))
+        with self.assertRaises(ValueError):
+            stats.format("xml")
+
+    def test_percentile(self):
+        self.assertEqual(_percentile([], 50), 0.0)
+        self.assertEqual(_percentile([3.0], 95), 3.0)
+        self.assertEqual(_percentile([1.0, 2.0, 3.0, 4.0], 50), 2.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
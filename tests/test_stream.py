@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: "2026-10-19 09:29:05 (ywatanabe)"
+# File: /home/ywatanabe/proj/mdjson/tests/test_stream.py
+
+__file__ = "/home/ywatanabe/proj/mdjson/tests/test_stream.py"
+
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import tracemalloc
+import unittest
+
+from mdjson import Converter, codec
+from mdjson.backend import PandocError, SubprocessBackend, _using_backend, get_backend, set_backend
+from mdjson.convert import _md_to_json, _simplify_pandoc_json, convert_file, convert_text
+from mdjson.stream import iter_pandoc_blocks, iter_sections, write_sections
+
+MARKDOWN = "# Section 1\n\nThis is content 1\n\n- Item 1\n- Item 2\n"
+
+
+def run_cli(*args, stdin=""):
+    return subprocess.run(
+        [sys.executable, "-m", "mdjson.cli", *args],
+        input=stdin,
+        capture_output=True,
+        text=True,
+    )
+
+
+class TestConvertText(unittest.TestCase):
+    def test_round_trip(self):
+        output, result = convert_text(MARKDOWN, "md")
+        self.assertTrue(result.reversible)
+        markdown, result = convert_text(output, "json")
+        self.assertTrue(result.reversible)
+        self.assertEqual(convert_text(markdown, "md")[0], output)
+
+    def test_single_line_json(self):
+        output, _ = convert_text(MARKDOWN, "md", indent=None, verify="none")
+        self.assertNotIn("\n", output)
+
+    def test_unknown_format(self):
+        with self.assertRaises(ValueError):
+            convert_text(MARKDOWN, "html")
+
+
+class TestSingleFileCli(unittest.TestCase):
+    def test_pool_size(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            md_file = os.path.join(tmpdir, "doc.md")
+            with open(md_file, "w") as f:
+                f.write(MARKDOWN)
+            proc = run_cli(md_file, "--pool-size", "2")
+            self.assertEqual(proc.returncode, 0, proc.stderr)
+            with open(os.path.join(tmpdir, "doc.json")) as f:
+                self.assertEqual(json.load(f)["sections"][0]["title"], "Section 1")
+
+    def test_errors_are_reported(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            proc = run_cli(os.path.join(tmpdir, "missing.md"))
+        self.assertEqual(proc.returncode, 2)
+        self.assertIn("missing.md", proc.stderr)
+        self.assertNotIn("Traceback", proc.stderr)
+
+
+class TestStreamingCli(unittest.TestCase):
+    def test_stdin_to_stdout(self):
+        proc = run_cli("-", "--from", "md", stdin=MARKDOWN)
+        self.assertEqual(proc.returncode, 0, proc.stderr)
+        simplified = json.loads(proc.stdout)
+        self.assertEqual(simplified["sections"][0]["title"], "Section 1")
+
+        proc = run_cli("-", "--to", "md", stdin=proc.stdout)
+        self.assertEqual(proc.returncode, 0, proc.stderr)
+        self.assertIn("# Section 1", proc.stdout)
+
+    def test_stdin_requires_format(self):
+        proc = run_cli("-", stdin=MARKDOWN)
+        self.assertEqual(proc.returncode, 2)
+        self.assertIn("--from", proc.stderr)
+
+    def test_ndjson(self):
+        lines = [json.dumps(MARKDOWN), "", "not json", json.dumps("# B\n")]
+        proc = run_cli("-", "--ndjson", "--from", "md", stdin="\n".join(lines))
+        self.assertEqual(proc.returncode, 1)
+        outputs = [json.loads(line) for line in proc.stdout.splitlines()]
+        self.assertEqual(len(outputs), 3)
+        self.assertEqual(len(outputs[0]["sections"][0]["content"]), 2)
+        self.assertIn("error", outputs[1])
+        self.assertEqual(outputs[2]["sections"][0]["title"], "B")
+        self.assertIn("-:3:", proc.stderr)
+
+        proc = run_cli(
+            "-", "--ndjson", "--from", "json", stdin=json.dumps(outputs[0])
+        )
+        self.assertEqual(proc.returncode, 0, proc.stderr)
+        self.assertIn("- Item 2", json.loads(proc.stdout))
+
+
+def _document(n_sections):
+    return "\n".join(
+        f"# Section {i}\n\nParagraph {i} with *emphasis*\n\n"
+        f"## Sub {i}\n\n- one\n- two\n\n### Deep {i}\n"
+        for i in range(n_sections)
+    )
+
+
+class TestIncrementalConversion(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.md_file = os.path.join(self.tmpdir.name, "doc.md")
+        with open(self.md_file, "w") as f:
+            f.write("Preamble\n\n" + _document(50))
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_block_reader(self):
+        pandoc_json = _md_to_json(self.md_file)
+        for indent in (None, 1):
+            text = json.dumps(pandoc_json, indent=indent)
+            self.assertEqual(
+                list(iter_pandoc_blocks(io.StringIO(text))),
+                pandoc_json["blocks"],
+            )
+        self.assertEqual(list(iter_pandoc_blocks(io.StringIO("{}"))), [])
+        with self.assertRaises(ValueError):
+            list(iter_pandoc_blocks(io.StringIO('{"blocks": [{"t": 1}')))
+
+    def test_sections_match_simplify(self):
+        dropped, expected_dropped = [], []
+        sections = list(iter_sections(self.md_file, dropped))
+        expected = _simplify_pandoc_json(
+            _md_to_json(self.md_file), expected_dropped
+        )
+        self.assertEqual({"sections": sections}, expected)
+        self.assertEqual(dropped, expected_dropped)
+
+    def test_writer_matches_codec(self):
+        sections = _simplify_pandoc_json(_md_to_json(self.md_file))["sections"]
+        for subset in ([], sections[:1], sections):
+            for indent in (None, 0, 2, 4):
+                f = io.StringIO()
+                self.assertEqual(write_sections(f, subset, indent), len(subset))
+                self.assertEqual(
+                    f.getvalue(), codec.dumps({"sections": subset}, indent)
+                )
+
+    def test_convert_file_stream(self):
+        expected_file = os.path.join(self.tmpdir.name, "expected.json")
+        convert_file(self.md_file, expected_file, verify="none")
+        result = convert_file(self.md_file, stream=True)
+        self.assertEqual(result.mode, "structural")
+        self.assertFalse(result.reversible)
+        self.assertIn("Emph x50", result.detail)
+        self.assertNotIn("Header3", result.detail)
+        with open(expected_file) as f, open(self.md_file[:-3] + ".json") as g:
+            self.assertEqual(f.read(), g.read())
+        with self.assertRaises(ValueError):
+            convert_file(self.md_file, stream=True, cache=":memory:")
+
+    def test_pandoc_failure(self):
+        json_file = os.path.join(self.tmpdir.name, "doc.json")
+        with open(json_file, "w") as f:
+            f.write("previous output")
+        previous = get_backend()
+        set_backend(SubprocessBackend("false"))
+        try:
+            with self.assertRaises(PandocError):
+                list(iter_sections(self.md_file))
+            with self.assertRaises(PandocError):
+                convert_file(self.md_file, json_file, stream=True)
+        finally:
+            set_backend(previous)
+        with open(json_file) as f:
+            self.assertEqual(f.read(), "previous output")
+        self.assertEqual(sorted(os.listdir(self.tmpdir.name)), ["doc.json", "doc.md"])
+
+    def test_converter_backend(self):
+        broken = Converter(pandoc=os.path.join(self.tmpdir.name, "no-pandoc"))
+        with self.assertRaises(OSError):
+            broken.convert_file(self.md_file, stream=True)
+        self.assertFalse(os.path.exists(self.md_file[:-3] + ".json"))
+        with _using_backend(broken.backend):
+            sections = iter_sections(self.md_file)
+        # The backend is the one in use when iter_sections() was called
+        with self.assertRaises(OSError):
+            next(sections)
+
+    def test_memory_bounded_by_section(self):
+        with open(self.md_file, "w") as f:
+            f.write(_document(1000))
+        json_file = os.path.join(self.tmpdir.name, "doc.json")
+
+        peaks = []
+        for stream in (False, True):
+            tracemalloc.start()
+            try:
+                convert_file(self.md_file, json_file, verify="none", stream=stream)
+                peaks.append(tracemalloc.get_traced_memory()[1])
+            finally:
+                tracemalloc.stop()
+        in_memory, streamed = peaks
+        self.assertLess(streamed * 10, in_memory, peaks)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: "2026-10-19 01:52:14 (ywatanabe)"
+# File: /home/ywatanabe/proj/mdjson/tests/test_verify.py
+
+__file__ = "/home/ywatanabe/proj/mdjson/tests/test_verify.py"
+
+import json
+import os
+import tempfile
+import unittest
+import warnings
+
+from mdjson.cache import ConversionCache
+from mdjson.convert import convert_file, mdjson
+from mdjson.verify import ReversibilityWarning, parse_verify
+
+REVERSIBLE_MD = "# Section 1\n\nThis is content 1\n\n## Subsection 1.1\n\n- Item\n"
+
+LOSSY_MD = """# Section 1
+
+Some *emphasis* here
+
+### Deep
+
+```{#listing .python .numbered}
+code
+```
+
+* * *
+"""
+
+
+class TestVerify(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _write(self, name, text):
+        path = os.path.join(self.tmpdir.name, name)
+        with open(path, "w") as f:
+            f.write(text)
+        return path
+
+    def test_parse_verify(self):
+        self.assertEqual(parse_verify("structural"), ("structural", 1.0))
+        self.assertEqual(parse_verify("sample=25%"), ("full", 0.25))
+        for bad in ("fast", "sample=150%", "sample=10"):
+            with self.assertRaises(ValueError):
+                parse_verify(bad)
+
+    def test_modes_agree_on_reversible_input(self):
+        md_file = self._write("doc.md", REVERSIBLE_MD)
+        for mode in ("full", "structural"):
+            for engine in ("pandoc", "native"):
+                result = convert_file(md_file, verify=mode, engine=engine)
+                self.assertEqual(result.mode, mode)
+                self.assertTrue(result.checked)
+                self.assertTrue(result.reversible, (mode, engine))
+
+        json_file = md_file[:-3] + ".json"
+        for mode in ("full", "structural"):
+            result = convert_file(json_file, verify=mode)
+            self.assertTrue(result.reversible, mode)
+
+    def test_structural_reports_dropped_elements(self):
+        md_file = self._write("doc.md", LOSSY_MD)
+        result = convert_file(md_file, verify="structural")
+        self.assertFalse(result.reversible)
+        self.assertIn("Emph", result.detail)
+        self.assertIn("CodeAttributes", result.detail)
+        self.assertIn("HorizontalRule", result.detail)
+        self.assertNotIn("Header3", result.detail)
+
+        full = convert_file(md_file, verify="full")
+        self.assertFalse(full.reversible)
+
+    def test_structural_json_to_md(self):
+        json_file = self._write(
+            "doc.json",
+            json.dumps({"sections": [{"title": "A", "content": [[]]}]}),
+        )
+        result = convert_file(json_file, verify="structural")
+        self.assertFalse(result.reversible)
+
+    def test_skipped_checks(self):
+        md_file = self._write("doc.md", LOSSY_MD)
+        for verify in ("none", "sample=0%"):
+            result = convert_file(md_file, verify=verify)
+            self.assertFalse(result.checked)
+            self.assertIsNone(result.reversible)
+
+        cache = ConversionCache(os.path.join(self.tmpdir.name, "c.db"))
+        try:
+            convert_file(md_file, cache=cache)
+            result = convert_file(md_file, cache=cache)
+        finally:
+            cache.close()
+        self.assertFalse(result.checked)
+        self.assertEqual(result.detail, "cache hit")
+
+    def test_mdjson_warns(self):
+        md_file = self._write("doc.md", LOSSY_MD)
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            self.assertEqual(mdjson(md_file), 0)
+            mdjson(md_file, check_reversible=False)
+        self.assertEqual(len(caught), 1)
+        self.assertIs(caught[0].category, ReversibilityWarning)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Time-stamp: "2026-10-19 07:16:02 (ywatanabe)"
+# File: /home/ywatanabe/proj/mdjson/tests/test_watcher.py
+
+__file__ = "/home/ywatanabe/proj/mdjson/tests/test_watcher.py"
+
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from mdjson.watcher import Watcher
+
+
+def write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(text)
+
+
+def title(path):
+    with open(path) as f:
+        return json.load(f)["sections"][0]["title"]
+
+
+class TestWatcher(unittest.TestCase):
+    poll_interval = None
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.src = os.path.join(self.tmpdir.name, "src")
+        self.out = os.path.join(self.tmpdir.name, "out")
+        write(os.path.join(self.src, "a.md"), "# A\n\nText\n")
+        write(os.path.join(self.src, "sub", "b.md"), "# B\n")
+        self.watcher = Watcher(
+            self.src,
+            self.out,
+            debounce=0.05,
+            poll_interval=self.poll_interval,
+            verify="none",
+        )
+
+    def tearDown(self):
+        self.watcher.close()
+        self.tmpdir.cleanup()
+
+    def step(self, timeout=5):
+        events = self.watcher.step(timeout)
+        return sorted(
+            (event.action, os.path.relpath(event.input_file, self.src))
+            for event in events
+        )
+
+    def test_sync_converts_stale_outputs_only(self):
+        events = self.watcher.sync()
+        self.assertEqual(len(events), 2)
+        self.assertTrue(all(event.result.ok for event in events))
+        self.assertEqual(title(os.path.join(self.out, "sub", "b.json")), "B")
+        self.watcher.close()
+        with Watcher(self.src, self.out, poll_interval=0.05) as watcher:
+            self.assertEqual(watcher.sync(), [])
+
+    def test_changed_content_is_converted(self):
+        self.watcher.sync()
+        write(os.path.join(self.src, "a.md"), "# A2\n\nText\n")
+        write(os.path.join(self.src, "new", "c.md"), "# C\n")
+        self.assertEqual(
+            self.step(), [("converted", "a.md"), ("converted", "new/c.md")]
+        )
+        self.assertEqual(title(os.path.join(self.out, "a.json")), "A2")
+        self.assertEqual(title(os.path.join(self.out, "new", "c.json")), "C")
+
+    def test_unchanged_content_is_skipped(self):
+        self.watcher.sync()
+        write(os.path.join(self.src, "a.md"), "# A\n\nText\n")
+        self.assertEqual(self.step(timeout=0.5), [])
+
+    def test_rename_moves_output(self):
+        self.watcher.sync()
+        os.rename(
+            os.path.join(self.src, "sub", "b.md"),
+            os.path.join(self.src, "b2.md"),
+        )
+        self.assertEqual(self.step(), [("moved", "b2.md")])
+        self.assertFalse(os.path.exists(os.path.join(self.out, "sub", "b.json")))
+        self.assertEqual(title(os.path.join(self.out, "b2.json")), "B")
+
+    def test_delete_removes_output(self):
+        self.watcher.sync()
+        os.remove(os.path.join(self.src, "a.md"))
+        self.assertEqual(self.step(), [("removed", "a.md")])
+        self.assertFalse(os.path.exists(os.path.join(self.out, "a.json")))
+
+    def test_failures_are_reported(self):
+        write(os.path.join(self.src, "bad.json"), "{")
+        with Watcher(self.src, self.out, pattern="*.json") as watcher:
+            (event,) = watcher.sync()
+        self.assertEqual(event.action, "converted")
+        self.assertIn("JSONDecodeError", event.result.error)
+
+
+class TestPollingWatcher(TestWatcher):
+    poll_interval = 0.05
+
+    def test_polling(self):
+        self.assertTrue(self.watcher.polling)
+
+
+class TestWatchCli(unittest.TestCase):
+    def test_watch_converts_edits(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            source = os.path.join(tmpdir, "a.md")
+            output = os.path.join(tmpdir, "a.json")
+            write(source, "# A\n")
+            proc = subprocess.Popen(
+                [sys.executable, "-m", "mdjson.cli", tmpdir, "--watch",
+                 "--debounce", "0.05", "--verify", "none"],
+                stderr=subprocess.PIPE,
+                text=True,
+            )
+            try:
+                self.assertIn("Watching", proc.stderr.readline())
+                self.assertIn("converted", proc.stderr.readline())
+                self.assertEqual(title(output), "A")
+                write(source, "# A2\n")
+                self.assertIn("converted", proc.stderr.readline())
+                self.assertEqual(title(output), "A2")
+            finally:
+                proc.send_signal(signal.SIGINT)
+                proc.wait(timeout=10)
+                proc.stderr.close()
+            self.assertEqual(proc.returncode, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()